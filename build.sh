@@ -5,4 +5,6 @@ set -o errexit
 pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
+# Bytecode gerado no build: a instância não recompila o projeto a cada cold start
+python -m compileall -q core financas_pessoais
 python manage.py migrate
\ No newline at end of file
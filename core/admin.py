@@ -1,9 +1,137 @@
 # financas_pessoais/core/admin.py
 
-from django.contrib import admin
-from .models import Categoria, Transacao, MetaFinanceira # Importe seus modelos
+import json
+
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import Categoria, Transacao, MetaFinanceira, RegraCategorizacao, TaxaCambio, Orcamento, RegistroAlteracao, Anomalia # Importe seus modelos
+
+
+def estimar_contagem(queryset):
+    """
+    Estimativa do número de linhas pelo PostgreSQL (None nos outros bancos):
+    sem filtros, reltuples da tabela (atualizado pelo ANALYZE/autovacuum);
+    com filtros, as linhas estimadas pelo planejador no EXPLAIN da própria consulta.
+    """
+    conexao = connections[queryset.db]
+    if conexao.vendor != 'postgresql':
+        return None
+    with conexao.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            linha = cursor.fetchone()
+            return linha[0] if linha and linha[0] >= 0 else None # -1: tabela ainda não analisada
+        # Compilado para o banco do próprio queryset (ex.: uma réplica), não para o default
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plano = cursor.fetchone()[0]
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        return int(plano[0]['Plan']['Plan Rows'])
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginator do admin para tabelas grandes: acima de LIMITE_CONTAGEM_EXATA linhas usa a
+    estimativa do PostgreSQL em vez de COUNT(*), que percorre a tabela inteira.
+    """
+    LIMITE_CONTAGEM_EXATA = 10000
+
+    @cached_property
+    def count(self):
+        estimativa = estimar_contagem(self.object_list)
+        if estimativa is None or estimativa < self.LIMITE_CONTAGEM_EXATA:
+            return super().count
+        return estimativa
+
+
+class AdminTabelaGrande(admin.ModelAdmin):
+    paginator = PaginadorEstimado
+    show_full_result_count = False # Evita um segundo COUNT(*) sem filtros na listagem
+
+
+@admin.register(Categoria)
+class CategoriaAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'tipo_categoria')
+    list_filter = ('tipo_categoria',)
+    search_fields = ('nome',) # Usado pelo autocomplete das transações e orçamentos
+
+
+@admin.register(Transacao)
+class TransacaoAdmin(AdminTabelaGrande):
+    list_display = ('descricao', 'valor', 'moeda', 'data_transacao', 'tipo', 'status', 'categoria')
+    list_select_related = ('categoria',)
+    # Filtros e ordenação atendidos pelos índices (data_transacao), (tipo, data_transacao) e (categoria, data_transacao)
+    date_hierarchy = 'data_transacao'
+    list_filter = ('tipo', 'categoria')
+    ordering = ('-data_transacao', '-id')
+    autocomplete_fields = ('categoria',)
+    actions = ('marcar_como_pagas', 'marcar_como_pendentes')
+
+    def _atualizar_status(self, request, queryset, novo_status):
+        # Um UPDATE para todas as selecionadas (inclusive com "selecionar todas"), sem carregar os objetos;
+        # o log de alterações é gravado no banco por INSERT ... SELECT (ver AuditadoQuerySet.update)
+        afetadas = queryset.exclude(status=novo_status).update(status=novo_status, data_atualizacao=timezone.now())
+        self.message_user(request, f"{afetadas} transação(ões) atualizada(s).", messages.SUCCESS)
+
+    @admin.action(description="Marcar selecionadas como pagas")
+    def marcar_como_pagas(self, request, queryset):
+        self._atualizar_status(request, queryset, 'pago')
+
+    @admin.action(description="Marcar selecionadas como pendentes")
+    def marcar_como_pendentes(self, request, queryset):
+        self._atualizar_status(request, queryset, 'pendente')
+
+
+@admin.register(MetaFinanceira)
+class MetaFinanceiraAdmin(AdminTabelaGrande):
+    list_display = ('nome', 'tipo', 'valor_alvo', 'valor_atingido', 'data_limite', 'concluida')
+    list_filter = ('tipo', 'concluida')
+    date_hierarchy = 'data_limite'
+    actions = ('marcar_como_concluidas',)
+
+    @admin.action(description="Marcar selecionadas como concluídas")
+    def marcar_como_concluidas(self, request, queryset):
+        afetadas = queryset.filter(concluida=False).update(concluida=True, data_atualizacao=timezone.now())
+        self.message_user(request, f"{afetadas} meta(s) concluída(s).", messages.SUCCESS)
+
+
+@admin.register(Orcamento)
+class OrcamentoAdmin(admin.ModelAdmin):
+    list_display = ('categoria', 'valor_limite', 'limiar_alerta', 'ativo')
+    list_select_related = ('categoria',)
+    autocomplete_fields = ('categoria',)
+
+
+@admin.register(Anomalia)
+class AnomaliaAdmin(AdminTabelaGrande):
+    list_display = ('chave', 'tipo', 'situacao', 'pontuacao', 'data_criacao')
+    list_filter = ('tipo', 'situacao')
+    raw_id_fields = ('transacao', 'transacao_relacionada')
+
+
+@admin.register(RegistroAlteracao)
+class RegistroAlteracaoAdmin(AdminTabelaGrande):
+    list_display = ('sequencia', 'operacao', 'modelo', 'objeto_id', 'usuario', 'origem', 'data_criacao')
+    list_select_related = ('usuario',)
+    list_filter = ('modelo', 'operacao')
+    ordering = ('-sequencia',)
+
+    # O log é somente inclusão
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
 # Registre seus modelos aqui.
-admin.site.register(Categoria)
-admin.site.register(Transacao)
-admin.site.register(MetaFinanceira)
\ No newline at end of file
+admin.site.register(RegraCategorizacao)
+admin.site.register(TaxaCambio)
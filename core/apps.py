@@ -0,0 +1,12 @@
+# financas_pessoais/core/apps.py
+
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        # Registra os receivers de sinais (atualização incremental dos insights)
+        from . import signals  # noqa: F401
@@ -0,0 +1,73 @@
+# financas_pessoais/core/aquecimento.py
+
+import logging
+import time
+
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Etapas do aquecimento: {nome: função()}, executadas em ordem por aquecer()
+ETAPAS = {}
+
+
+def etapa(nome):
+    def decorator(funcao):
+        ETAPAS[nome] = funcao
+        return funcao
+    return decorator
+
+
+@etapa('urls')
+def importar_urls():
+    # O Django só importa o URLconf (e, com ele, views, serializers e filtros) na primeira requisição
+    from django.urls import get_resolver
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+
+@etapa('drf')
+def carregar_classes_drf():
+    # As classes padrão do DRF (renderers, parsers, filtros...) são importadas no primeiro acesso
+    from rest_framework.settings import api_settings
+    for nome in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_AUTHENTICATION_CLASSES',
+                 'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_CONTENT_NEGOTIATION_CLASS', 'DEFAULT_FILTER_BACKENDS'):
+        getattr(api_settings, nome)
+
+
+@etapa('categorias')
+def carregar_categorias():
+    from .categorias import mapa_categorias
+    mapa_categorias()
+
+
+@etapa('cambio')
+def carregar_cotacoes():
+    from .cambio import tabela_taxas
+    tabela_taxas()
+
+
+@etapa('categorizacao')
+def compilar_regras():
+    from .categorizacao import obter_motor
+    obter_motor()
+
+
+def aquecer():
+    """
+    Deixa o processo pronto para a primeira requisição: importa o código que o Django carregaria
+    sob demanda e preenche os caches em memória. Devolve o tempo de cada etapa em ms.
+    Com o banco indisponível as etapas que o consultam são puladas (a aplicação sobe do mesmo jeito).
+    As conexões abertas aqui são fechadas no fim: com preload_app os workers não podem herdá-las.
+    """
+    tempos = {}
+    for nome, funcao in ETAPAS.items():
+        inicio = time.perf_counter()
+        try:
+            funcao()
+        except DatabaseError:
+            logger.warning("Aquecimento: etapa '%s' ignorada (banco indisponível)", nome, exc_info=True)
+        tempos[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+    connections.close_all()
+    return tempos
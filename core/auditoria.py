@@ -0,0 +1,213 @@
+# financas_pessoais/core/auditoria.py
+
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router
+from django.db.models import Case, F, Func, OuterRef, Subquery, Value, When, Window
+from django.db.models.functions import JSONObject, RowNumber
+from django.utils import timezone
+
+from .models import RegistroAlteracao, SequenciaAlteracao
+
+# Toda escrita em Transacao/MetaFinanceira (save, delete, update e bulk_create) gera um
+# RegistroAlteracao na mesma transação do banco. A sequência vem de um contador de linha única:
+# o UPDATE trava a linha até o commit, então duas transações nunca confirmam sequências fora
+# de ordem e quem lê o log por "sequencia > X" não pula alterações.
+# O preço é que as transações que escrevem nesses modelos se enfileiram no contador, do registro
+# no log até o commit (o registro é feito depois da própria escrita, então a trava dura só o resto
+# da transação). Com uma sequência do banco não haveria fila, mas os números seriam confirmados fora
+# de ordem e cada leitor (sincronização, detecção, facetas, versão dos resumos) teria de tratar os
+# buracos. A vazão com escritores concorrentes é medida por `python manage.py benchmark auditoria`.
+
+# Requisição atual (para saber o usuário) e origem da escrita
+_requisicao = ContextVar('auditoria_requisicao', default=None)
+_origem = ContextVar('auditoria_origem', default='')
+
+
+@contextmanager
+def origem(descricao):
+    """Identifica escritas feitas fora de requisições (ex.: with origem('tarefa insights.atualizar'))."""
+    token = _origem.set(descricao)
+    try:
+        yield
+    finally:
+        _origem.reset(token)
+
+
+class AuditoriaMiddleware:
+    """Guarda a requisição atual para o log saber quem fez cada alteração."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token_requisicao = _requisicao.set(request)
+        token_origem = _origem.set(f"{request.method} {request.path}"[:255])
+        try:
+            return self.get_response(request)
+        finally:
+            _requisicao.reset(token_requisicao)
+            _origem.reset(token_origem)
+
+
+def usuario_atual():
+    # Lido só na hora da escrita: a autenticação do DRF acontece dentro da view
+    requisicao = _requisicao.get()
+    usuario = getattr(requisicao, 'user', None)
+    return usuario if usuario is not None and usuario.is_authenticated else None
+
+
+def _travar_contador(banco):
+    """Trava a linha do contador até o commit e devolve a última sequência usada."""
+    contador = SequenciaAlteracao.objects.using(banco)
+    if not contador.filter(pk=1).update(ultima=F('ultima')):
+        contador.get_or_create(pk=1)
+        contador.filter(pk=1).update(ultima=F('ultima'))
+    return contador.values_list('ultima', flat=True).get(pk=1)
+
+
+def reservar_sequencias(quantidade, banco):
+    contador = SequenciaAlteracao.objects.using(banco)
+    if not contador.filter(pk=1).update(ultima=F('ultima') + quantidade):
+        contador.get_or_create(pk=1)
+        contador.filter(pk=1).update(ultima=F('ultima') + quantidade)
+    ultima = contador.values_list('ultima', flat=True).get(pk=1)
+    return range(ultima - quantidade + 1, ultima + 1)
+
+
+def dados_do_objeto(obj):
+    """Campos concretos do objeto (chaves estrangeiras pelo id), prontos para JSON."""
+    valores = {campo.name: campo.value_from_object(obj) for campo in obj._meta.concrete_fields}
+    return json.loads(json.dumps(valores, cls=DjangoJSONEncoder))
+
+
+def registrar(modelo, linhas, operacao, banco=None):
+    """Grava no log as linhas [(objeto_id, dados)] de uma mesma operação."""
+    if not linhas:
+        return
+    banco = banco or router.db_for_write(RegistroAlteracao)
+    usuario, descricao = usuario_atual(), _origem.get()
+    RegistroAlteracao.objects.using(banco).bulk_create([
+        RegistroAlteracao(
+            sequencia=sequencia,
+            modelo=modelo._meta.model_name,
+            objeto_id=objeto_id,
+            operacao=operacao,
+            dados=dados,
+            usuario=usuario,
+            origem=descricao,
+        )
+        for sequencia, (objeto_id, dados) in zip(reservar_sequencias(len(linhas), banco), linhas)
+    ], batch_size=500)
+
+
+def registrar_objetos(objetos, operacao, banco=None):
+    if not objetos:
+        return
+    modelo = type(objetos[0])
+    adiados = [obj.pk for obj in objetos if obj.get_deferred_fields()]
+    if adiados:
+        # Objetos carregados com .only()/.defer(): o estado completo vem do banco
+        registrar_ids(modelo, adiados, operacao, banco)
+    registrar(modelo, [(obj.pk, dados_do_objeto(obj)) for obj in objetos if not obj.get_deferred_fields()], operacao, banco)
+
+
+def registrar_ids(modelo, ids, operacao, banco=None):
+    banco = banco or router.db_for_write(modelo)
+    for inicio in range(0, len(ids), 500):
+        objetos = modelo._base_manager.using(banco).filter(pk__in=ids[inicio:inicio + 500]).order_by('pk')
+        registrar(modelo, [(obj.pk, dados_do_objeto(obj)) for obj in objetos], operacao, banco)
+
+
+def _expressao_json(campo, vendor):
+    """
+    Expressão SQL do campo no mesmo formato que dados_do_objeto() produz com o DjangoJSONEncoder:
+    decimais e datas/horas como texto, booleanos como true/false.
+    """
+    coluna = F(campo.attname)
+    if isinstance(campo, models.DecimalField):
+        if vendor == 'postgresql':
+            texto = Func(coluna, template='(%(expressions)s)::text', output_field=models.TextField())
+        else:
+            texto = Func(Value(f'%.{campo.decimal_places}f'), coluna, function='printf', output_field=models.TextField())
+    elif isinstance(campo, models.DateTimeField):
+        # Milissegundos truncados, e sem fração quando ela é zero, como no DjangoJSONEncoder
+        if vendor == 'postgresql':
+            texto = Func(
+                coluna,
+                template=(
+                    "to_char(%(expressions)s AT TIME ZONE 'UTC', CASE WHEN date_trunc('second', %(expressions)s) = %(expressions)s "
+                    "THEN 'YYYY-MM-DD\"T\"HH24:MI:SS\"Z\"' ELSE 'YYYY-MM-DD\"T\"HH24:MI:SS.MS\"Z\"' END)"
+                ),
+                output_field=models.TextField(),
+            )
+        else:
+            # O SQLite guarda 'AAAA-MM-DD HH:MM:SS[.ffffff]' em UTC
+            texto = Func(
+                coluna,
+                template="replace(substr(%(expressions)s, 1, 23), ' ', 'T') || 'Z'",
+                output_field=models.TextField(),
+            )
+    elif isinstance(campo, models.BooleanField) and vendor == 'sqlite':
+        # O SQLite guarda 0/1: json() devolve true/false como JSON, não como número
+        return Func(
+            Case(When(**{campo.attname: True}, then=Value('true')), When(**{campo.attname: False}, then=Value('false'))),
+            function='json',
+            output_field=models.JSONField(),
+        )
+    else:
+        return coluna
+    return Case(When(**{f'{campo.attname}__isnull': True}, then=Value(None)), default=texto, output_field=models.TextField())
+
+
+def atualizar_e_registrar(queryset, valores, banco, antes_de_atualizar=None):
+    """
+    UPDATE em lote auditado sem trazer as linhas para o Python: um INSERT ... SELECT grava no log
+    uma linha por objeto do queryset (sequências contíguas a partir do contador travado), um único
+    UPDATE altera esses objetos e outro UPDATE preenche os dados do log a partir das linhas já
+    alteradas. Deve rodar dentro de transaction.atomic(); devolve o número de linhas alteradas.
+    antes_de_atualizar(alvo) recebe, antes do UPDATE, o queryset das linhas que ele vai alterar
+    (identificadas pelo log, então continua o mesmo depois dele): ex.: agrupá-las antes e depois.
+    """
+    modelo = queryset.model
+    conexao = connections[banco]
+    base = _travar_contador(banco)
+    selecao = (
+        queryset.using(banco).order_by()
+        .annotate(objeto_log=F('pk'), sequencia_log=Window(RowNumber(), order_by=F('pk').asc()))
+        .values_list('sequencia_log', 'objeto_log')
+    )
+    sql_selecao, parametros_selecao = selecao.query.get_compiler(banco).as_sql()
+    usuario = usuario_atual()
+    log = RegistroAlteracao._meta
+    colunas = ', '.join(
+        conexao.ops.quote_name(log.get_field(nome).column)
+        for nome in ('sequencia', 'modelo', 'objeto_id', 'operacao', 'dados', 'usuario', 'origem', 'data_criacao')
+    )
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {conexao.ops.quote_name(log.db_table)} ({colunas}) '
+            f'SELECT %s + s.sequencia_log, %s, s.objeto_log, %s, %s, %s, %s, %s FROM ({sql_selecao}) s',
+            (
+                base, modelo._meta.model_name, 'alteracao', '{}', usuario.pk if usuario else None,
+                _origem.get(), conexao.ops.adapt_datetimefield_value(timezone.now()), *parametros_selecao,
+            ),
+        )
+        quantidade = cursor.rowcount
+    if not quantidade:
+        return 0
+    SequenciaAlteracao.objects.using(banco).filter(pk=1).update(ultima=F('ultima') + quantidade)
+
+    registros = RegistroAlteracao.objects.using(banco).filter(sequencia__gt=base, sequencia__lte=base + quantidade)
+    alvo = models.QuerySet(modelo, using=banco).filter(pk__in=Subquery(registros.values('objeto_id')))
+    if antes_de_atualizar is not None:
+        antes_de_atualizar(alvo)
+    afetadas = alvo.update(**valores)
+    estado = models.QuerySet(modelo, using=banco).filter(pk=OuterRef('objeto_id')).values(
+        json=JSONObject(**{campo.name: _expressao_json(campo, conexao.vendor) for campo in modelo._meta.concrete_fields})
+    )
+    registros.update(dados=Subquery(estado[:1]))
+    return afetadas
@@ -0,0 +1,139 @@
+# financas_pessoais/core/cambio.py
+
+import threading
+import time
+from bisect import bisect_right
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db.models import BigIntegerField, Case, Count, DecimalField, ExpressionWrapper, F, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+
+from .models import Transacao, TaxaCambio, simbolo_moeda
+
+# Cada transação tem sua moeda; relatórios e análises somam tudo convertido para a moeda de
+# relatório (MOEDA_RELATORIO). A cotação usada é a mais recente até a data da transação (ou,
+# se a transação for anterior a todas as cotações da moeda, a primeira disponível).
+
+
+def moeda_relatorio():
+    return getattr(settings, 'MOEDA_RELATORIO', 'BRL')
+
+
+def formatar(valor, moeda=None):
+    """Ex.: formatar(Decimal('10.5')) -> 'R$ 10.50'."""
+    return f"{simbolo_moeda(moeda or moeda_relatorio())} {valor:.2f}"
+
+
+# --- Conversão no banco (agregações) ---
+
+def taxa_sql():
+    """Cotação vigente da moeda da transação na data da transação, via índice (moeda, data)."""
+    taxas = TaxaCambio.objects.filter(moeda=OuterRef('moeda')).values('taxa')
+    anterior = taxas.filter(data__lte=OuterRef('data_transacao')).order_by('-data')[:1]
+    primeira = taxas.order_by('data')[:1]
+    return Coalesce(Subquery(anterior), Subquery(primeira))
+
+
+def valor_convertido(coluna, centavos=False):
+    """
+    Expressão SQL com o valor da transação na moeda de relatório, arredondado por linha
+    (2 casas, ou centavos inteiros). Transações já na moeda de relatório não consultam cotação.
+    Transações numa moeda sem nenhuma cotação carregada entram como zero (a API não aceita
+    transações nessas moedas; ver TransacaoSerializer.validate_moeda).
+    """
+    produto = ExpressionWrapper(F(coluna) * taxa_sql(), output_field=DecimalField(max_digits=30, decimal_places=10))
+    if centavos:
+        campo_saida = BigIntegerField()
+        convertido = Coalesce(Cast(Round(produto), campo_saida), Value(0), output_field=campo_saida)
+    else:
+        campo_saida = DecimalField(max_digits=20, decimal_places=2)
+        convertido = Coalesce(Round(produto, 2, output_field=campo_saida), Value(Decimal('0.00')), output_field=campo_saida)
+    return Case(When(moeda=moeda_relatorio(), then=F(coluna)), default=convertido, output_field=campo_saida)
+
+
+# --- Conversão em Python (valores individuais), com as cotações em cache por processo ---
+_trava = threading.Lock()
+_cache = {'tabela': None, 'versao': None, 'verificada_em': 0.0}
+
+
+def limpar_cache():
+    with _trava:
+        _cache['tabela'] = None
+
+
+def versao_cotacoes():
+    """Muda a cada cotação incluída, alterada (data_atualizacao) ou excluída, em qualquer processo."""
+    versao = TaxaCambio.objects.aggregate(quantidade=Count('id'), ultimo=Max('id'), atualizacao=Max('data_atualizacao'))
+    return versao['quantidade'], versao['ultimo'], versao['atualizacao']
+
+
+def tabela_taxas(exata=True):
+    """
+    {moeda: ([datas em ordem], [taxas])}, reaproveitada enquanto a versão das cotações no banco não muda.
+    Com exata=True (padrão; ex.: contadores de orçamento, que acumulam cada conversão) a versão é
+    conferida a cada chamada, então uma carga de cotações feita por outro worker vale na hora.
+    Com exata=False (só exibição, ex.: valor_relatorio das listagens) a versão é conferida no máximo
+    a cada CAMBIO_CACHE_SEGUNDOS, sem uma consulta por linha.
+    """
+    validade = 0 if exata else getattr(settings, 'CAMBIO_CACHE_SEGUNDOS', 300)
+    with _trava:
+        tabela, versao_em_cache = _cache['tabela'], _cache['versao']
+        if tabela is not None and time.monotonic() - _cache['verificada_em'] < validade:
+            return tabela
+    versao = versao_cotacoes()
+    if tabela is not None and versao == versao_em_cache:
+        with _trava:
+            _cache['verificada_em'] = time.monotonic()
+        return tabela
+    tabela = {}
+    for moeda, data, taxa in TaxaCambio.objects.order_by('moeda', 'data').values_list('moeda', 'data', 'taxa'):
+        datas, taxas = tabela.setdefault(moeda, ([], []))
+        datas.append(data)
+        taxas.append(taxa)
+    with _trava:
+        _cache.update(tabela=tabela, versao=versao, verificada_em=time.monotonic())
+    return tabela
+
+
+def cotacoes_alteradas():
+    """
+    Chamada depois de gravar/excluir cotações: limpa o cache e refaz o que depende dos totais
+    convertidos (resumos mensais, gastos dos orçamentos e insights dos anos com transações em outras moedas).
+    """
+    # Importados aqui porque resumos e insights dependem deste módulo
+    from . import insights, orcamentos, resumos
+    limpar_cache()
+    resumos.invalidar_todos()
+    orcamentos.recalcular_gastos()
+    anos = {data.year for data in Transacao.objects.exclude(moeda=moeda_relatorio()).dates('data_transacao', 'year')}
+    if anos:
+        insights.agendar_atualizacao(*anos, *(ano + 1 for ano in anos))
+
+
+def moeda_suportada(moeda):
+    return moeda == moeda_relatorio() or moeda in tabela_taxas()
+
+
+def taxa(moeda, data, exata=True):
+    """Cotação vigente (mesma regra de taxa_sql()); None se não houver cotação da moeda."""
+    if moeda == moeda_relatorio():
+        return Decimal(1)
+    cotacoes = tabela_taxas(exata).get(moeda)
+    if not cotacoes:
+        return None
+    datas, taxas = cotacoes
+    return taxas[max(bisect_right(datas, data) - 1, 0)]
+
+
+def converter(valor, moeda, data, exata=True):
+    """
+    Valor na moeda de relatório, arredondado a 2 casas como na agregação; None sem cotação.
+    exata=False aceita cotações em cache há até CAMBIO_CACHE_SEGUNDOS (ver tabela_taxas).
+    """
+    cotacao = taxa(moeda, data, exata)
+    if cotacao is None:
+        return None
+    if not isinstance(valor, Decimal):
+        valor = Decimal(str(valor)) # Atribuído como texto/número (ex.: create(valor='10.00')), ainda não convertido pelo campo
+    return (valor * cotacao).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
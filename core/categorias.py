@@ -0,0 +1,42 @@
+# financas_pessoais/core/categorias.py
+
+import threading
+
+from django.db.models import Count, Max
+
+from .models import Categoria
+
+# Mapa das categorias em memória, por processo: {id: dados serializados}, em ordem de nome.
+# A tabela é pequena e quase só lida (os filtros e formulários do frontend carregam todas as
+# categorias a cada tela), então a lista completa é servida daqui; o banco só é consultado para
+# conferir a versão (um aggregate), como nas cotações (core/cambio.py).
+_trava = threading.Lock()
+_cache = {'mapa': None, 'versao': None}
+
+
+def limpar_cache():
+    with _trava:
+        _cache['mapa'] = None
+
+
+def versao_categorias():
+    """Muda a cada categoria incluída, alterada (data_atualizacao) ou excluída, em qualquer processo."""
+    versao = Categoria.objects.aggregate(quantidade=Count('id'), ultimo=Max('id'), atualizacao=Max('data_atualizacao'))
+    return versao['quantidade'], versao['ultimo'], versao['atualizacao']
+
+
+def mapa_categorias():
+    """
+    {id: dados do CategoriaSerializer}, reaproveitado enquanto a versão das categorias no banco não
+    muda: uma gravação feita por outro worker aparece já na requisição seguinte.
+    """
+    from .serializers import CategoriaSerializer # serializers importa módulos que dependem deste
+
+    versao = versao_categorias()
+    with _trava:
+        if _cache['mapa'] is not None and _cache['versao'] == versao:
+            return _cache['mapa']
+    mapa = {dados['id']: dados for dados in CategoriaSerializer(Categoria.objects.order_by('nome'), many=True).data}
+    with _trava:
+        _cache.update(mapa=mapa, versao=versao)
+    return mapa
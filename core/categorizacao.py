@@ -0,0 +1,271 @@
+# financas_pessoais/core/categorizacao.py
+
+import logging
+import re
+import threading
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Categoria, Transacao, RegraCategorizacao
+from . import insights, resumos, orcamentos
+
+logger = logging.getLogger(__name__)
+
+# Grupos nomeados e referências numéricas quebrariam o regex combinado de todas as regras
+PADRAO_NAO_SUPORTADO = re.compile(r'\(\?P[<=]|\\\d')
+# Flags globais como (?i) só valem no início do regex inteiro, nunca dentro de uma alternativa
+FLAGS_GLOBAIS = re.compile(r'\(\?[aiLmsux]+\)')
+
+
+def alternativa(padrao, indice):
+    """Como o padrão entra no regex combinado do motor (o grupo vazio identifica a regra)."""
+    return f'.*?(?:{padrao})(?P<r{indice}>)'
+
+
+def validar_padrao(padrao):
+    """Valida o padrão de uma regra; levanta ValueError com a mensagem para o usuário."""
+    if PADRAO_NAO_SUPORTADO.search(padrao):
+        raise ValueError("Grupos nomeados e referências como \\1 não são suportados no padrão.")
+    if FLAGS_GLOBAIS.search(padrao):
+        raise ValueError("Flags como (?i) não são suportadas no padrão (a comparação já ignora maiúsculas).")
+    try:
+        re.compile(padrao, re.IGNORECASE)
+        # O padrão também precisa compilar dentro do regex combinado com as outras regras
+        re.compile(f'(?:{alternativa(padrao, 0)})', re.IGNORECASE | re.DOTALL)
+    except re.error as erro:
+        raise ValueError(f"Expressão regular inválida: {erro}")
+
+
+class MotorCategorizacao:
+    """
+    Regras ativas pré-compiladas em um único regex por tipo de transação.
+    As alternativas seguem a ordem de prioridade, então um único match devolve a regra
+    de maior prioridade cujo padrão casa com a descrição.
+    """
+
+    def __init__(self, regras):
+        self.regras = []
+        for regra in regras:
+            try:
+                validar_padrao(regra.padrao_descricao)
+            except ValueError:
+                # Regra gravada antes da validação atual: ignorada para não derrubar todas as outras
+                logger.warning("Regra de categorização %s ignorada: padrão inválido %r", regra.pk, regra.padrao_descricao)
+                continue
+            self.regras.append(regra)
+        self.padroes = [re.compile(regra.padrao_descricao, re.IGNORECASE) for regra in self.regras]
+        self.combinados = {}
+        for tipo, _ in Transacao.TIPO_CHOICES:
+            indices = [i for i, regra in enumerate(self.regras) if regra.tipo in ('', tipo)]
+            if indices:
+                alternativas = '|'.join(
+                    alternativa(self.regras[i].padrao_descricao, i) for i in indices
+                )
+                self.combinados[tipo] = (re.compile(f'(?:{alternativas})', re.IGNORECASE | re.DOTALL), indices)
+
+    def _aceita_valor(self, regra, valor):
+        if regra.valor_min is None and regra.valor_max is None:
+            return True
+        if valor is None:
+            return False
+        if not isinstance(valor, Decimal):
+            valor = Decimal(str(valor)) # Transação ainda não salva com o valor em texto (ex.: '10.00')
+        if regra.valor_min is not None and valor < regra.valor_min:
+            return False
+        if regra.valor_max is not None and valor > regra.valor_max:
+            return False
+        return True
+
+    def regra_para(self, descricao, valor, tipo):
+        """Devolve a regra de maior prioridade que se aplica à transação, ou None."""
+        combinado = self.combinados.get(tipo)
+        if combinado is None:
+            return None
+        regex, indices = combinado
+        match = regex.match(descricao or '')
+        if match is None:
+            return None
+        indice = int(match.lastgroup[1:])
+        if self._aceita_valor(self.regras[indice], valor):
+            return self.regras[indice]
+        # A regra encontrada não aceita o valor: continua pelas regras de menor prioridade
+        for i in indices[indices.index(indice) + 1:]:
+            regra = self.regras[i]
+            if self._aceita_valor(regra, valor) and self.padroes[i].search(descricao or ''):
+                return regra
+        return None
+
+
+_cache = threading.local()
+
+
+def obter_motor():
+    """
+    Motor compilado com as regras ativas. É recompilado apenas quando as regras mudam
+    (contagem ou última atualização), o que funciona também entre vários workers.
+    """
+    versao = tuple(RegraCategorizacao.objects.aggregate(total=Count('id'), ultima=Max('data_atualizacao')).values())
+    if getattr(_cache, 'versao', None) != versao:
+        _cache.motor = MotorCategorizacao(
+            RegraCategorizacao.objects.filter(ativa=True).order_by('prioridade', 'id')
+        )
+        _cache.versao = versao
+    return _cache.motor
+
+
+def categorizar(transacoes, motor=None):
+    """
+    Preenche a categoria das transações (ainda não salvas ou sem categoria) em uma única passada.
+    Chamada também pelo bulk_create de transações (importações). Devolve quantas foram categorizadas.
+    """
+    motor = motor or obter_motor()
+    categorizadas = 0
+    for transacao in transacoes:
+        if transacao.categoria_id is not None:
+            continue
+        regra = motor.regra_para(transacao.descricao, transacao.valor, transacao.tipo)
+        if regra is not None:
+            # Só o id: o motor fica em cache entre requisições e a categoria dele pode estar
+            # desatualizada (ex.: renomeada); nome e tipo são lidos na hora por quem grava
+            transacao.categoria_id = regra.categoria_id
+            categorizadas += 1
+    return categorizadas
+
+
+# Subconjunto de regex que o banco avalia igual ao `re` do Python em uma busca sem distinção de
+# maiúsculas: literais, classes (\d \w \s e escapes de pontuação, sem classes POSIX), grupos (?:...)
+# e quantificadores. \b, \A, \Z, lookarounds e afins ficam de fora: no PostgreSQL \b é backspace,
+# \D/\S/\W não podem aparecer dentro de colchetes e lookbehind não existe em versões antigas
+_TOKEN_PORTAVEL = re.compile(r'''
+    \\[dDwWsS]                                                # classes abreviadas fora de colchetes
+  | \\[^A-Za-z0-9]                                            # pontuação escapada
+  | \(\?:                                                     # grupo sem captura
+  | \((?!\?)                                                  # grupo comum
+  | \{\d+(?:,\d*)?\}                                          # repetição {m}, {m,} ou {m,n}
+  | \[\^?\]?(?:\\[dws]|\\[^A-Za-z0-9]|[^\\\]\[])*\]           # classe entre colchetes
+  | [^\\\[({}]                                                # qualquer outro caractere
+''', re.VERBOSE)
+
+
+def padrao_portavel(padrao):
+    """Se o padrão tem o mesmo significado no regex do PostgreSQL e no `re` do Python."""
+    posicao = 0
+    while posicao < len(padrao):
+        token = _TOKEN_PORTAVEL.match(padrao, posicao)
+        if token is None:
+            return False
+        posicao = token.end()
+    return True
+
+
+def padrao_no_banco(padrao, vendor):
+    """
+    Se a regra pode ser aplicada com um UPDATE filtrado por descricao__iregex. No SQLite o REGEXP
+    do Django é o próprio `re` do Python; no PostgreSQL só o subconjunto portável; nos outros bancos
+    (dialetos de regex diferentes) a regra passa sempre pelo motor em Python.
+    """
+    if vendor == 'sqlite':
+        return True
+    return vendor == 'postgresql' and padrao_portavel(padrao)
+
+
+def predicado(regra):
+    """Filtro equivalente a MotorCategorizacao.regra_para para uma regra só."""
+    filtro = Q(descricao__iregex=regra.padrao_descricao)
+    if regra.tipo:
+        filtro &= Q(tipo=regra.tipo)
+    if regra.valor_min is not None:
+        filtro &= Q(valor__gte=regra.valor_min)
+    if regra.valor_max is not None:
+        filtro &= Q(valor__lte=regra.valor_max)
+    return filtro
+
+
+def aplicar_regras(regras, dry_run=False, somente_sem_categoria=False, tamanho_lote=2000):
+    """
+    Aplica as regras ao histórico na ordem de prioridade, com um UPDATE por regra:
+    Transacao.objects.filter(<predicado da regra>).exclude(<linhas das regras anteriores>).update(...).
+    Cada linha fica com a regra de maior prioridade que casa com ela, como no motor das transações
+    novas (somente_sem_categoria: só as que ainda não têm categoria).
+
+    Regras cujo padrão o banco não avalia igual ao Python (ver padrao_no_banco) são aplicadas pelo
+    MotorCategorizacao: as linhas ainda não reivindicadas são lidas em lotes, e os ids reivindicados
+    por essas regras são excluídos das regras seguintes. No SQLite e com padrões comuns no
+    PostgreSQL nenhuma linha passa pelo Python.
+
+    As contagens usam o mesmo filtro do UPDATE, então o dry_run informa exatamente o que a
+    aplicação real faria. Com dry_run nada é gravado.
+    """
+    motor = MotorCategorizacao(sorted(regras, key=lambda regra: (regra.prioridade, regra.id)))
+    banco = router.db_for_write(Transacao)
+    vendor = connections[banco].vendor
+    transacoes = Transacao.objects.using(banco)
+    if somente_sem_categoria:
+        transacoes = transacoes.filter(categoria__isnull=True)
+    categorias = Categoria.objects.using(banco).in_bulk({regra.categoria_id for regra in motor.regras})
+    agora = timezone.now()
+
+    afetadas = {}
+    meses = set()
+    reivindicadas = None # OR dos predicados das regras já aplicadas no banco
+    ids_motor = set()    # Linhas reivindicadas pelas regras aplicadas em Python
+
+    def pendentes():
+        linhas = transacoes
+        if reivindicadas is not None:
+            linhas = linhas.exclude(reivindicadas)
+        if ids_motor:
+            linhas = linhas.exclude(pk__in=ids_motor)
+        return linhas
+
+    def atualizar(regra, linhas):
+        alteradas = linhas.exclude(categoria_id=regra.categoria_id)
+        if dry_run:
+            return alteradas.count()
+        meses.update(alteradas.dates('data_transacao', 'month'))
+        return alteradas.update(categoria=categorias[regra.categoria_id], data_atualizacao=agora)
+
+    with transaction.atomic(using=banco):
+        indice = 0
+        while indice < len(motor.regras):
+            regra = motor.regras[indice]
+            if padrao_no_banco(regra.padrao_descricao, vendor):
+                afetadas[regra.id] = atualizar(regra, pendentes().filter(predicado(regra)))
+                reivindicadas = predicado(regra) if reivindicadas is None else reivindicadas | predicado(regra)
+                indice += 1
+                continue
+
+            # Regras seguidas que o banco não avalia: uma leitura só das linhas pendentes
+            grupo = []
+            while indice < len(motor.regras) and not padrao_no_banco(motor.regras[indice].padrao_descricao, vendor):
+                grupo.append(motor.regras[indice])
+                indice += 1
+            motor_grupo = MotorCategorizacao(grupo)
+            por_regra = {regra.id: [] for regra in grupo}
+            linhas = pendentes().order_by('pk').values_list('pk', 'descricao', 'valor', 'tipo')
+            for pk, descricao, valor, tipo in linhas.iterator(chunk_size=tamanho_lote):
+                encontrada = motor_grupo.regra_para(descricao, valor, tipo)
+                if encontrada is not None:
+                    por_regra[encontrada.id].append(pk)
+            for regra in grupo:
+                ids = por_regra[regra.id]
+                afetadas[regra.id] = 0
+                for inicio in range(0, len(ids), tamanho_lote):
+                    lote = transacoes.filter(pk__in=ids[inicio:inicio + tamanho_lote])
+                    afetadas[regra.id] += atualizar(regra, lote)
+                ids_motor.update(ids)
+
+        if meses:
+            # O UPDATE em lote não dispara sinais: resumos dos meses alcançados, contadores e insights, uma vez só
+            anos = {mes.year for mes in meses}
+            resumos.invalidar(*meses)
+            orcamentos.recalcular_gastos(anos=anos)
+            insights.agendar_atualizacao(*anos, *(ano + 1 for ano in anos))
+
+    return [
+        {'regra': regra.id, 'nome': regra.nome, 'categoria': regra.categoria_id, 'afetadas': afetadas[regra.id]}
+        for regra in motor.regras
+    ]
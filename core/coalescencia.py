@@ -0,0 +1,191 @@
+# financas_pessoais/core/coalescencia.py
+
+import functools
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from . import metricas
+from .facetas import impressao_digital, versao_dados
+
+try:
+    import fcntl
+except ImportError: # Sem fcntl (Windows): apenas a coalescência dentro do processo
+    fcntl = None
+
+# Coalescência ("single-flight") das views analíticas caras (/api/projecoes/, /api/dashboard/):
+# requisições idênticas simultâneas compartilham um único cálculo.
+# - No processo: a primeira thread calcula e as demais esperam pelo mesmo resultado.
+# - Entre os workers do gunicorn: quem calcula segura uma trava de arquivo (fcntl) e grava o
+#   resultado no cache 'coalescencia' (arquivos, compartilhado pelos workers da máquina);
+#   quem esperava pela trava encontra o resultado pronto ao obtê-la.
+# - Stale-while-revalidate: por uma janela curta depois de vencer (ou de uma escrita mudar a
+#   versão dos dados), o resultado anterior continua sendo servido enquanto um único cálculo o renova.
+# Contadores em metricas: coalescencia.<nome>.{calculadas,cache,obsoletas,agrupadas,agrupadas_workers}.
+
+BALDES_TRAVA = 64
+
+
+class _EmVoo:
+    """Cálculo em andamento no processo; as threads que chegam depois esperam por ele."""
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+_trava = threading.Lock()
+_em_voo = {}
+
+
+def _configuracao(nome, padrao):
+    return getattr(settings, f'COALESCENCIA_{nome}', padrao)
+
+
+def _cache():
+    return caches['coalescencia']
+
+
+def _situacao(entrada, versao):
+    """'fresca', 'obsoleta' (ainda servível na janela) ou None (precisa calcular)."""
+    if entrada is None:
+        return None
+    idade = time.time() - entrada['calculado_em']
+    if entrada['versao'] == versao and idade < _configuracao('VALIDADE_SEGUNDOS', 30):
+        return 'fresca'
+    if idade < _configuracao('VALIDADE_SEGUNDOS', 30) + _configuracao('JANELA_OBSOLETA_SEGUNDOS', 5):
+        return 'obsoleta'
+    return None
+
+
+class _TravaArquivo:
+    """Trava exclusiva entre processos (flock) em um de BALDES_TRAVA arquivos escolhido pela chave."""
+
+    def __init__(self, chave):
+        diretorio = _configuracao('DIR', None)
+        balde = int(hashlib.sha256(chave.encode('utf-8')).hexdigest(), 16) % BALDES_TRAVA
+        self.caminho = os.path.join(diretorio, f'trava_{balde:02d}.lock') if diretorio and fcntl else None
+        self.arquivo = None
+
+    def adquirir(self, bloquear=True):
+        """True quando a trava foi obtida (ou não há trava entre processos); espera até ESPERA_SEGUNDOS."""
+        if self.caminho is None:
+            return True
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self.arquivo = open(self.caminho, 'a')
+        limite = time.monotonic() + (_configuracao('ESPERA_SEGUNDOS', 30) if bloquear else 0)
+        while True:
+            try:
+                fcntl.flock(self.arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= limite:
+                    self.arquivo.close()
+                    self.arquivo = None
+                    return False
+                time.sleep(0.02)
+
+    def liberar(self):
+        if self.arquivo is not None:
+            fcntl.flock(self.arquivo, fcntl.LOCK_UN)
+            self.arquivo.close()
+            self.arquivo = None
+
+
+def _calcular_e_gravar(nome, chave, versao, calcular, obsoleta):
+    """
+    Executado por uma única thread do processo. Com uma entrada obsoleta, só recalcula se nenhum outro
+    worker já estiver recalculando (senão devolve a obsoleta); sem entrada, espera a trava e reaproveita
+    o resultado gravado por quem a segurava.
+    """
+    trava = _TravaArquivo(chave)
+    if not trava.adquirir(bloquear=obsoleta is None):
+        if obsoleta is not None:
+            metricas.incrementar(f'coalescencia.{nome}.obsoletas')
+            return obsoleta['status'], obsoleta['dados']
+        # Espera esgotada: calcula sem a trava em vez de falhar a requisição
+    try:
+        # Sem entrada fresca antes da trava: se agora há uma, outro worker acabou de calculá-la
+        entrada = _cache().get(chave)
+        if _situacao(entrada, versao) == 'fresca':
+            metricas.incrementar(f'coalescencia.{nome}.agrupadas_workers')
+            return entrada['status'], entrada['dados']
+        status_code, dados = calcular()
+        metricas.incrementar(f'coalescencia.{nome}.calculadas')
+        if status_code == 200:
+            _cache().set(
+                chave,
+                {'versao': versao, 'calculado_em': time.time(), 'status': status_code, 'dados': dados},
+                _configuracao('VALIDADE_SEGUNDOS', 30) + _configuracao('JANELA_OBSOLETA_SEGUNDOS', 5),
+            )
+        return status_code, dados
+    finally:
+        trava.liberar()
+
+
+def obter(nome, parametros, calcular):
+    """
+    (status, dados) de `calcular()` para a view `nome` com os parâmetros da requisição, compartilhando
+    o cálculo entre requisições idênticas simultâneas. Só respostas 200 ficam em cache.
+    """
+    chave = f'{nome}:{impressao_digital(parametros)}'
+    versao = versao_dados()
+    entrada = _cache().get(chave)
+    situacao = _situacao(entrada, versao)
+    if situacao == 'fresca':
+        metricas.incrementar(f'coalescencia.{nome}.cache')
+        return entrada['status'], entrada['dados']
+
+    with _trava:
+        em_voo = _em_voo.get(chave)
+        lider = em_voo is None
+        if lider:
+            em_voo = _em_voo[chave] = _EmVoo()
+
+    if not lider:
+        if situacao == 'obsoleta':
+            # Outra thread já está renovando: não há por que esperar
+            metricas.incrementar(f'coalescencia.{nome}.obsoletas')
+            return entrada['status'], entrada['dados']
+        if em_voo.pronto.wait(_configuracao('ESPERA_SEGUNDOS', 30)):
+            metricas.incrementar(f'coalescencia.{nome}.agrupadas')
+            if em_voo.erro is not None:
+                raise em_voo.erro
+            return em_voo.resultado
+        return calcular() # Espera esgotada: calcula por conta própria
+
+    try:
+        em_voo.resultado = _calcular_e_gravar(nome, chave, versao, calcular, entrada if situacao == 'obsoleta' else None)
+        return em_voo.resultado
+    except Exception as erro:
+        em_voo.erro = erro
+        raise
+    finally:
+        with _trava:
+            _em_voo.pop(chave, None)
+        em_voo.pronto.set()
+
+
+def agrupar(nome):
+    """
+    Decorator para o get() de APIViews cujas respostas dependem só dos parâmetros e dos dados:
+    requisições idênticas simultâneas compartilham o mesmo cálculo (ver obter()).
+    """
+    def decorator(get):
+        @functools.wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            def calcular():
+                resposta = get(self, request, *args, **kwargs)
+                return resposta.status_code, resposta.data
+
+            status_code, dados = obter(nome, request.query_params, calcular)
+            # Uma Response nova por requisição: cada uma é renderizada no formato pedido
+            return Response(dados, status=status_code)
+        return wrapper
+    return decorator
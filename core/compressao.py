@@ -0,0 +1,47 @@
+# financas_pessoais/core/compressao.py
+
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError: # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+re_aceita_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+class CompressaoApiMiddleware(GZipMiddleware):
+    """
+    Comprime as respostas da API (/api/) negociando pelo Accept-Encoding:
+    brotli quando o cliente aceita e o pacote está instalado, senão gzip.
+    Os arquivos estáticos continuam com o WhiteNoise e o admin não é comprimido.
+    """
+    prefixo = '/api/'
+    qualidade_brotli = 5 # Bom equilíbrio entre CPU e tamanho para respostas dinâmicas
+
+    def process_response(self, request, response):
+        if not request.path.startswith(self.prefixo):
+            return response
+        aceita = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (
+            brotli is None
+            or response.streaming
+            or not re_aceita_brotli.search(aceita)
+            or response.has_header('Content-Encoding')
+            or len(response.content) < 200
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        comprimido = brotli.compress(response.content, quality=self.qualidade_brotli)
+        if len(comprimido) >= len(response.content):
+            return response
+        response.content = comprimido
+        response.headers['Content-Length'] = str(len(comprimido))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
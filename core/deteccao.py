@@ -0,0 +1,281 @@
+# financas_pessoais/core/deteccao.py
+
+from functools import lru_cache
+import re
+import unicodedata
+import zlib
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .dinheiro import de_centavos
+from .models import Anomalia, EstadoDeteccao, GastoMensal, RegistroAlteracao, SequenciaAlteracao, Transacao
+from .processos import criar_pool
+
+# Detecção em lote de possíveis duplicatas e de gastos mensais atípicos por categoria.
+#
+# Duplicatas: as transações são lidas em streaming ordenadas por bloco (moeda, tipo, valor) e data;
+# só são comparadas as que estão no mesmo bloco e a até JANELA_DIAS dias uma da outra (VIZINHOS
+# posições no máximo), nunca todos os pares. A similaridade das descrições é o cosseno entre os
+# vetores de trigramas (com hashing em DIMENSOES posições), calculado com NumPy para o lote inteiro.
+# Os lotes não dividem blocos, então podem ser pontuados em paralelo em um pool de processos.
+#
+# Atípicos: z-score robusto (mediana/MAD) de cada mês sobre a série de gastos mensais da categoria,
+# lida dos contadores de GastoMensal (os mesmos totais mensais usados nas projeções).
+#
+# As execuções são incrementais: depois da primeira, só as transações criadas ou alteradas desde a
+# última sequência analisada do log de alterações são pontuadas de novo (contra os seus vizinhos).
+
+JANELA_DIAS = 3
+VIZINHOS = 8
+DIMENSOES = 512
+SIMILARIDADE_MINIMA = 0.6
+Z_MINIMO = 3.5 # Limiar usual para o z-score modificado (Iglewicz e Hoaglin)
+MESES_MINIMOS = 6
+TAMANHO_LOTE = 20000
+
+CAMPOS = ('id', 'moeda', 'tipo', 'valor_centavos', 'data_transacao', 'descricao')
+ORDEM = ('moeda', 'tipo', 'valor_centavos', 'data_transacao', 'id')
+ESTADO = 'anomalias'
+
+
+@lru_cache(maxsize=65536) # Descrições se repetem muito (estabelecimentos e contas recorrentes)
+def trigramas(descricao):
+    """Posições (com repetição) dos trigramas da descrição normalizada no vetor de DIMENSOES posições."""
+    texto = unicodedata.normalize('NFKD', descricao or '').encode('ascii', 'ignore').decode().lower()
+    texto = f"  {' '.join(re.findall(r'[a-z0-9]+', texto))} "
+    return tuple(zlib.crc32(texto[i:i + 3].encode()) % DIMENSOES for i in range(len(texto) - 2))
+
+
+def pontuar_lote(linhas, ids_alvo=None):
+    """
+    Pares de possíveis duplicatas em um lote de linhas (CAMPOS) já ordenadas por ORDEM.
+    Devolve [(id_menor, id_maior, similaridade)]. Com ids_alvo, só os pares que envolvem esses ids.
+    Não acessa o banco: roda também nos processos do pool.
+    """
+    n = len(linhas)
+    if n < 2:
+        return []
+    ids = np.fromiter((linha[0] for linha in linhas), dtype=np.int64, count=n)
+    valores = np.fromiter((linha[3] for linha in linhas), dtype=np.int64, count=n)
+    dias = np.fromiter((linha[4].toordinal() for linha in linhas), dtype=np.int64, count=n)
+    moedas = np.array([linha[1] for linha in linhas], dtype=object)
+    tipos = np.array([linha[2] for linha in linhas], dtype=object)
+    novo_bloco = np.ones(n, dtype=bool)
+    novo_bloco[1:] = (valores[1:] != valores[:-1]) | (moedas[1:] != moedas[:-1]) | (tipos[1:] != tipos[:-1])
+    blocos = np.cumsum(novo_bloco)
+
+    # Candidatos: cada linha com as VIZINHOS seguintes do mesmo bloco dentro da janela de datas
+    pares_a, pares_b = [], []
+    for distancia in range(1, min(VIZINHOS, n - 1) + 1):
+        candidatos = np.flatnonzero(
+            (blocos[distancia:] == blocos[:-distancia]) & (dias[distancia:] - dias[:-distancia] <= JANELA_DIAS)
+        )
+        pares_a.append(candidatos)
+        pares_b.append(candidatos + distancia)
+    a, b = np.concatenate(pares_a), np.concatenate(pares_b)
+    if ids_alvo is not None:
+        alvo = np.isin(ids, np.fromiter(ids_alvo, dtype=np.int64, count=len(ids_alvo)))
+        manter = alvo[a] | alvo[b]
+        a, b = a[manter], b[manter]
+    if not len(a):
+        return []
+
+    # Vetores de trigramas apenas das linhas que aparecem em algum par
+    envolvidas = np.unique(np.concatenate([a, b]))
+    posicao = np.full(n, -1, dtype=np.int64)
+    posicao[envolvidas] = np.arange(len(envolvidas))
+    posicoes = [trigramas(linhas[indice][5]) for indice in envolvidas.tolist()]
+    linha_vetor = np.repeat(np.arange(len(envolvidas)), [len(lista) for lista in posicoes])
+    coluna = np.fromiter((h for lista in posicoes for h in lista), dtype=np.int64, count=len(linha_vetor))
+    vetores = np.bincount(linha_vetor * DIMENSOES + coluna, minlength=len(envolvidas) * DIMENSOES)
+    vetores = vetores.reshape(len(envolvidas), DIMENSOES).astype(np.float32)
+    normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+    vetores /= np.where(normas == 0, 1, normas)
+
+    similaridades = np.einsum('ij,ij->i', vetores[posicao[a]], vetores[posicao[b]])
+    duplicadas = similaridades >= SIMILARIDADE_MINIMA
+    id_a, id_b = ids[a[duplicadas]], ids[b[duplicadas]]
+    return list(zip(
+        np.minimum(id_a, id_b).tolist(),
+        np.maximum(id_a, id_b).tolist(),
+        np.round(similaridades[duplicadas].astype(np.float64), 4).tolist(),
+    ))
+
+
+def lotes_por_bloco(linhas, tamanho=TAMANHO_LOTE):
+    """Agrupa as linhas (em ORDEM) em lotes de ~tamanho linhas sem dividir um bloco entre dois lotes."""
+    lote = []
+    for linha in linhas:
+        if len(lote) >= tamanho and linha[1:4] != lote[-1][1:4]:
+            yield lote
+            lote = []
+        lote.append(linha)
+    if lote:
+        yield lote
+
+
+def pontuar_lotes(lotes, ids_alvo=None, processos=1):
+    """
+    Pontua os lotes no próprio processo ou em um pool de `processos` processos. No pool, no máximo
+    2 lotes por processo ficam em andamento, então a leitura do banco (aqui) e a pontuação se
+    sobrepõem sem acumular a tabela inteira em memória.
+    """
+    if processos <= 1:
+        for lote in lotes:
+            yield from pontuar_lote(lote, ids_alvo)
+        return
+    # Os processos do pool não acessam o banco; nascem sem fork (ver core/processos.py)
+    with criar_pool(processos) as pool:
+        pendentes = set()
+        for lote in lotes:
+            pendentes.add(pool.submit(pontuar_lote, lote, ids_alvo))
+            if len(pendentes) >= 2 * processos:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    yield from futuro.result()
+        for futuro in pendentes:
+            yield from futuro.result()
+
+
+def gravar_duplicatas(pares, tamanho=1000):
+    """Grava os pares encontrados; achados já revisados (confirmados/descartados) mantêm a situação."""
+    total = 0
+    lote = []
+    for id_a, id_b, similaridade in pares:
+        lote.append(Anomalia(
+            tipo='duplicata', chave=f"duplicata:{id_a}:{id_b}", transacao_id=id_a, transacao_relacionada_id=id_b,
+            pontuacao=similaridade, detalhes={'similaridade': similaridade, 'janela_dias': JANELA_DIAS},
+        ))
+        if len(lote) >= tamanho:
+            total += _gravar(lote)
+            lote = []
+    if lote:
+        total += _gravar(lote)
+    return total
+
+
+def _gravar(anomalias):
+    Anomalia.objects.bulk_create(
+        anomalias, update_conflicts=True, unique_fields=['chave'],
+        update_fields=['pontuacao', 'detalhes', 'data_atualizacao'],
+    )
+    return len(anomalias)
+
+
+def _vizinhos(ids):
+    """Linhas (em ORDEM) que podem formar par com as transações informadas: mesmo valor e datas próximas."""
+    alvos = list(Transacao.objects.filter(pk__in=ids).values_list('valor_centavos', 'data_transacao'))
+    if not alvos:
+        return Transacao.objects.none().values_list(*CAMPOS)
+    janela = timedelta(days=JANELA_DIAS)
+    datas = [data for _, data in alvos]
+    return Transacao.objects.filter(
+        valor_centavos__in={valor for valor, _ in alvos},
+        data_transacao__range=(min(datas) - janela, max(datas) + janela),
+    ).values_list(*CAMPOS).order_by(*ORDEM) # Atendido pelo índice (valor_centavos, data_transacao)
+
+
+def detectar_duplicatas(ids=None, processos=1, tamanho_lote=TAMANHO_LOTE):
+    """
+    Sem ids, varre a tabela inteira em streaming. Com ids, pontua só essas transações contra os seus
+    vizinhos. Os achados em aberto das transações reavaliadas são refeitos.
+    """
+    if ids is None:
+        Anomalia.objects.filter(tipo='duplicata', situacao='aberta').delete()
+        linhas = Transacao.objects.values_list(*CAMPOS).order_by(*ORDEM).iterator(chunk_size=tamanho_lote)
+        return gravar_duplicatas(pontuar_lotes(lotes_por_bloco(linhas, tamanho_lote), None, processos))
+
+    total = 0
+    ids = sorted(ids)
+    for inicio in range(0, len(ids), 5000):
+        parte = ids[inicio:inicio + 5000]
+        Anomalia.objects.filter(tipo='duplicata', situacao='aberta').filter(
+            Q(transacao_id__in=parte) | Q(transacao_relacionada_id__in=parte)
+        ).delete()
+        lotes = lotes_por_bloco(_vizinhos(parte).iterator(chunk_size=tamanho_lote), tamanho_lote)
+        total += gravar_duplicatas(pontuar_lotes(lotes, frozenset(parte), processos))
+    return total
+
+
+def z_robusto(valores):
+    """z-score modificado: 0,6745 * (x - mediana) / MAD. None quando a MAD é zero (série sem dispersão)."""
+    mediana = np.median(valores)
+    mad = np.median(np.abs(valores - mediana))
+    if mad == 0:
+        return None, mediana, mad
+    return 0.6745 * (valores - mediana) / mad, mediana, mad
+
+
+def detectar_atipicos():
+    """Reavalia os gastos mensais de todas as categorias (uma linha por categoria e mês com gasto)."""
+    contadores = list(
+        GastoMensal.objects.filter(total_centavos__gt=0)
+        .order_by('categoria_id', 'ano', 'mes')
+        .values_list('categoria_id', 'ano', 'mes', 'total_centavos')
+    )
+    encontrados = []
+    if contadores:
+        dados = np.array(contadores, dtype=np.int64)
+        inicios = np.flatnonzero(np.diff(dados[:, 0], prepend=-1))
+        for serie in np.split(dados, inicios[1:]):
+            if len(serie) < MESES_MINIMOS:
+                continue
+            z, mediana, mad = z_robusto(serie[:, 3].astype(np.float64))
+            if z is None:
+                continue
+            # Só meses acima do padrão: o mês corrente, ainda incompleto, sempre ficaria abaixo dele
+            for indice in np.flatnonzero(z > Z_MINIMO):
+                categoria_id, ano, mes, total = (int(valor) for valor in serie[indice])
+                encontrados.append(Anomalia(
+                    tipo='atipico', chave=f"atipico:{categoria_id}:{ano}-{mes:02d}",
+                    categoria_id=categoria_id, ano=ano, mes=mes, pontuacao=round(float(z[indice]), 4),
+                    detalhes={
+                        'total': str(de_centavos(total)),
+                        'mediana': str(de_centavos(int(round(mediana)))),
+                        'mad': str(de_centavos(int(round(mad)))),
+                        'meses_na_serie': len(serie),
+                    },
+                ))
+    with transaction.atomic():
+        Anomalia.objects.filter(tipo='atipico', situacao='aberta').exclude(
+            chave__in=[anomalia.chave for anomalia in encontrados]
+        ).delete()
+        if encontrados:
+            _gravar(encontrados)
+    return len(encontrados)
+
+
+def executar(completo=False, processos=1, tamanho_lote=TAMANHO_LOTE):
+    """
+    Executa a detecção. Na primeira vez (ou com completo=True) varre todas as transações; depois,
+    só as criadas ou alteradas no log de alterações desde a última execução.
+    """
+    ate = SequenciaAlteracao.objects.values_list('ultima', flat=True).first() or 0
+    estado, _ = EstadoDeteccao.objects.get_or_create(nome=ESTADO)
+    incremental = not completo and estado.ultima_sequencia > 0
+    if incremental:
+        ids = set(RegistroAlteracao.objects.filter(
+            modelo=Transacao._meta.model_name, operacao__in=('criacao', 'alteracao'),
+            sequencia__gt=estado.ultima_sequencia, sequencia__lte=ate,
+        ).values_list('objeto_id', flat=True))
+        duplicatas = detectar_duplicatas(ids, processos, tamanho_lote)
+    else:
+        # Zera o estado antes da varredura: se ela for interrompida, a próxima execução também é completa
+        EstadoDeteccao.objects.filter(pk=estado.pk).update(ultima_sequencia=0)
+        ids = None
+        duplicatas = detectar_duplicatas(None, processos, tamanho_lote)
+    atipicos = detectar_atipicos()
+
+    estado.ultima_sequencia = ate
+    estado.save(update_fields=['ultima_sequencia', 'data_execucao'])
+    return {
+        'modo': 'incremental' if incremental else 'completo',
+        'transacoes_reavaliadas': len(ids) if ids is not None else None,
+        'duplicatas': duplicatas,
+        'atipicos': atipicos,
+        'sequencia': ate,
+    }
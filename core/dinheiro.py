@@ -0,0 +1,78 @@
+# financas_pessoais/core/dinheiro.py
+
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+
+from django.conf import settings
+from django.db.models import Sum
+
+from .cambio import valor_convertido
+
+# Valores monetários podem ser agregados de duas formas:
+# - padrão: colunas DecimalField (valor), somas retornam Decimal;
+# - VALORES_EM_CENTAVOS=True: colunas BIGINT em centavos (valor_centavos), somas e contas
+#   intermediárias ficam em int nativo e só viram Decimal na saída da API.
+# Em ambos os modos o resultado final é o mesmo Decimal (mesmo valor e mesmo expoente).
+# As somas de transações são feitas já convertidas para a moeda de relatório (core/cambio.py).
+
+CENTAVO = Decimal('0.01')
+
+
+def usar_centavos():
+    return getattr(settings, 'VALORES_EM_CENTAVOS', False)
+
+
+def para_centavos(valor):
+    """Decimal (ou str/int) em reais -> int em centavos."""
+    return int((Decimal(valor) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def de_centavos(centavos):
+    """int em centavos -> Decimal com 2 casas (ex.: 1050 -> Decimal('10.50'))."""
+    return Decimal(centavos).scaleb(-2)
+
+
+def campo_valor(campo='valor'):
+    """Nome da coluna usada nas agregações de acordo com o modo configurado."""
+    return f'{campo}_centavos' if usar_centavos() else campo
+
+
+def soma(campo='valor', converter=True, **kwargs):
+    """
+    Sum() sobre a coluna monetária do modo atual. Aceita os mesmos kwargs de Sum (ex.: filter=Q(...)).
+    Com converter=True (transações) cada linha é convertida para a moeda de relatório no próprio SQL.
+    """
+    if converter:
+        return Sum(valor_convertido(campo_valor(campo), centavos=usar_centavos()), **kwargs)
+    return Sum(campo_valor(campo), **kwargs)
+
+
+def para_decimal(bruto):
+    """
+    Converte um valor bruto (resultado de soma() ou conta feita com eles) para Decimal.
+    None vira Decimal('0.00'), como nos `or Decimal('0.00')` das views.
+    """
+    if bruto is None:
+        return Decimal('0.00')
+    if usar_centavos():
+        return de_centavos(bruto)
+    # O SQLite soma decimais em ponto flutuante (ex.: 9449.90 + -9764.93 -> -315.030000000001):
+    # os totais voltam para centavos, como no modo em centavos
+    return Decimal(bruto).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def dividir(bruto, divisor):
+    """
+    Divide um valor bruto (resultado de soma() ou conta feita com eles) por `divisor` (int ou Decimal,
+    ex.: meses, Decimal('30.44')), arredondando ao centavo (metade para longe do zero). O resultado
+    continua bruto: int em centavos no modo em centavos, com a conta toda em inteiros, ou Decimal
+    com 2 casas. Nos dois modos para_decimal(dividir(...)) dá o mesmo Decimal.
+    """
+    if not usar_centavos():
+        return (para_decimal(bruto) / Decimal(divisor)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+    fracao = Fraction(divisor)
+    numerador, denominador = (bruto or 0) * fracao.denominator, fracao.numerator
+    quociente, resto = divmod(abs(numerador), abs(denominador))
+    if 2 * resto >= abs(denominador):
+        quociente += 1
+    return quociente if (numerador < 0) == (denominador < 0) else -quociente
@@ -0,0 +1,130 @@
+# financas_pessoais/core/facetas.py
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import SequenciaAlteracao
+from .cambio import valor_convertido, versao_cotacoes
+from .dinheiro import campo_valor, usar_centavos, para_decimal
+
+# Contagens e totais por tipo, status, categoria e mês para o estado atual dos filtros de
+# transações, calculados numa única consulta agrupada:
+# - PostgreSQL: GROUP BY GROUPING SETS, um conjunto por faceta (mais o total geral);
+# - outros bancos: GROUP BY pelas quatro dimensões e consolidação das facetas em Python.
+# Os resultados ficam em cache por impressão digital dos filtros. A chave inclui a última
+# sequência do log de alterações e a versão das cotações, então qualquer escrita invalida o cache.
+
+FACETAS = ('tipo', 'status', 'categoria', 'mes')
+
+
+def versao_dados():
+    ultima = SequenciaAlteracao.objects.filter(pk=1).values_list('ultima', flat=True).first() or 0
+    quantidade, ultimo, atualizacao = versao_cotacoes()
+    return f"{ultima}:{quantidade}:{ultimo}:{atualizacao}"
+
+
+def impressao_digital(parametros):
+    """Fingerprint dos filtros (ordem dos parâmetros não importa; ?format= não muda o resultado)."""
+    normalizados = sorted((chave, sorted(valores)) for chave, valores in parametros.lists() if chave not in ('format', 'formato'))
+    return hashlib.sha256(json.dumps(normalizados).encode('utf-8')).hexdigest()
+
+
+def _linhas_base(queryset):
+    return (
+        queryset
+        .annotate(mes=TruncMonth('data_transacao'), valor_relatorio=valor_convertido(campo_valor(), centavos=usar_centavos()))
+        .order_by()
+    )
+
+
+def _agrupar_grouping_sets(queryset):
+    """Uma consulta com GROUPING SETS; devolve [(faceta, chave, nome, quantidade, total_bruto)]."""
+    base = _linhas_base(queryset).values('tipo', 'status', 'categoria_id', 'categoria_nome', 'mes', 'valor_relatorio')
+    # Compilado para o banco do próprio queryset (ex.: uma réplica), não para o default
+    sql, params = base.query.get_compiler(using=base.db).as_sql()
+    consulta = f"""
+        SELECT tipo, status, categoria_id, MAX(categoria_nome), mes, COUNT(*), SUM(valor_relatorio),
+               GROUPING(tipo), GROUPING(status), GROUPING(categoria_id), GROUPING(mes)
+        FROM ({sql}) AS base
+        GROUP BY GROUPING SETS ((tipo), (status), (categoria_id), (mes), ())
+    """
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(consulta, params)
+        linhas = cursor.fetchall()
+
+    resultado = []
+    for tipo, status, categoria_id, categoria_nome, mes, quantidade, total, g_tipo, g_status, g_categoria, g_mes in linhas:
+        if not g_tipo:
+            resultado.append(('tipo', tipo, None, quantidade, total))
+        elif not g_status:
+            resultado.append(('status', status, None, quantidade, total))
+        elif not g_categoria:
+            resultado.append(('categoria', categoria_id, categoria_nome, quantidade, total))
+        elif not g_mes:
+            resultado.append(('mes', mes, None, quantidade, total))
+        else:
+            resultado.append(('total', None, None, quantidade, total))
+    return resultado
+
+
+def _agrupar_combinacoes(queryset):
+    """Fallback: uma consulta agrupada pelas quatro dimensões, consolidada por faceta em Python."""
+    combinacoes = (
+        _linhas_base(queryset)
+        .values('tipo', 'status', 'categoria_id', 'mes')
+        .annotate(nome=Max('categoria_nome'), quantidade=Count('id'), total=Sum('valor_relatorio'))
+    )
+    acumulado = {}
+    for item in combinacoes:
+        chaves = [
+            ('tipo', item['tipo'], None),
+            ('status', item['status'], None),
+            ('categoria', item['categoria_id'], item['nome']),
+            ('mes', item['mes'], None),
+            ('total', None, None),
+        ]
+        for faceta, chave, nome in chaves:
+            _, _, quantidade, total = acumulado.get((faceta, chave), (faceta, nome, 0, 0))
+            acumulado[(faceta, chave)] = (faceta, nome, quantidade + item['quantidade'], total + (item['total'] or 0))
+    return [(faceta, chave, nome, quantidade, total) for (_, chave), (faceta, nome, quantidade, total) in acumulado.items()]
+
+
+def calcular_facetas(queryset):
+    if connections[queryset.db].vendor == 'postgresql':
+        linhas = _agrupar_grouping_sets(queryset)
+    else:
+        linhas = _agrupar_combinacoes(queryset)
+
+    resultado = {faceta: [] for faceta in FACETAS}
+    resultado['total'] = {'quantidade': 0, 'total': para_decimal(None)}
+    for faceta, chave, nome, quantidade, total in linhas:
+        item = {'quantidade': quantidade, 'total': para_decimal(total)}
+        if faceta == 'total':
+            resultado['total'] = item
+            continue
+        if faceta == 'mes':
+            chave = f"{chave:%Y-%m}"
+        item = {'valor': chave, **item}
+        if faceta == 'categoria':
+            item['nome'] = nome or 'Sem Categoria'
+        resultado[faceta].append(item)
+
+    for faceta in ('tipo', 'status', 'mes'):
+        resultado[faceta].sort(key=lambda item: item['valor'] or '')
+    resultado['categoria'].sort(key=lambda item: item['nome'])
+    return resultado
+
+
+def facetas_em_cache(queryset, parametros):
+    chave = f"facetas:{versao_dados()}:{impressao_digital(parametros)}"
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = calcular_facetas(queryset)
+        cache.set(chave, resultado, getattr(settings, 'FACETAS_CACHE_SEGUNDOS', 300))
+    return resultado
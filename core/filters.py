@@ -24,6 +24,9 @@ class TransacaoFilter(django_filters.FilterSet):
     # Filtro por status (pendente/paga)
     status = django_filters.CharFilter(field_name='status')
 
+    # Filtro por moeda (código ISO 4217, ex.: USD)
+    moeda = django_filters.CharFilter(field_name='moeda')
+
     class Meta:
         model = Transacao
-        fields = ['descricao', 'valor', 'data_transacao', 'categoria', 'tipo', 'status']
\ No newline at end of file
+        fields = ['descricao', 'valor', 'data_transacao', 'categoria', 'tipo', 'status', 'moeda']
\ No newline at end of file
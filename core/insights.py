@@ -0,0 +1,277 @@
+# financas_pessoais/core/insights.py
+
+import functools
+import hashlib
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .models import Transacao, InsightsAno, Tarefa
+from . import tarefas, resumos, cambio
+from .dinheiro import soma, para_decimal
+
+# Ordem de gravidade do status financeiro: o pior status retornado pelas regras prevalece
+STATUS_ORDEM = ['EXCELLENT', 'GOOD', 'CRITICAL']
+
+# Registro das regras de alertas/sugestões. Cada regra recebe o contexto do ano
+# e devolve uma lista de itens criados com alerta() ou sugestao().
+REGRAS = []
+
+
+def registrar_regra(func):
+    """
+    Decorator para registrar uma nova regra de insights.
+    A regra passa a ser avaliada tanto no endpoint /api/insights/ quanto na ProjecaoFinanceiraView.
+    """
+    REGRAS.append(func)
+    return func
+
+
+def alerta(tipo, mensagem, status=None):
+    return {'lista': 'alerts', 'type': tipo, 'message': mensagem, 'status': status}
+
+
+def sugestao(tipo, mensagem, status=None):
+    return {'lista': 'suggestions', 'type': tipo, 'message': mensagem, 'status': status}
+
+
+def periodo_analise(ano, meses=12):
+    """
+    Período de análise usado nas projeções: últimos X meses do ano selecionado,
+    até o dia de hoje se for o ano corrente (mesma regra da ProjecaoFinanceiraView).
+    """
+    hoje = timezone.now().date()
+    fim = hoje if ano == hoje.year else date(ano, 12, 31)
+    inicio = fim - timedelta(days=30 * meses)
+    if inicio.year < ano:
+        inicio = date(ano, 1, 1)
+    return inicio, fim
+
+
+def medias_mensais_por_categoria(despesas):
+    """
+    Recebe um queryset de despesas e devolve {categoria: (total, meses_com_gasto)}.
+    A média mensal de cada categoria é total / meses_com_gasto.
+    """
+    totais_mensais = (
+        despesas
+        .annotate(month=ExtractMonth('data_transacao'), year=ExtractYear('data_transacao'))
+        .values('categoria_nome', 'month', 'year')
+        .annotate(total_gasto_mes=soma())
+        .order_by('categoria_nome', 'year', 'month')
+    )
+    resultado = {}
+    for item in totais_mensais:
+        cat_name = item['categoria_nome'] or 'Sem Categoria'
+        total, meses = resultado.get(cat_name, (0, 0))
+        resultado[cat_name] = (total + item['total_gasto_mes'], meses + 1)
+    # Soma feita nos valores brutos (int em centavos, se configurado); conversão única no final
+    return {cat_name: (para_decimal(total), meses) for cat_name, (total, meses) in resultado.items()}
+
+
+def montar_contexto(ano, saldos_mensais, medias_categoria, media_mensal_despesas):
+    """
+    Monta o contexto avaliado pelas regras a partir de dados já agregados do ano.
+    saldos_mensais: lista com o saldo (receita - despesa) de cada mês com transações.
+    medias_categoria: {categoria: média mensal de despesas no período}.
+    """
+    # O ano anterior, se já encerrado, vem dos resumos mensais gravados (core/resumos.py)
+    if resumos.ano_fechado(ano - 1):
+        totais_ano_anterior = resumos.medias_mensais_por_categoria_do_ano(ano - 1)
+    else:
+        totais_ano_anterior = medias_mensais_por_categoria(
+            Transacao.objects.filter(tipo='despesa', data_transacao__year=ano - 1)
+        )
+    medias_ano_anterior = {cat_name: total / Decimal(meses) for cat_name, (total, meses) in totais_ano_anterior.items()}
+    return {
+        'ano': ano,
+        'saldos_mensais': saldos_mensais,
+        'medias_categoria': medias_categoria,
+        'media_mensal_despesas': media_mensal_despesas,
+        'medias_categoria_ano_anterior': medias_ano_anterior,
+    }
+
+
+def contexto_do_ano(ano):
+    """Carrega do banco o contexto de um ano inteiro (período de análise padrão de 12 meses)."""
+    inicio, fim = periodo_analise(ano)
+    transacoes = Transacao.objects.filter(
+        data_transacao__gte=inicio,
+        data_transacao__lte=fim,
+        data_transacao__year=ano,
+    )
+    resumo_mensal = (
+        transacoes
+        .annotate(month=ExtractMonth('data_transacao'))
+        .values('month')
+        .annotate(
+            total_receita_mes=soma(filter=Q(tipo='receita')),
+            total_despesa_mes=soma(filter=Q(tipo='despesa'))
+        )
+        .order_by('month')
+    )
+    saldos_mensais = [
+        para_decimal(item['total_receita_mes']) - para_decimal(item['total_despesa_mes'])
+        for item in resumo_mensal
+    ]
+    total_despesas = para_decimal(transacoes.filter(tipo='despesa').aggregate(total=soma())['total'])
+    media_mensal_despesas = total_despesas / Decimal(len(saldos_mensais) or 1)
+
+    medias_categoria = {
+        cat_name: total / Decimal(meses)
+        for cat_name, (total, meses) in medias_mensais_por_categoria(transacoes.filter(tipo='despesa')).items()
+    }
+    contexto = montar_contexto(ano, saldos_mensais, medias_categoria, media_mensal_despesas)
+    contexto['periodo'] = (inicio, fim)
+    return contexto
+
+
+def impressao_digital(contexto):
+    """Fingerprint (SHA-256) das entradas do contexto, usado para evitar reavaliações desnecessárias."""
+    conteudo = json.dumps(contexto, sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def avaliar_regras(contexto):
+    """Avalia todas as regras registradas e consolida alertas, sugestões e status financeiro."""
+    resultado = {'alerts': [], 'suggestions': [], 'status_financeiro': 'EXCELLENT'}
+    for regra in REGRAS:
+        for item in regra(contexto):
+            resultado[item['lista']].append({'type': item['type'], 'message': item['message']})
+            status = item['status']
+            if status and STATUS_ORDEM.index(status) > STATUS_ORDEM.index(resultado['status_financeiro']):
+                resultado['status_financeiro'] = status
+    return resultado
+
+
+def atualizar_insights(ano):
+    """
+    Reavalia as regras de um ano e persiste o resultado.
+    Se a impressão digital das entradas não mudou, nada é regravado.
+    """
+    contexto = contexto_do_ano(ano)
+    inicio, fim = contexto.pop('periodo')
+    digital = impressao_digital(contexto)
+
+    insights = InsightsAno.objects.filter(ano=ano).first()
+    if insights and insights.impressao_digital == digital and insights.periodo_fim == fim:
+        return insights
+
+    resultado = avaliar_regras(contexto)
+    insights, _ = InsightsAno.objects.update_or_create(
+        ano=ano,
+        defaults={
+            'periodo_inicio': inicio,
+            'periodo_fim': fim,
+            'impressao_digital': digital,
+            'alertas': resultado['alerts'],
+            'sugestoes': resultado['suggestions'],
+            'status_financeiro': resultado['status_financeiro'],
+        }
+    )
+    return insights
+
+
+def obter_insights(ano):
+    """
+    Leitura O(1) dos insights persistidos de um ano.
+    Só recalcula se o ano ainda não foi avaliado ou se o período de análise avançou (ano corrente).
+    """
+    _, fim = periodo_analise(ano)
+    insights = InsightsAno.objects.filter(ano=ano).first()
+    if insights is None or insights.periodo_fim != fim:
+        insights = atualizar_insights(ano)
+    return insights
+
+
+# --- Reavaliação incremental após escrita de transações ---
+
+def agendar_atualizacao(*anos):
+    """
+    Marca os anos afetados por uma escrita para reavaliação, sem recalcular nada na requisição:
+    - padrão: apaga os insights persistidos desses anos na própria transação da escrita (um rollback
+      os devolve); a próxima leitura (obter_insights) recalcula o ano uma única vez, por mais escritas
+      que tenham ocorrido antes dela;
+    - TAREFAS_EM_SEGUNDO_PLANO=1: depois do commit enfileira a tarefa insights.atualizar dos anos que
+      ainda não têm uma pendente (numa transação desfeita nada é enfileirado).
+    """
+    anos = sorted(set(anos))
+    if not anos:
+        return
+    if settings.TAREFAS_EM_SEGUNDO_PLANO:
+        transaction.on_commit(functools.partial(_enfileirar_atualizacoes, anos), robust=True)
+    else:
+        InsightsAno.objects.filter(ano__in=anos).delete()
+
+
+def _enfileirar_atualizacoes(anos):
+    pendentes = set(
+        Tarefa.objects.filter(nome='insights.atualizar', status='pendente', parametros__ano__in=anos)
+        .values_list('parametros__ano', flat=True)
+    )
+    for ano in anos:
+        if ano not in pendentes:
+            tarefas.enfileirar('insights.atualizar', ano=ano)
+
+
+# --- Regras padrão ---
+
+@registrar_regra
+def regra_meses_negativos(contexto):
+    ano = contexto['ano']
+    total_meses = len(contexto['saldos_mensais'])
+    meses_negativos = sum(1 for saldo in contexto['saldos_mensais'] if saldo < 0)
+
+    if total_meses == 0:
+        return [alerta('info', f"Nenhum dado financeiro para o ano {ano}. Adicione transações para ver as projeções!")]
+    if meses_negativos > (total_meses / 2): # Mais da metade dos meses com dados
+        return [alerta(
+            'warning',
+            f"Atenção: Seu saldo foi negativo em {meses_negativos} de {total_meses} meses com transações no ano {ano}. É fundamental revisar suas finanças.",
+            'CRITICAL'
+        )]
+    if meses_negativos > 0:
+        return [alerta(
+            'info',
+            f"Seu saldo foi negativo em {meses_negativos} meses com transações no ano {ano}. Fique de olho!",
+            'GOOD'
+        )]
+    return []
+
+
+@registrar_regra
+def regra_categorias_vs_ano_anterior(contexto):
+    """Compara a média mensal de cada categoria com a do ano anterior; sem histórico, avalia a concentração."""
+    itens = []
+    media_geral = contexto['media_mensal_despesas']
+    medias_anteriores = contexto['medias_categoria_ano_anterior']
+
+    for cat_nome, media_atual in sorted(contexto['medias_categoria'].items()):
+        media_atual = media_atual or Decimal('0.00')
+        if cat_nome in medias_anteriores:
+            media_historica = medias_anteriores[cat_nome]
+            if media_historica > 0 and media_atual > media_historica * Decimal('1.25'): # Aumento de 25%
+                itens.append(alerta(
+                    'warning',
+                    f"Gasto alto em {cat_nome}: {cambio.formatar(media_atual)}/mês é significativamente maior que sua média de {cambio.formatar(media_historica)}/mês no ano anterior. Analise este aumento!",
+                    'GOOD'
+                ))
+            elif media_historica > 0 and media_atual < media_historica * Decimal('0.75'): # Redução de 25%
+                itens.append(sugestao(
+                    'success',
+                    f"Ótimo trabalho em {cat_nome}! Seus gastos de {cambio.formatar(media_atual)}/mês estão bem abaixo da média de {cambio.formatar(media_historica)}/mês do ano anterior. Continue assim!"
+                ))
+        elif media_atual > 0 and media_geral > 0 and media_atual > media_geral * Decimal('0.4'):
+            # Se não há histórico na categoria, mas o gasto é grande parte do total
+            itens.append(alerta(
+                'info',
+                f"Atenção: Grande parte de suas despesas em {contexto['ano']} vem de {cat_nome} ({cambio.formatar(media_atual)}/mês). Monitore esta categoria de perto.",
+                'GOOD'
+            ))
+    return itens
@@ -0,0 +1,237 @@
+# financas_pessoais/core/management/commands/benchmark.py
+
+import gzip
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# Suítes disponíveis: {nome: função(command, options) -> lista de linhas (métrica, valor)}
+SUITES = {}
+
+
+def suite(nome):
+    def decorator(funcao):
+        SUITES[nome] = funcao
+        return funcao
+    return decorator
+
+
+def cronometrar(funcao, repeticoes):
+    """Executa a função N vezes e devolve os tempos em milissegundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def resumo(tempos):
+    return f"média {statistics.mean(tempos):.3f} ms | mediana {statistics.median(tempos):.3f} ms | máx {max(tempos):.3f} ms"
+
+
+@suite('conexoes')
+def suite_conexoes(command, options):
+    """
+    Custo de abrir conexão por requisição (CONN_MAX_AGE=0, sem pool) comparado a reaproveitar
+    uma conexão persistente ou do pool. Cada "requisição" executa um SELECT 1.
+    """
+    conexao = connections[options['banco']]
+
+    def consulta():
+        with conexao.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def nova_conexao_por_requisicao():
+        conexao.close() # Com pool, devolve a conexão ao pool em vez de fechá-la
+        consulta()
+
+    consulta() # Aquece a conexão
+    reaproveitada = cronometrar(consulta, options['repeticoes'])
+    por_requisicao = cronometrar(nova_conexao_por_requisicao, options['repeticoes'])
+    overhead = statistics.mean(por_requisicao) - statistics.mean(reaproveitada)
+    pool = 'sim' if getattr(conexao, 'pool', None) is not None else 'não'
+    return [
+        ('banco', f"{options['banco']} ({conexao.vendor}, pool: {pool})"),
+        ('conexão reaproveitada', resumo(reaproveitada)),
+        ('conexão fechada/aberta por requisição', resumo(por_requisicao)),
+        ('overhead de conexão por requisição', f"{overhead:.3f} ms"),
+    ]
+
+
+@suite('payloads')
+def suite_payloads(command, options):
+    """
+    Tamanho e custo de serialização da listagem de transações em JSON, MessagePack e no formato
+    colunar (?formato=colunar), sem compressão, com gzip e com brotli. Usa transações em memória,
+    então não depende dos dados do banco.
+    """
+    from rest_framework.renderers import JSONRenderer
+    from core.models import Categoria, Transacao
+    from core.renderers import MessagePackRenderer, msgpack, para_colunar
+    from core.serializers import TransacaoSerializer
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    categoria = Categoria(id=1, nome='Alimentação', tipo_categoria='despesa')
+    transacoes = [
+        Transacao(
+            id=i, descricao=f'Compra no mercado #{i}', valor=Decimal('123.45') + i,
+            tipo='despesa', status='pago', categoria=categoria,
+            data_transacao=date(2024, 1, 1) + timedelta(days=i % 365),
+            categoria_nome=categoria.nome, categoria_tipo=categoria.tipo_categoria,
+        )
+        for i in range(1, 1001)
+    ]
+    serializer = TransacaoSerializer(transacoes, many=True)
+    dados = serializer.data
+    colunar = para_colunar(dados, list(serializer.child.fields))
+
+    formatos = [('json', lambda: JSONRenderer().render(dados)), ('json colunar', lambda: JSONRenderer().render(colunar))]
+    if msgpack is not None:
+        formatos += [('msgpack', lambda: MessagePackRenderer().render(dados)), ('msgpack colunar', lambda: MessagePackRenderer().render(colunar))]
+
+    repeticoes = max(1, options['repeticoes'] // 20)
+    linhas = [('itens', len(transacoes)), ('serialização (DRF)', resumo(cronometrar(lambda: TransacaoSerializer(transacoes, many=True).data, repeticoes)))]
+    for nome, renderizar in formatos:
+        corpo = renderizar()
+        tamanhos = f"{len(corpo)} B | gzip {len(gzip.compress(corpo, 6))} B"
+        if brotli is not None:
+            tamanhos += f" | brotli {len(brotli.compress(corpo, quality=5))} B"
+        linhas.append((nome, f"{tamanhos} | renderização {resumo(cronometrar(renderizar, repeticoes))}"))
+    return linhas
+
+
+@suite('auditoria')
+def suite_auditoria(command, options):
+    """
+    Vazão de escritas auditadas com escritores concorrentes. Cada escrita cria uma Transacao na sua
+    própria transação do banco; o registro no log incrementa SequenciaAlteracao, cuja linha fica travada
+    até o commit, então as transações que escrevem se enfileiram nesse trecho. Se a vazão não cresce
+    com as threads, o contador é o gargalo. No SQLite, que já serializa as escritas no arquivo inteiro,
+    só mede 1 thread. As transações criadas são apagadas no fim, mas os registros de criação e exclusão
+    ficam no log de alterações: rode num banco de teste (--banco).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from django.db import transaction
+    from core.models import Transacao
+
+    banco = options['banco']
+    vendor = connections[banco].vendor
+    marcador = 'benchmark auditoria'
+
+    def escrever(quantidade):
+        try:
+            for _ in range(quantidade):
+                with transaction.atomic(using=banco):
+                    Transacao.objects.using(banco).create(
+                        descricao=marcador, valor=Decimal('1.00'), tipo='despesa', data_transacao=date(2000, 1, 1),
+                    )
+        finally:
+            connections[banco].close() # Cada thread abre a sua conexão
+
+    linhas = [('banco', f"{banco} ({vendor})")]
+    try:
+        for threads in ((1,) if vendor == 'sqlite' else (1, 2, 4, 8)):
+            por_thread = max(1, options['repeticoes'] // threads)
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                list(pool.map(escrever, [por_thread] * threads))
+            duracao = time.perf_counter() - inicio
+            escritas = por_thread * threads
+            linhas.append((
+                f"{threads} thread(s)",
+                f"{escritas / duracao:.0f} escritas/s | {duracao * 1000 / escritas:.3f} ms por escrita ({escritas} escritas)",
+            ))
+    finally:
+        Transacao.objects.using(banco).filter(descricao=marcador).delete()
+    return linhas
+
+
+# Processo novo simulando o cold start de um worker: carga da aplicação, aquecimento opcional
+# e duas requisições à mesma URL (a primeira paga o que ficou para ser carregado sob demanda)
+ARRANQUE = """
+import json, os, sys, time
+inicio = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', sys.argv[1])
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+carga = time.perf_counter()
+if sys.argv[3] == '1':
+    from core.aquecimento import aquecer
+    aquecer()
+aquecimento = time.perf_counter()
+from django.test import Client
+cliente = Client(HTTP_HOST='127.0.0.1')
+antes = time.perf_counter()
+cliente.get(sys.argv[2])
+primeira = time.perf_counter()
+cliente.get(sys.argv[2])
+segunda = time.perf_counter()
+print(json.dumps({
+    'carga': (carga - inicio) * 1000,
+    'aquecimento': (aquecimento - carga) * 1000,
+    'primeira': (primeira - antes) * 1000,
+    'segunda': (segunda - primeira) * 1000,
+    'ate_primeira_resposta': (carga - inicio + aquecimento - carga + primeira - antes) * 1000,
+}))
+"""
+
+
+@suite('arranque')
+def suite_arranque(command, options):
+    """
+    Tempo até a primeira resposta depois de um spin-down: cada repetição sobe um processo Python
+    novo, carrega a aplicação (como o gunicorn) e faz duas requisições a --url, sem e com o
+    aquecimento de core/aquecimento.py (o que o gunicorn.conf.py faz no master com preload_app).
+    """
+    repeticoes = max(3, options['repeticoes'] // 40)
+    linhas = [('url', options['url']), ('processos por cenário', repeticoes)]
+    for cenario, aquecer in (('sem aquecimento', '0'), ('com aquecimento', '1')):
+        medidas = []
+        for _ in range(repeticoes):
+            processo = subprocess.run(
+                [sys.executable, '-c', ARRANQUE, settings.SETTINGS_MODULE, options['url'], aquecer],
+                capture_output=True, text=True, cwd=settings.BASE_DIR, env=os.environ.copy(),
+            )
+            if processo.returncode != 0:
+                raise CommandError(f"Falha no processo de arranque:\n{processo.stderr[-2000:]}")
+            medidas.append(json.loads(processo.stdout.strip().splitlines()[-1]))
+        for etapa in ('carga', 'aquecimento', 'primeira', 'segunda', 'ate_primeira_resposta'):
+            if etapa == 'aquecimento' and aquecer == '0':
+                continue
+            nome = {'primeira': 'primeira requisição', 'segunda': 'segunda requisição', 'ate_primeira_resposta': 'até a primeira resposta'}.get(etapa, etapa)
+            linhas.append((f"{cenario}: {nome}", resumo([medida[etapa] for medida in medidas])))
+    return linhas
+
+
+class Command(BaseCommand):
+    help = "Executa as suítes de benchmark do backend (ex.: python manage.py benchmark conexoes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('suites', nargs='*', help="Suítes a executar (padrão: todas).")
+        parser.add_argument('--repeticoes', type=int, default=200, help="Repetições por medição.")
+        parser.add_argument('--banco', default='default', help="Alias do banco usado nas medições.")
+        parser.add_argument('--url', default='/api/categorias/', help="URL requisitada na suíte arranque.")
+
+    def handle(self, *args, **options):
+        nomes = options['suites'] or list(SUITES)
+        desconhecidas = [nome for nome in nomes if nome not in SUITES]
+        if desconhecidas:
+            raise CommandError(f"Suítes desconhecidas: {', '.join(desconhecidas)}. Disponíveis: {', '.join(SUITES)}")
+
+        for nome in nomes:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {nome} =="))
+            for metrica, valor in SUITES[nome](self, options):
+                self.stdout.write(f"  {metrica}: {valor}")
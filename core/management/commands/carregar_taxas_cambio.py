@@ -0,0 +1,62 @@
+# financas_pessoais/core/management/commands/carregar_taxas_cambio.py
+
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import TaxaCambio
+from core.cambio import cotacoes_alteradas, moeda_relatorio
+
+
+class Command(BaseCommand):
+    help = (
+        "Carrega cotações de arquivos locais (CSV com colunas moeda,data,taxa ou JSON com uma lista "
+        "de objetos com essas chaves). A taxa é quanto 1 unidade da moeda vale na moeda de relatório."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivos', nargs='+', help="Arquivos .csv ou .json com as cotações.")
+        parser.add_argument('--lote', type=int, default=1000, help="Cotações gravadas por INSERT.")
+
+    def ler(self, caminho):
+        try:
+            with open(caminho, newline='', encoding='utf-8') as arquivo:
+                if caminho.endswith('.json'):
+                    return json.load(arquivo)
+                return list(csv.DictReader(arquivo))
+        except (OSError, ValueError) as erro:
+            raise CommandError(f"Não foi possível ler {caminho}: {erro}")
+
+    def handle(self, *args, **options):
+        cotacoes = {}
+        for caminho in options['arquivos']:
+            for numero, linha in enumerate(self.ler(caminho), start=1):
+                try:
+                    moeda = linha['moeda'].strip().upper()
+                    data = date.fromisoformat(str(linha['data']).strip())
+                    taxa = Decimal(str(linha['taxa']).strip())
+                except (KeyError, AttributeError, ValueError, InvalidOperation) as erro:
+                    raise CommandError(f"{caminho}, registro {numero}: cotação inválida ({erro!r}).")
+                if moeda == moeda_relatorio() or taxa <= 0:
+                    raise CommandError(f"{caminho}, registro {numero}: cotação de {moeda} em {data} inválida.")
+                cotacoes[(moeda, data)] = TaxaCambio(moeda=moeda, data=data, taxa=taxa) # A última leitura prevalece
+
+        with transaction.atomic():
+            TaxaCambio.objects.bulk_create(
+                cotacoes.values(),
+                batch_size=options['lote'],
+                update_conflicts=True,
+                unique_fields=['moeda', 'data'],
+                update_fields=['taxa', 'data_atualizacao'],
+            )
+            # bulk_create não dispara sinais
+            cotacoes_alteradas()
+
+        moedas = sorted({moeda for moeda, _ in cotacoes})
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(cotacoes)} cotações carregadas ({', '.join(moedas) or 'nenhuma moeda'}) em {moeda_relatorio()}."
+        ))
@@ -0,0 +1,33 @@
+# financas_pessoais/core/management/commands/detectar_anomalias.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.deteccao import TAMANHO_LOTE, executar
+
+
+class Command(BaseCommand):
+    help = (
+        "Detecta possíveis transações duplicadas e gastos mensais atípicos por categoria. "
+        "Depois da primeira execução, só reavalia as transações alteradas desde a anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help="Varre todas as transações, não só as alteradas.")
+        parser.add_argument(
+            '--processos', type=int, default=settings.DETECCAO_PROCESSOS,
+            help="Processos usados para pontuar os lotes (padrão: DETECCAO_PROCESSOS)."
+        )
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="Transações lidas por lote.")
+
+    def handle(self, *args, **options):
+        if options['processos'] < 1 or options['lote'] < 1:
+            raise CommandError("--processos e --lote devem ser positivos.")
+        inicio = time.perf_counter()
+        resultado = executar(completo=options['completo'], processos=options['processos'], tamanho_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Detecção ({resultado['modo']}) concluída em {time.perf_counter() - inicio:.1f} s: "
+            f"{resultado['duplicatas']} possível(is) duplicata(s), {resultado['atipicos']} mês(es) atípico(s)."
+        ))
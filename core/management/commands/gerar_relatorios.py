@@ -0,0 +1,32 @@
+# financas_pessoais/core/management/commands/gerar_relatorios.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.relatorios import FORMATOS, armazenar_varios
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera relatórios anuais e grava no storage (MEDIA_ROOT/relatorios/). "
+        "Os relatórios (ou, com um só, as suas seções) são gerados em paralelo em um pool de processos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('anos', nargs='+', type=int, help="Anos dos relatórios.")
+        parser.add_argument('--formatos', nargs='+', default=['xlsx'], choices=list(FORMATOS), help="Formatos (padrão: xlsx).")
+        parser.add_argument(
+            '--processos', type=int, default=settings.RELATORIOS_PROCESSOS,
+            help="Processos do pool (padrão: RELATORIOS_PROCESSOS)."
+        )
+
+    def handle(self, *args, **options):
+        if options['processos'] < 1:
+            raise CommandError("--processos deve ser positivo.")
+        inicio = time.perf_counter()
+        arquivos = armazenar_varios(options['anos'], options['formatos'], options['processos'])
+        for caminho in arquivos:
+            self.stdout.write(f"  {caminho}")
+        self.stdout.write(self.style.SUCCESS(f"{len(arquivos)} relatório(s) gerado(s) em {time.perf_counter() - inicio:.1f} s."))
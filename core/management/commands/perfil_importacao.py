@@ -0,0 +1,75 @@
+# financas_pessoais/core/management/commands/perfil_importacao.py
+
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Carrega a aplicação como o gunicorn (WSGI) e importa o URLconf, que o Django só carregaria na
+# primeira requisição; com --aquecer, executa também o aquecimento do gunicorn.conf.py.
+CARREGAR_APLICACAO = """
+import os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {modulo_settings!r})
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+if {aquecer!r}:
+    from core.aquecimento import aquecer
+    aquecer()
+"""
+
+
+def medir_importacoes(aquecer=False):
+    """Executa a carga da aplicação em um processo novo com -X importtime e devolve [(módulo, self µs, acumulado µs)]."""
+    script = CARREGAR_APLICACAO.format(modulo_settings=settings.SETTINGS_MODULE, aquecer=aquecer)
+    ambiente = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'} # Não grava .pyc durante a medição
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        capture_output=True, text=True, cwd=settings.BASE_DIR, env=ambiente,
+    )
+    if processo.returncode != 0:
+        raise CommandError(f"Falha ao carregar a aplicação:\n{processo.stderr[-2000:]}")
+    medidas = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, modulo = linha[len('import time:'):].split('|')
+        medidas.append((modulo.strip(), int(proprio), int(acumulado)))
+    return medidas
+
+
+class Command(BaseCommand):
+    help = (
+        "Perfil de importação da carga da aplicação (python -X importtime) em um processo novo: "
+        "tempo total, pacotes e módulos mais caros. Base para o cold start dos workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help="Quantos pacotes/módulos listar.")
+        parser.add_argument('--aquecer', action='store_true', help="Inclui o aquecimento (core.aquecimento).")
+        parser.add_argument('--saida', help="Grava também o relatório bruto (módulo, self µs, acumulado µs) em TSV.")
+
+    def handle(self, *args, **options):
+        medidas = medir_importacoes(options['aquecer'])
+        total = sum(proprio for _, proprio, _ in medidas)
+        por_pacote = defaultdict(int)
+        for modulo, proprio, _ in medidas:
+            por_pacote[modulo.split('.')[0]] += proprio
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== Importações: {len(medidas)} módulos, {total / 1000:.1f} ms =="))
+        self.stdout.write(self.style.MIGRATE_HEADING("Por pacote (tempo próprio somado):"))
+        for pacote, proprio in sorted(por_pacote.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {proprio / 1000:8.1f} ms  {proprio / total:6.1%}  {pacote}")
+        self.stdout.write(self.style.MIGRATE_HEADING("Módulos mais caros (tempo próprio):"))
+        for modulo, proprio, acumulado in sorted(medidas, key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {proprio / 1000:8.1f} ms  (acumulado {acumulado / 1000:7.1f} ms)  {modulo}")
+
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                arquivo.write("modulo\tself_us\tacumulado_us\n")
+                arquivo.writelines(f"{modulo}\t{proprio}\t{acumulado}\n" for modulo, proprio, acumulado in medidas)
+            self.stdout.write(f"Relatório bruto em {options['saida']}")
@@ -0,0 +1,90 @@
+# financas_pessoais/core/management/commands/processar_tarefas.py
+
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from core import tarefas
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker da fila de tarefas em segundo plano. "
+        "Cada tipo de tarefa roda no seu próprio grupo de threads (TAREFAS_CONCORRENCIA ou --concorrencia)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concorrencia', action='append', default=[], metavar='NOME=THREADS',
+            help="Sobrescreve o número de threads de um tipo de tarefa (pode ser repetido)."
+        )
+        parser.add_argument(
+            '--tarefas', nargs='*', default=None,
+            help="Processa apenas os tipos de tarefa informados."
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=settings.TAREFAS_INTERVALO_POLLING,
+            help="Segundos de espera quando a fila está vazia."
+        )
+        parser.add_argument(
+            '--uma-vez', action='store_true',
+            help="Processa as tarefas pendentes e encerra quando a fila esvaziar."
+        )
+
+    def handle(self, *args, **options):
+        concorrencia = tarefas.concorrencia_por_tarefa()
+        for item in options['concorrencia']:
+            nome, _, threads = item.partition('=')
+            if nome not in tarefas.TAREFAS or not threads.isdigit():
+                raise CommandError(f"Valor inválido para --concorrencia: {item}")
+            concorrencia[nome] = int(threads)
+        if options['tarefas'] is not None:
+            desconhecidas = set(options['tarefas']) - set(tarefas.TAREFAS)
+            if desconhecidas:
+                raise CommandError(f"Tarefas desconhecidas: {', '.join(sorted(desconhecidas))}")
+            concorrencia = {nome: concorrencia[nome] for nome in options['tarefas']}
+
+        prefixo = f"{socket.gethostname()}:{os.getpid()}"
+        self.parar = threading.Event()
+        threads = []
+        for nome, quantidade in concorrencia.items():
+            for indice in range(quantidade):
+                thread = threading.Thread(
+                    target=self.loop,
+                    args=(f"{prefixo}:{nome}:{indice}", [nome], options['intervalo'], options['uma_vez']),
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        self.stdout.write(f"Worker {prefixo} iniciado: {concorrencia}")
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self.parar.set()
+            self.stdout.write("Encerrando o worker...")
+
+    def loop(self, worker, nomes, intervalo, uma_vez):
+        try:
+            while not self.parar.is_set():
+                close_old_connections()
+                tarefa_reservada = tarefas.reservar_tarefa(worker, nomes)
+                if tarefa_reservada is None:
+                    if uma_vez:
+                        return
+                    self.parar.wait(intervalo)
+                    continue
+                inicio = time.monotonic()
+                tarefa_reservada = tarefas.executar_tarefa(tarefa_reservada)
+                self.stdout.write(
+                    f"[{worker}] {tarefa_reservada} em {time.monotonic() - inicio:.2f}s"
+                )
+        finally:
+            connection.close()
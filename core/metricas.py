@@ -0,0 +1,79 @@
+# financas_pessoais/core/metricas.py
+
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Métricas em memória, por processo (cada worker do gunicorn tem as suas)
+_trava = threading.Lock()
+_contadores = defaultdict(int)
+_requisicoes = {'total': 0, 'por_status': defaultdict(int), 'tempo_total_ms': 0.0, 'tempo_maximo_ms': 0.0}
+# Carga da aplicação (com preload_app, no master, antes do fork): base do tempo até a primeira resposta
+_inicio_processo = time.monotonic()
+_arranque = {'primeira_resposta_ms': None}
+
+
+def incrementar(nome, quantidade=1):
+    """Incrementa um contador nomeado (ex.: 'conexoes_abertas')."""
+    with _trava:
+        _contadores[nome] += quantidade
+
+
+def registrar_requisicao(status_code, duracao_ms):
+    with _trava:
+        if _arranque['primeira_resposta_ms'] is None:
+            # Depois de um spin-down, a primeira requisição é a que acorda a instância
+            _arranque['primeira_resposta_ms'] = (time.monotonic() - _inicio_processo) * 1000
+        _requisicoes['total'] += 1
+        _requisicoes['por_status'][f'{status_code // 100}xx'] += 1
+        _requisicoes['tempo_total_ms'] += duracao_ms
+        _requisicoes['tempo_maximo_ms'] = max(_requisicoes['tempo_maximo_ms'], duracao_ms)
+
+
+def metricas_pool():
+    """Estatísticas do pool de conexões de cada banco (psycopg 3 com OPTIONS['pool']), se houver."""
+    resultado = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None and hasattr(pool, 'get_stats'):
+            resultado[alias] = pool.get_stats()
+    return resultado
+
+
+def instantaneo():
+    """Cópia das métricas atuais do processo, pronta para ser serializada."""
+    with _trava:
+        total = _requisicoes['total']
+        requisicoes = {
+            'total': total,
+            'por_status': dict(_requisicoes['por_status']),
+            'tempo_medio_ms': _requisicoes['tempo_total_ms'] / total if total else 0.0,
+            'tempo_maximo_ms': _requisicoes['tempo_maximo_ms'],
+        }
+        contadores = dict(_contadores)
+        arranque = dict(_arranque)
+    return {'requisicoes': requisicoes, 'contadores': contadores, 'arranque': arranque, 'pool': metricas_pool()}
+
+
+def contar_conexao_criada(sender, connection, **kwargs):
+    # Cada conexão física nova com o banco (útil para enxergar "tempestades" de conexões)
+    incrementar(f'conexoes_abertas.{connection.alias}')
+
+
+connection_created.connect(contar_conexao_criada, dispatch_uid='metricas_conexao_criada')
+
+
+class MetricasMiddleware:
+    """Conta as requisições e o tempo de resposta de cada uma."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        registrar_requisicao(response.status_code, (time.perf_counter() - inicio) * 1000)
+        return response
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_detailed_initial_categories_final'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsightsAno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveIntegerField(unique=True, verbose_name='Ano')),
+                ('periodo_inicio', models.DateField(verbose_name='Início do Período Analisado')),
+                ('periodo_fim', models.DateField(verbose_name='Fim do Período Analisado')),
+                ('impressao_digital', models.CharField(max_length=64, verbose_name='Impressão Digital das Entradas')),
+                ('alertas', models.JSONField(default=list, verbose_name='Alertas')),
+                ('sugestoes', models.JSONField(default=list, verbose_name='Sugestões')),
+                ('status_financeiro', models.CharField(default='EXCELLENT', max_length=20, verbose_name='Status Financeiro')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Insights do Ano',
+                'verbose_name_plural': 'Insights dos Anos',
+                'ordering': ['-ano'],
+            },
+        ),
+    ]
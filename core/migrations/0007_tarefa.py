@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_insightsano'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome da Tarefa')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluida', 'Concluída'), ('falhou', 'Falhou')], default='pendente', max_length=12, verbose_name='Status')),
+                ('tentativas', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_tentativas', models.PositiveIntegerField(default=3, verbose_name='Máximo de Tentativas')),
+                ('executar_apos', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Executar Após')),
+                ('resultado', models.JSONField(blank=True, null=True, verbose_name='Resultado')),
+                ('erro', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('data_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Início da Execução')),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True, verbose_name='Fim da Execução')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['status', 'nome', 'executar_apos'], name='tarefa_fila_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_tarefa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegraCategorizacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome da Regra')),
+                ('padrao_descricao', models.CharField(blank=True, help_text='Expressão regular (sem diferenciar maiúsculas/minúsculas) buscada na descrição.', max_length=255, verbose_name='Padrão da Descrição')),
+                ('valor_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor Mínimo')),
+                ('valor_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor Máximo')),
+                ('tipo', models.CharField(blank=True, choices=[('receita', 'Receita'), ('despesa', 'Despesa')], help_text='Deixe em branco para aplicar a receitas e despesas.', max_length=10, verbose_name='Tipo')),
+                ('prioridade', models.PositiveIntegerField(default=100, help_text='Menor número = maior prioridade.', verbose_name='Prioridade')),
+                ('ativa', models.BooleanField(default=True, verbose_name='Ativa')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='regras', to='core.categoria', verbose_name='Categoria')),
+            ],
+            options={
+                'verbose_name': 'Regra de Categorização',
+                'verbose_name_plural': 'Regras de Categorização',
+                'ordering': ['prioridade', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:21
+
+from django.db import migrations, models
+
+
+def preencher_categoria_desnormalizada(apps, schema_editor):
+    Categoria = apps.get_model('core', 'Categoria')
+    Transacao = apps.get_model('core', 'Transacao')
+    # Um UPDATE por categoria (poucas linhas em Categoria, muitas em Transacao)
+    for categoria in Categoria.objects.all():
+        Transacao.objects.filter(categoria=categoria).update(
+            categoria_nome=categoria.nome,
+            categoria_tipo=categoria.tipo_categoria
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_regracategorizacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transacao',
+            name='categoria_nome',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100, null=True, verbose_name='Nome da Categoria'),
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='categoria_tipo',
+            field=models.CharField(blank=True, editable=False, max_length=10, null=True, verbose_name='Tipo da Categoria'),
+        ),
+        migrations.RunPython(preencher_categoria_desnormalizada, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:22
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+
+def preencher_centavos(apps, schema_editor):
+    Transacao = apps.get_model('core', 'Transacao')
+    MetaFinanceira = apps.get_model('core', 'MetaFinanceira')
+
+    def em_centavos(campo):
+        return Cast(Round(F(campo) * 100), models.BigIntegerField())
+
+    # UPDATE único por tabela, sem carregar as linhas no Python
+    Transacao.objects.update(valor_centavos=em_centavos('valor'))
+    MetaFinanceira.objects.update(
+        valor_alvo_centavos=em_centavos('valor_alvo'),
+        valor_atingido_centavos=em_centavos('valor_atingido')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_transacao_categoria_desnormalizada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metafinanceira',
+            name='valor_alvo_centavos',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Valor Alvo (centavos)'),
+        ),
+        migrations.AddField(
+            model_name='metafinanceira',
+            name='valor_atingido_centavos',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Valor Atingido (centavos)'),
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='valor_centavos',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Valor (centavos)'),
+        ),
+        migrations.RunPython(preencher_centavos, migrations.RunPython.noop),
+    ]
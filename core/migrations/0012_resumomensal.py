@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_transacao_indices_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveIntegerField(verbose_name='Ano')),
+                ('mes', models.PositiveSmallIntegerField(verbose_name='Mês')),
+                ('receitas', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total de Receitas')),
+                ('despesas', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total de Despesas')),
+                ('despesas_por_categoria', models.JSONField(default=dict, verbose_name='Despesas por Categoria')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Checksum')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal',
+                'verbose_name_plural': 'Resumos Mensais',
+                'ordering': ['ano', 'mes'],
+                'unique_together': {('ano', 'mes')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_resumomensal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transacao',
+            name='moeda',
+            field=models.CharField(default='BRL', max_length=3, verbose_name='Moeda'),
+        ),
+        migrations.CreateModel(
+            name='TaxaCambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('moeda', models.CharField(max_length=3, verbose_name='Moeda')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('taxa', models.DecimalField(decimal_places=8, max_digits=18, verbose_name='Taxa')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Taxa de Câmbio',
+                'verbose_name_plural': 'Taxas de Câmbio',
+                'ordering': ['moeda', '-data'],
+                'unique_together': {('moeda', 'data')},
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:39
+
+from collections import defaultdict
+from decimal import ROUND_HALF_UP
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def preencher_gastos_mensais(apps, schema_editor):
+    Transacao = apps.get_model('core', 'Transacao')
+    TaxaCambio = apps.get_model('core', 'TaxaCambio')
+    GastoMensal = apps.get_model('core', 'GastoMensal')
+    moeda_relatorio = getattr(settings, 'MOEDA_RELATORIO', 'BRL')
+    despesas = Transacao.objects.filter(tipo='despesa', categoria__isnull=False)
+    totais = defaultdict(int)
+
+    # Transações na moeda de relatório: um único SELECT agrupado por categoria e mês
+    na_moeda = (
+        despesas.filter(moeda=moeda_relatorio)
+        .annotate(ano=ExtractYear('data_transacao'), mes=ExtractMonth('data_transacao'))
+        .values('categoria_id', 'ano', 'mes')
+        .annotate(total=Sum('valor_centavos'))
+        .order_by()
+    )
+    for item in na_moeda:
+        totais[(item['categoria_id'], item['ano'], item['mes'])] += item['total']
+
+    # Outras moedas (poucas linhas): cotação vigente na data, ou a primeira da moeda
+    for transacao in despesas.exclude(moeda=moeda_relatorio).iterator():
+        cotacoes = TaxaCambio.objects.filter(moeda=transacao.moeda)
+        cotacao = cotacoes.filter(data__lte=transacao.data_transacao).order_by('-data').first() or cotacoes.order_by('data').first()
+        if cotacao is not None:
+            data = transacao.data_transacao
+            centavos = (transacao.valor_centavos * cotacao.taxa).to_integral_value(rounding=ROUND_HALF_UP)
+            totais[(transacao.categoria_id, data.year, data.month)] += int(centavos)
+
+    GastoMensal.objects.bulk_create(
+        [GastoMensal(categoria_id=categoria_id, ano=ano, mes=mes, total_centavos=total) for (categoria_id, ano, mes), total in totais.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_moedas_taxacambio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Orcamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor_limite', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Limite Mensal')),
+                ('limiar_alerta', models.PositiveSmallIntegerField(default=80, verbose_name='Alertar a partir de (%)')),
+                ('ativo', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+                ('categoria', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='orcamento', to='core.categoria', verbose_name='Categoria')),
+            ],
+            options={
+                'verbose_name': 'Orçamento',
+                'verbose_name_plural': 'Orçamentos',
+                'ordering': ['categoria__nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GastoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveIntegerField(verbose_name='Ano')),
+                ('mes', models.PositiveSmallIntegerField(verbose_name='Mês')),
+                ('total_centavos', models.BigIntegerField(default=0, verbose_name='Total (centavos)')),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gastos_mensais', to='core.categoria', verbose_name='Categoria')),
+            ],
+            options={
+                'verbose_name': 'Gasto Mensal',
+                'verbose_name_plural': 'Gastos Mensais',
+                'unique_together': {('categoria', 'ano', 'mes')},
+            },
+        ),
+        migrations.RunPython(preencher_gastos_mensais, migrations.RunPython.noop),
+    ]
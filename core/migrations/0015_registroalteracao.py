@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def criar_contador(apps, schema_editor):
+    SequenciaAlteracao = apps.get_model('core', 'SequenciaAlteracao')
+    SequenciaAlteracao.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_orcamentos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaAlteracao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultima', models.BigIntegerField(default=0, verbose_name='Última Sequência')),
+            ],
+            options={
+                'verbose_name': 'Sequência de Alterações',
+            },
+        ),
+        migrations.CreateModel(
+            name='RegistroAlteracao',
+            fields=[
+                ('sequencia', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Sequência')),
+                ('modelo', models.CharField(max_length=50, verbose_name='Modelo')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID do Objeto')),
+                ('operacao', models.CharField(choices=[('criacao', 'Criação'), ('alteracao', 'Alteração'), ('exclusao', 'Exclusão')], max_length=10, verbose_name='Operação')),
+                ('dados', models.JSONField(default=dict, verbose_name='Dados')),
+                ('origem', models.CharField(blank=True, max_length=255, verbose_name='Origem')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Registro de Alteração',
+                'verbose_name_plural': 'Registros de Alterações',
+                'ordering': ['sequencia'],
+                'indexes': [models.Index(fields=['modelo', 'objeto_id', 'sequencia'], name='alteracao_objeto_idx')],
+            },
+        ),
+        migrations.RunPython(criar_contador, migrations.RunPython.noop),
+    ]
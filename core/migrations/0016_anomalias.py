@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_registroalteracao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Anomalia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('duplicata', 'Possível Duplicata'), ('atipico', 'Gasto Mensal Atípico')], max_length=10, verbose_name='Tipo')),
+                ('situacao', models.CharField(choices=[('aberta', 'Aberta'), ('confirmada', 'Confirmada'), ('descartada', 'Descartada')], default='aberta', max_length=10, verbose_name='Situação')),
+                ('chave', models.CharField(max_length=100, unique=True, verbose_name='Chave')),
+                ('ano', models.PositiveIntegerField(blank=True, null=True, verbose_name='Ano')),
+                ('mes', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Mês')),
+                ('pontuacao', models.FloatField(verbose_name='Pontuação')),
+                ('detalhes', models.JSONField(default=dict, verbose_name='Detalhes')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Anomalia',
+                'verbose_name_plural': 'Anomalias',
+                'ordering': ['-data_criacao', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadoDeteccao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=50, unique=True, verbose_name='Nome')),
+                ('ultima_sequencia', models.BigIntegerField(default=0, verbose_name='Última Sequência Analisada')),
+                ('data_execucao', models.DateTimeField(auto_now=True, verbose_name='Última Execução')),
+            ],
+            options={
+                'verbose_name': 'Estado da Detecção',
+                'verbose_name_plural': 'Estados da Detecção',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['valor_centavos', 'data_transacao'], name='transacao_valor_data_idx'),
+        ),
+        migrations.AddField(
+            model_name='anomalia',
+            name='categoria',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='anomalias', to='core.categoria', verbose_name='Categoria'),
+        ),
+        migrations.AddField(
+            model_name='anomalia',
+            name='transacao',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='anomalias', to='core.transacao', verbose_name='Transação'),
+        ),
+        migrations.AddField(
+            model_name='anomalia',
+            name='transacao_relacionada',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.transacao', verbose_name='Transação Relacionada'),
+        ),
+        migrations.AddIndex(
+            model_name='anomalia',
+            index=models.Index(fields=['tipo', 'situacao'], name='anomalia_tipo_situacao_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:00
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def preencher_indice(apps, schema_editor):
+    Transacao = apps.get_model('core', 'Transacao')
+    PeriodoIndice = apps.get_model('core', 'PeriodoIndice')
+    totais = (
+        Transacao.objects
+        .annotate(ano=ExtractYear('data_transacao'), mes=ExtractMonth('data_transacao'))
+        .values('ano', 'mes', 'tipo')
+        .annotate(quantidade=Count('id'))
+        .order_by()
+    )
+    PeriodoIndice.objects.bulk_create([PeriodoIndice(**item) for item in totais], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_anomalias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodoIndice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveIntegerField(verbose_name='Ano')),
+                ('mes', models.PositiveSmallIntegerField(verbose_name='Mês')),
+                ('tipo', models.CharField(choices=[('receita', 'Receita'), ('despesa', 'Despesa')], max_length=10, verbose_name='Tipo')),
+                ('quantidade', models.IntegerField(default=0, verbose_name='Quantidade de Transações')),
+            ],
+            options={
+                'verbose_name': 'Período com Transações',
+                'verbose_name_plural': 'Períodos com Transações',
+                'ordering': ['-ano', 'mes', 'tipo'],
+                'unique_together': {('ano', 'mes', 'tipo')},
+            },
+        ),
+        migrations.RunPython(preencher_indice, migrations.RunPython.noop),
+    ]
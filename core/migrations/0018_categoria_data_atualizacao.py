@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_periodoindice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True, verbose_name='Última Atualização'),
+        ),
+    ]
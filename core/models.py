@@ -1,8 +1,177 @@
 # financas_pessoais/core/models.py
 
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models.functions import Cast, Round
 from django.utils import timezone
 
+# Símbolo usado ao exibir valores; moedas fora da lista aparecem pelo código ISO 4217
+SIMBOLOS_MOEDA = {'BRL': 'R$', 'USD': 'US$', 'EUR': '€', 'GBP': '£'}
+
+
+def simbolo_moeda(moeda):
+    return SIMBOLOS_MOEDA.get(moeda, moeda)
+
+class AuditadoQuerySet(models.QuerySet):
+    """
+    QuerySet dos modelos auditados: UPDATEs e INSERTs em lote também entram no log de
+    alterações (RegistroAlteracao), na mesma transação da escrita. As exclusões em lote já
+    passam pelo post_delete de cada objeto (ver core/signals.py).
+    """
+
+    def update(self, **kwargs):
+        # Importado aqui porque core/auditoria.py depende dos modelos
+        from .auditoria import atualizar_e_registrar
+        banco = router.db_for_write(self.model, **self._hints)
+        with transaction.atomic(using=banco):
+            # Um UPDATE só, mais o INSERT ... SELECT do log: nenhuma linha passa pelo Python
+            return atualizar_e_registrar(self, kwargs, banco)
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .auditoria import registrar_objetos
+        banco = router.db_for_write(self.model, **self._hints)
+        with transaction.atomic(using=banco):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            registrar_objetos([obj for obj in objs if obj.pk is not None], 'criacao', banco)
+        return objs
+
+    bulk_create.alters_data = True
+
+
+class TransacaoQuerySet(AuditadoQuerySet):
+    """
+    Escritas em lote de transações fazem o que os sinais fazem no save(): mantêm as colunas espelho
+    (valor_centavos, categoria_nome/categoria_tipo), o índice de períodos (core/periodos.py) e, no
+    bulk_create e nos updates de valor/moeda/data/tipo, os resumos, orçamentos e insights.
+    """
+
+    # Campos que mudam totais já agregados (resumos mensais, gastos dos orçamentos, insights)
+    CAMPOS_TOTAIS = {'valor', 'valor_centavos', 'moeda', 'data_transacao', 'tipo'}
+
+    def update(self, **kwargs):
+        from . import periodos, resumos, orcamentos, insights
+        from .dinheiro import para_centavos
+        if 'valor' in kwargs and 'valor_centavos' not in kwargs:
+            valor = kwargs['valor']
+            if hasattr(valor, 'resolve_expression'):
+                kwargs['valor_centavos'] = Cast(Round(valor * 100), models.BigIntegerField())
+            else:
+                kwargs['valor_centavos'] = para_centavos(valor)
+        campo_categoria = 'categoria' if 'categoria' in kwargs else 'categoria_id' if 'categoria_id' in kwargs else None
+        if campo_categoria and 'categoria_nome' not in kwargs and not hasattr(kwargs[campo_categoria], 'resolve_expression'):
+            categoria = kwargs[campo_categoria]
+            if categoria is not None and not isinstance(categoria, Categoria):
+                categoria = Categoria.objects.get(pk=categoria)
+            kwargs['categoria_nome'] = categoria.nome if categoria else None
+            kwargs['categoria_tipo'] = categoria.tipo_categoria if categoria else None
+        if not self.CAMPOS_TOTAIS & kwargs.keys():
+            return super().update(**kwargs)
+
+        from .auditoria import atualizar_e_registrar
+        banco = router.db_for_write(self.model, **self._hints)
+        with transaction.atomic(using=banco):
+            # Meses das linhas alcançadas (um por mês, não por linha): só os resumos deles são apagados
+            meses = set(self.using(banco).dates('data_transacao', 'month'))
+            if 'data_transacao' in kwargs or 'tipo' in kwargs:
+                # Índice de períodos: as linhas alteradas agrupadas por (ano, mês, tipo) antes e depois
+                movidas = {}
+
+                def agrupar_antes(alvo):
+                    movidas.update(alvo=alvo, antes=periodos.totais(alvo))
+
+                afetadas = atualizar_e_registrar(self, kwargs, banco, antes_de_atualizar=agrupar_antes)
+                if afetadas:
+                    periodos.mover(movidas['antes'], periodos.totais(movidas['alvo']))
+            else:
+                afetadas = super().update(**kwargs)
+            if afetadas:
+                nova_data = kwargs.get('data_transacao')
+                if nova_data is not None and hasattr(nova_data, 'resolve_expression'):
+                    meses = None # Data calculada no SQL: não se sabe para quais meses as linhas foram
+                elif nova_data is not None:
+                    from .signals import como_data
+                    meses.add(como_data(nova_data))
+                if meses is None:
+                    resumos.invalidar_todos()
+                    anos = set(periodos.anos_disponiveis())
+                else:
+                    resumos.invalidar(*meses)
+                    anos = {mes.year for mes in meses}
+                orcamentos.recalcular_gastos(anos=anos)
+                insights.agendar_atualizacao(*anos, *(ano + 1 for ano in anos))
+        return afetadas
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import periodos, resumos, orcamentos, insights
+        from .categorizacao import categorizar
+        from .dinheiro import para_centavos
+        from .signals import como_data
+        banco = router.db_for_write(self.model, **self._hints)
+        objs = list(objs)
+        # O que os receivers de pre_save fazem em cada save()
+        for obj in objs:
+            obj.data_transacao = como_data(obj.data_transacao)
+            obj.valor_centavos = para_centavos(obj.valor)
+        categorizar([obj for obj in objs if obj.categoria_id is None])
+        categorias = Categoria.objects.using(banco).in_bulk({obj.categoria_id for obj in objs if obj.categoria_id is not None})
+        for obj in objs:
+            categoria = categorias.get(obj.categoria_id)
+            obj.categoria_nome = categoria.nome if categoria else None
+            obj.categoria_tipo = categoria.tipo_categoria if categoria else None
+        with transaction.atomic(using=banco):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            periodos.contar([obj for obj in objs if obj.pk is not None], 1)
+            anos = {obj.data_transacao.year for obj in objs if obj.data_transacao is not None}
+            if anos:
+                resumos.invalidar(*(obj.data_transacao for obj in objs))
+                orcamentos.recalcular_gastos(anos=anos)
+                insights.agendar_atualizacao(*anos, *(ano + 1 for ano in anos))
+        return objs
+
+    bulk_create.alters_data = True
+
+
+class ModeloAuditado(models.Model):
+    """Base dos modelos com log de alterações: o save() e o registro no log ficam na mesma transação."""
+    objects = AuditadoQuerySet.as_manager()
+
+    # {campo: [colunas espelho]} preenchidas pelos sinais de pre_save a partir do campo. Num save
+    # parcial (update_fields ou instância carregada com .only()/.defer()) elas vão junto com ele.
+    espelhos = {}
+
+    class Meta:
+        abstract = True
+
+    def _campos_com_espelhos(self, update_fields, banco):
+        if update_fields is None:
+            adiados = self.get_deferred_fields()
+            if self._state.adding or not adiados or banco != self._state.db:
+                return None
+            # Os mesmos campos que o save() do Django gravaria: os carregados
+            update_fields = {
+                campo.attname for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.attname not in adiados
+            }
+            if not update_fields:
+                return None
+        campos = set(update_fields)
+        for origem, espelhos in self.espelhos.items():
+            if origem in campos:
+                campos.update(espelhos)
+        return campos
+
+    def save(self, *args, **kwargs):
+        banco = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        if self.espelhos and not args and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = self._campos_com_espelhos(kwargs.get('update_fields'), banco)
+        with transaction.atomic(using=banco):
+            super().save(*args, **kwargs)
+
+
 # Modelo para Categorias de Transações - CORRIGIDO
 class Categoria(models.Model):
     TIPO_CHOICES = [ # Choices para o novo campo tipo_categoria
@@ -19,6 +188,8 @@ class Categoria(models.Model):
         default='despesa', # Padrão para despesa, pois a maioria das categorias é de despesa
         verbose_name="Tipo de Categoria"
     )
+    # Versão do mapa de categorias em memória (core/categorias.py)
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
 
     class Meta:
         verbose_name = "Categoria"
@@ -29,7 +200,7 @@ class Categoria(models.Model):
         return f"{self.nome} ({self.get_tipo_categoria_display()})" # Mostra o tipo também
 
 # Modelo para Transações (Receitas e Despesas)
-class Transacao(models.Model):
+class Transacao(ModeloAuditado):
     TIPO_CHOICES = [
         ('receita', 'Receita'),
         ('despesa', 'Despesa'),
@@ -42,6 +213,9 @@ class Transacao(models.Model):
 
     descricao = models.CharField(max_length=255, verbose_name="Descrição")
     valor = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Valor")
+    # Espelho de 'valor' em centavos (BIGINT), usado nas agregações quando VALORES_EM_CENTAVOS=True
+    valor_centavos = models.BigIntegerField(default=0, editable=False, verbose_name="Valor (centavos)")
+    moeda = models.CharField(max_length=3, default='BRL', verbose_name="Moeda") # Código ISO 4217
     data_transacao = models.DateField(default=timezone.now, verbose_name="Data da Transação")
     tipo = models.CharField(
         max_length=10,
@@ -63,19 +237,39 @@ class Transacao(models.Model):
         related_name='transacoes',
         verbose_name="Categoria"
     )
+    # Cópia desnormalizada do nome/tipo da categoria: as análises agrupam por ela sem JOIN em Categoria.
+    # Mantida pelos sinais em core/signals.py (inclusive quando a categoria é renomeada).
+    categoria_nome = models.CharField(max_length=100, null=True, blank=True, editable=False, db_index=True, verbose_name="Nome da Categoria")
+    categoria_tipo = models.CharField(max_length=10, null=True, blank=True, editable=False, verbose_name="Tipo da Categoria")
     data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
 
+    objects = TransacaoQuerySet.as_manager()
+
+    espelhos = {
+        'valor': ['valor_centavos'],
+        'categoria': ['categoria_nome', 'categoria_tipo'],
+        'categoria_id': ['categoria_nome', 'categoria_tipo'],
+    }
+
     class Meta:
         verbose_name = "Transação"
         verbose_name_plural = "Transações"
         ordering = ['-data_transacao', '-data_criacao'] # Ordena pelas transações mais recentes
+        indexes = [
+            # Intervalos de datas e séries temporais (com ou sem filtro por tipo/categoria)
+            models.Index(fields=['data_transacao'], name='transacao_data_idx'),
+            models.Index(fields=['tipo', 'data_transacao'], name='transacao_tipo_data_idx'),
+            models.Index(fields=['categoria', 'data_transacao'], name='transacao_categoria_data_idx'),
+            # Busca de possíveis duplicatas (mesmo valor em uma janela de datas, core/deteccao.py)
+            models.Index(fields=['valor_centavos', 'data_transacao'], name='transacao_valor_data_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.descricao} ({self.tipo.capitalize()}) - R$ {self.valor:.2f}"
+        return f"{self.descricao} ({self.tipo.capitalize()}) - {simbolo_moeda(self.moeda)} {self.valor:.2f}"
     
     # NOVO MODELO PARA METAS FINANCEIRAS
-class MetaFinanceira(models.Model):
+class MetaFinanceira(ModeloAuditado):
     TIPOS_META_CHOICES = [
         ('economizar', 'Economizar'),
         ('investir', 'Investir'),
@@ -93,12 +287,16 @@ class MetaFinanceira(models.Model):
     )
     valor_alvo = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Valor Alvo")
     valor_atingido = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Valor Atingido")
+    valor_alvo_centavos = models.BigIntegerField(default=0, editable=False, verbose_name="Valor Alvo (centavos)")
+    valor_atingido_centavos = models.BigIntegerField(default=0, editable=False, verbose_name="Valor Atingido (centavos)")
     data_inicio = models.DateField(default=timezone.now, verbose_name="Data de Início")
     data_limite = models.DateField(verbose_name="Data Limite")
     concluida = models.BooleanField(default=False, verbose_name="Concluída")
     data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
 
+    espelhos = {'valor_alvo': ['valor_alvo_centavos'], 'valor_atingido': ['valor_atingido_centavos']}
+
     class Meta:
         verbose_name = "Meta Financeira"
         verbose_name_plural = "Metas Financeiras"
@@ -115,4 +313,282 @@ class MetaFinanceira(models.Model):
 
     @property
     def valor_restante(self):
-        return self.valor_alvo - self.valor_atingido
\ No newline at end of file
+        return self.valor_alvo - self.valor_atingido
+
+# Insights (alertas e sugestões) pré-calculados por ano
+class InsightsAno(models.Model):
+    ano = models.PositiveIntegerField(unique=True, verbose_name="Ano")
+    periodo_inicio = models.DateField(verbose_name="Início do Período Analisado")
+    periodo_fim = models.DateField(verbose_name="Fim do Período Analisado")
+    impressao_digital = models.CharField(max_length=64, verbose_name="Impressão Digital das Entradas")
+    alertas = models.JSONField(default=list, verbose_name="Alertas")
+    sugestoes = models.JSONField(default=list, verbose_name="Sugestões")
+    status_financeiro = models.CharField(max_length=20, default='EXCELLENT', verbose_name="Status Financeiro")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Insights do Ano"
+        verbose_name_plural = "Insights dos Anos"
+        ordering = ['-ano']
+
+    def __str__(self):
+        return f"Insights {self.ano} ({self.status_financeiro})"
+
+
+# Cotações locais usadas para converter as transações para a moeda de relatório (ver core/cambio.py)
+class TaxaCambio(models.Model):
+    moeda = models.CharField(max_length=3, verbose_name="Moeda")
+    data = models.DateField(verbose_name="Data")
+    # Quanto 1 unidade da moeda vale na moeda de relatório (MOEDA_RELATORIO) nesta data
+    taxa = models.DecimalField(max_digits=18, decimal_places=8, verbose_name="Taxa")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Taxa de Câmbio"
+        verbose_name_plural = "Taxas de Câmbio"
+        unique_together = ('moeda', 'data') # O índice (moeda, data) atende a busca da cotação vigente
+        ordering = ['moeda', '-data']
+
+    def __str__(self):
+        return f"{self.moeda} {self.data:%d/%m/%Y}: {self.taxa}"
+
+
+# Orçamento mensal (recorrente) de uma categoria, na moeda de relatório
+class Orcamento(models.Model):
+    categoria = models.OneToOneField(Categoria, on_delete=models.CASCADE, related_name='orcamento', verbose_name="Categoria")
+    valor_limite = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Limite Mensal")
+    limiar_alerta = models.PositiveSmallIntegerField(default=80, verbose_name="Alertar a partir de (%)")
+    ativo = models.BooleanField(default=True, verbose_name="Ativo")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Orçamento"
+        verbose_name_plural = "Orçamentos"
+        ordering = ['categoria__nome']
+
+    def __str__(self):
+        return f"Orçamento {self.categoria.nome}: {self.valor_limite:.2f}/mês"
+
+
+# Índice dos meses com transações: quantas transações de cada tipo há em cada ano/mês,
+# mantido incrementalmente pelos sinais (linhas com quantidade 0 ficam e são ignoradas nas leituras)
+class PeriodoIndice(models.Model):
+    ano = models.PositiveIntegerField(verbose_name="Ano")
+    mes = models.PositiveSmallIntegerField(verbose_name="Mês")
+    tipo = models.CharField(max_length=10, choices=Transacao.TIPO_CHOICES, verbose_name="Tipo")
+    quantidade = models.IntegerField(default=0, verbose_name="Quantidade de Transações")
+
+    class Meta:
+        verbose_name = "Período com Transações"
+        verbose_name_plural = "Períodos com Transações"
+        unique_together = ('ano', 'mes', 'tipo')
+        ordering = ['-ano', 'mes', 'tipo']
+
+    def __str__(self):
+        return f"{self.mes:02d}/{self.ano} {self.tipo}: {self.quantidade}"
+
+
+# Contador do gasto (despesas) de uma categoria em um mês, mantido incrementalmente pelos sinais
+class GastoMensal(models.Model):
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='gastos_mensais', verbose_name="Categoria")
+    ano = models.PositiveIntegerField(verbose_name="Ano")
+    mes = models.PositiveSmallIntegerField(verbose_name="Mês")
+    # Em centavos da moeda de relatório, para os incrementos serem exatos
+    total_centavos = models.BigIntegerField(default=0, verbose_name="Total (centavos)")
+
+    class Meta:
+        verbose_name = "Gasto Mensal"
+        verbose_name_plural = "Gastos Mensais"
+        unique_together = ('categoria', 'ano', 'mes')
+
+    def __str__(self):
+        return f"{self.categoria_id} {self.mes:02d}/{self.ano}: {self.total_centavos}"
+
+
+# Achado da detecção de anomalias (core/deteccao.py): possível duplicata ou gasto mensal atípico
+class Anomalia(models.Model):
+    TIPO_CHOICES = [
+        ('duplicata', 'Possível Duplicata'),
+        ('atipico', 'Gasto Mensal Atípico'),
+    ]
+
+    SITUACAO_CHOICES = [
+        ('aberta', 'Aberta'),
+        ('confirmada', 'Confirmada'),
+        ('descartada', 'Descartada'),
+    ]
+
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, verbose_name="Tipo")
+    situacao = models.CharField(max_length=10, choices=SITUACAO_CHOICES, default='aberta', verbose_name="Situação")
+    # Identifica o achado entre execuções (ex.: "duplicata:12:57", "atipico:3:2024-05"), preservando a situação revisada
+    chave = models.CharField(max_length=100, unique=True, verbose_name="Chave")
+    transacao = models.ForeignKey(Transacao, on_delete=models.CASCADE, null=True, blank=True, related_name='anomalias', verbose_name="Transação")
+    transacao_relacionada = models.ForeignKey(Transacao, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="Transação Relacionada")
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, null=True, blank=True, related_name='anomalias', verbose_name="Categoria")
+    ano = models.PositiveIntegerField(null=True, blank=True, verbose_name="Ano")
+    mes = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Mês")
+    # Similaridade das descrições (duplicatas) ou z-score robusto do mês (atípicos)
+    pontuacao = models.FloatField(verbose_name="Pontuação")
+    detalhes = models.JSONField(default=dict, verbose_name="Detalhes")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Anomalia"
+        verbose_name_plural = "Anomalias"
+        ordering = ['-data_criacao', '-id']
+        indexes = [
+            models.Index(fields=['tipo', 'situacao'], name='anomalia_tipo_situacao_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} ({self.chave})"
+
+
+# Estado das execuções incrementais da detecção: até qual sequência do log de alterações já foi analisada
+class EstadoDeteccao(models.Model):
+    nome = models.CharField(max_length=50, unique=True, verbose_name="Nome")
+    ultima_sequencia = models.BigIntegerField(default=0, verbose_name="Última Sequência Analisada")
+    data_execucao = models.DateTimeField(auto_now=True, verbose_name="Última Execução")
+
+    class Meta:
+        verbose_name = "Estado da Detecção"
+        verbose_name_plural = "Estados da Detecção"
+
+    def __str__(self):
+        return f"{self.nome}: #{self.ultima_sequencia}"
+
+
+# Log de alterações (auditoria e feed incremental em /api/changes/), somente inclusão
+class RegistroAlteracao(models.Model):
+    OPERACAO_CHOICES = [
+        ('criacao', 'Criação'),
+        ('alteracao', 'Alteração'),
+        ('exclusao', 'Exclusão'),
+    ]
+
+    # Reservada em SequenciaAlteracao: crescente na ordem de commit e sem buracos
+    sequencia = models.BigIntegerField(primary_key=True, verbose_name="Sequência")
+    modelo = models.CharField(max_length=50, verbose_name="Modelo")
+    objeto_id = models.BigIntegerField(verbose_name="ID do Objeto")
+    operacao = models.CharField(max_length=10, choices=OPERACAO_CHOICES, verbose_name="Operação")
+    # Estado da linha depois da alteração (na exclusão, o último estado antes dela)
+    dados = models.JSONField(default=dict, verbose_name="Dados")
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Usuário")
+    origem = models.CharField(max_length=255, blank=True, verbose_name="Origem") # Ex.: "PATCH /api/transacoes/1/", "tarefa categorizacao.aplicar"
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data")
+
+    class Meta:
+        verbose_name = "Registro de Alteração"
+        verbose_name_plural = "Registros de Alterações"
+        ordering = ['sequencia']
+        indexes = [
+            models.Index(fields=['modelo', 'objeto_id', 'sequencia'], name='alteracao_objeto_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.sequencia} {self.operacao} {self.modelo} {self.objeto_id}"
+
+
+# Contador (linha única) que gera as sequências do log de alterações
+class SequenciaAlteracao(models.Model):
+    ultima = models.BigIntegerField(default=0, verbose_name="Última Sequência")
+
+    class Meta:
+        verbose_name = "Sequência de Alterações"
+
+
+# Resumo imutável de um mês já encerrado (ver core/resumos.py)
+class ResumoMensal(models.Model):
+    ano = models.PositiveIntegerField(verbose_name="Ano")
+    mes = models.PositiveSmallIntegerField(verbose_name="Mês")
+    receitas = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total de Receitas")
+    despesas = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total de Despesas")
+    # {nome da categoria: total de despesas no mês (str)}
+    despesas_por_categoria = models.JSONField(default=dict, verbose_name="Despesas por Categoria")
+    checksum = models.CharField(max_length=64, verbose_name="Checksum")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+
+    class Meta:
+        verbose_name = "Resumo Mensal"
+        verbose_name_plural = "Resumos Mensais"
+        unique_together = ('ano', 'mes')
+        ordering = ['ano', 'mes']
+
+    def __str__(self):
+        return f"Resumo {self.mes:02d}/{self.ano}"
+
+
+# Fila de tarefas em segundo plano (broker local no próprio banco de dados)
+class Tarefa(models.Model):
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluida', 'Concluída'),
+        ('falhou', 'Falhou'),
+    ]
+
+    nome = models.CharField(max_length=100, verbose_name="Nome da Tarefa")
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parâmetros")
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pendente', verbose_name="Status")
+    tentativas = models.PositiveIntegerField(default=0, verbose_name="Tentativas")
+    max_tentativas = models.PositiveIntegerField(default=3, verbose_name="Máximo de Tentativas")
+    executar_apos = models.DateTimeField(default=timezone.now, verbose_name="Executar Após")
+    resultado = models.JSONField(null=True, blank=True, verbose_name="Resultado")
+    erro = models.TextField(blank=True, verbose_name="Último Erro")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    data_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Início da Execução")
+    data_conclusao = models.DateTimeField(null=True, blank=True, verbose_name="Fim da Execução")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        ordering = ['-data_criacao']
+        indexes = [
+            # Caminho usado pelos workers para reservar a próxima tarefa
+            models.Index(fields=['status', 'nome', 'executar_apos'], name='tarefa_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nome} #{self.pk} ({self.get_status_display()})"
+
+
+# Regras de categorização automática de transações
+class RegraCategorizacao(models.Model):
+    nome = models.CharField(max_length=100, verbose_name="Nome da Regra")
+    padrao_descricao = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Padrão da Descrição",
+        help_text="Expressão regular (sem diferenciar maiúsculas/minúsculas) buscada na descrição."
+    )
+    valor_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Valor Mínimo")
+    valor_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Valor Máximo")
+    tipo = models.CharField(
+        max_length=10,
+        choices=Transacao.TIPO_CHOICES,
+        blank=True,
+        verbose_name="Tipo",
+        help_text="Deixe em branco para aplicar a receitas e despesas."
+    )
+    categoria = models.ForeignKey(
+        Categoria,
+        on_delete=models.CASCADE,
+        related_name='regras',
+        verbose_name="Categoria"
+    )
+    prioridade = models.PositiveIntegerField(default=100, verbose_name="Prioridade", help_text="Menor número = maior prioridade.")
+    ativa = models.BooleanField(default=True, verbose_name="Ativa")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Regra de Categorização"
+        verbose_name_plural = "Regras de Categorização"
+        ordering = ['prioridade', 'id']
+
+    def __str__(self):
+        return f"{self.nome} -> {self.categoria.nome}"
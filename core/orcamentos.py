@@ -0,0 +1,128 @@
+# financas_pessoais/core/orcamentos.py
+
+import calendar
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, FilteredRelation, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .models import Transacao, Orcamento, GastoMensal
+from .cambio import converter, formatar, valor_convertido
+from .dinheiro import para_centavos, de_centavos
+
+# O gasto de cada categoria por mês fica num contador (GastoMensal) atualizado a cada escrita
+# de transação com UPDATE ... SET total_centavos = total_centavos + delta. O status dos
+# orçamentos lê esses contadores em vez de somar as transações do mês.
+
+
+def contribuicao(categoria_id, tipo, valor, moeda, data):
+    """((categoria, ano, mês), centavos na moeda de relatório) com que uma transação entra no contador, ou None."""
+    if tipo != 'despesa' or categoria_id is None or valor is None or data is None:
+        return None
+    convertido = converter(valor, moeda, data)
+    if convertido is None: # Moeda sem cotação: fica fora das somas, como em soma()
+        return None
+    return (categoria_id, data.year, data.month), para_centavos(convertido)
+
+
+def incrementar(chave, centavos):
+    categoria_id, ano, mes = chave
+    contadores = GastoMensal.objects.filter(categoria_id=categoria_id, ano=ano, mes=mes)
+    if contadores.update(total_centavos=F('total_centavos') + centavos):
+        return
+    try:
+        with transaction.atomic():
+            GastoMensal.objects.create(categoria_id=categoria_id, ano=ano, mes=mes, total_centavos=centavos)
+    except IntegrityError:
+        # Outra escrita criou o contador ao mesmo tempo
+        contadores.update(total_centavos=F('total_centavos') + centavos)
+
+
+def aplicar_diferenca(antes, depois):
+    """Aplica a troca de contribuição de uma transação (antes/depois podem ser None)."""
+    deltas = {}
+    if antes:
+        deltas[antes[0]] = deltas.get(antes[0], 0) - antes[1]
+    if depois:
+        deltas[depois[0]] = deltas.get(depois[0], 0) + depois[1]
+    for chave, centavos in deltas.items():
+        if centavos:
+            incrementar(chave, centavos)
+
+
+def recalcular_gastos(anos=None):
+    """
+    Refaz os contadores a partir das transações (um único SELECT agrupado).
+    Usado depois de alterações em lote, que não disparam sinais, e de mudanças nas cotações.
+    """
+    despesas = Transacao.objects.filter(tipo='despesa', categoria__isnull=False)
+    contadores = GastoMensal.objects.all()
+    if anos is not None:
+        despesas = despesas.filter(data_transacao__year__in=anos)
+        contadores = contadores.filter(ano__in=anos)
+    totais = (
+        despesas
+        .annotate(ano=ExtractYear('data_transacao'), mes=ExtractMonth('data_transacao'))
+        .values('categoria_id', 'ano', 'mes')
+        .annotate(total=Sum(valor_convertido('valor_centavos', centavos=True)))
+        .order_by()
+    )
+    with transaction.atomic():
+        contadores.delete()
+        GastoMensal.objects.bulk_create(
+            [GastoMensal(categoria_id=item['categoria_id'], ano=item['ano'], mes=item['mes'], total_centavos=item['total']) for item in totais],
+            batch_size=1000,
+        )
+
+
+def status_orcamentos(ano, mes):
+    """Utilização de todos os orçamentos ativos no mês, com alertas; lê os contadores numa única consulta."""
+    orcamentos = (
+        Orcamento.objects
+        .filter(ativo=True)
+        .annotate(gasto_mes=FilteredRelation(
+            'categoria__gastos_mensais',
+            condition=Q(categoria__gastos_mensais__ano=ano, categoria__gastos_mensais__mes=mes),
+        ))
+        .values('id', 'categoria_id', 'categoria__nome', 'valor_limite', 'limiar_alerta', gasto_centavos=F('gasto_mes__total_centavos'))
+        .order_by('categoria__nome')
+    )
+
+    hoje = timezone.now().date()
+    dias_no_mes = calendar.monthrange(ano, mes)[1]
+    mes_corrente = (ano, mes) == (hoje.year, hoje.month)
+
+    itens, alertas = [], []
+    for orcamento in orcamentos:
+        gasto = de_centavos(orcamento['gasto_centavos'] or 0)
+        limite = orcamento['valor_limite']
+        utilizacao = (gasto / limite * 100) if limite > 0 else Decimal(0)
+        # No mês corrente, projeta o gasto até o fim do mês no ritmo atual
+        projecao = gasto / hoje.day * dias_no_mes if mes_corrente else gasto
+        nome = orcamento['categoria__nome']
+
+        if gasto > limite:
+            situacao = 'estourado'
+            alertas.append({'type': 'danger', 'message': f"Orçamento de {nome} estourado: {formatar(gasto)} de {formatar(limite)} ({utilizacao:.0f}%)."})
+        elif utilizacao >= orcamento['limiar_alerta']:
+            situacao = 'alerta'
+            alertas.append({'type': 'warning', 'message': f"Você já usou {utilizacao:.0f}% do orçamento de {nome} ({formatar(gasto)} de {formatar(limite)})."})
+        else:
+            situacao = 'ok'
+        if mes_corrente and situacao != 'estourado' and projecao > limite:
+            alertas.append({'type': 'info', 'message': f"No ritmo atual, {nome} deve fechar o mês em {formatar(projecao)}, acima do orçamento de {formatar(limite)}."})
+
+        itens.append({
+            'orcamento': orcamento['id'],
+            'categoria': orcamento['categoria_id'],
+            'categoria_nome': nome,
+            'valor_limite': limite,
+            'gasto': gasto,
+            'disponivel': limite - gasto,
+            'utilizacao_porcentagem': utilizacao.quantize(Decimal('0.01')),
+            'projecao_fim_mes': projecao.quantize(Decimal('0.01')),
+            'situacao': situacao,
+        })
+    return {'ano': ano, 'mes': mes, 'orcamentos': itens, 'alertas': alertas}
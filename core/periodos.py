@@ -0,0 +1,111 @@
+# financas_pessoais/core/periodos.py
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import PeriodoIndice, Transacao
+
+# Índice de calendário: quantas transações de cada tipo existem em cada ano/mês (PeriodoIndice).
+# Os sinais somam/subtraem 1 a cada inclusão, exclusão ou mudança de data/tipo, então as listas
+# de anos e meses disponíveis (filtros do frontend) custam O(períodos) em vez de varrer as transações.
+
+
+def chave(data, tipo):
+    """(ano, mês, tipo) de uma transação, ou None se algum dado não estiver carregado."""
+    if data is None or tipo is None:
+        return None
+    return data.year, data.month, tipo
+
+
+def ajustar(chave_periodo, quantidade):
+    ano, mes, tipo = chave_periodo
+    contadores = PeriodoIndice.objects.filter(ano=ano, mes=mes, tipo=tipo)
+    if contadores.update(quantidade=F('quantidade') + quantidade):
+        return
+    try:
+        with transaction.atomic():
+            PeriodoIndice.objects.create(ano=ano, mes=mes, tipo=tipo, quantidade=quantidade)
+    except IntegrityError:
+        # Outra escrita criou o período ao mesmo tempo
+        contadores.update(quantidade=F('quantidade') + quantidade)
+
+
+def aplicar_diferenca(antes, depois):
+    """Move a transação de um período para outro (antes/depois podem ser None)."""
+    if antes == depois:
+        return
+    if antes:
+        ajustar(antes, -1)
+    if depois:
+        ajustar(depois, 1)
+
+
+def contar(transacoes, quantidade):
+    """Soma `quantidade` aos períodos de várias transações de uma vez (um UPDATE por período)."""
+    por_periodo = Counter(chave(transacao.data_transacao, transacao.tipo) for transacao in transacoes)
+    por_periodo.pop(None, None)
+    for chave_periodo, total in por_periodo.items():
+        ajustar(chave_periodo, total * quantidade)
+
+
+def totais(transacoes):
+    """Counter {(ano, mês, tipo): quantidade} das transações, num único SELECT agrupado."""
+    agrupadas = (
+        transacoes
+        .annotate(ano=ExtractYear('data_transacao'), mes=ExtractMonth('data_transacao'))
+        .values_list('ano', 'mes', 'tipo')
+        .annotate(quantidade=Count('id'))
+        .order_by()
+    )
+    return Counter({(ano, mes, tipo): quantidade for ano, mes, tipo, quantidade in agrupadas})
+
+
+def mover(antes, depois):
+    """Aplica a diferença entre dois totais() das mesmas transações (ex.: antes e depois de um UPDATE em lote)."""
+    for chave_periodo in antes.keys() | depois.keys():
+        diferenca = depois[chave_periodo] - antes[chave_periodo]
+        if diferenca:
+            ajustar(chave_periodo, diferenca)
+
+
+def recalcular():
+    """Refaz o índice a partir das transações (um único SELECT agrupado)."""
+    with transaction.atomic():
+        PeriodoIndice.objects.all().delete()
+        PeriodoIndice.objects.bulk_create(
+            [PeriodoIndice(ano=ano, mes=mes, tipo=tipo, quantidade=quantidade)
+             for (ano, mes, tipo), quantidade in totais(Transacao.objects.all()).items()],
+            batch_size=1000,
+        )
+
+
+def periodos_com_dados(ano=None, tipo=None):
+    periodos = PeriodoIndice.objects.filter(quantidade__gt=0)
+    if ano is not None:
+        periodos = periodos.filter(ano=ano)
+    if tipo is not None:
+        periodos = periodos.filter(tipo=tipo)
+    return periodos
+
+
+def anos_disponiveis(tipo=None):
+    """Anos com transações, do mais recente para o mais antigo."""
+    return list(periodos_com_dados(tipo=tipo).values_list('ano', flat=True).distinct().order_by('-ano'))
+
+
+def meses_disponiveis(ano, tipo=None):
+    """Meses do ano com transações, em ordem."""
+    return list(periodos_com_dados(ano, tipo).values_list('mes', flat=True).distinct().order_by('mes'))
+
+
+def listar(ano=None, tipo=None):
+    """[{ano, mes, quantidade, por_tipo: {tipo: quantidade}}] do mais recente para o mais antigo."""
+    resultado = {}
+    for item in periodos_com_dados(ano, tipo).order_by('-ano', '-mes', 'tipo').values('ano', 'mes', 'tipo', 'quantidade'):
+        periodo = resultado.setdefault((item['ano'], item['mes']), {'ano': item['ano'], 'mes': item['mes'], 'quantidade': 0, 'por_tipo': {}})
+        periodo['quantidade'] += item['quantidade']
+        periodo['por_tipo'][item['tipo']] = item['quantidade']
+    return list(resultado.values())
@@ -0,0 +1,24 @@
+# financas_pessoais/core/processos.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Pools de processos dos trabalhos em lote (relatórios e detecção de anomalias). Eles rodam dentro
+# do processar_tarefas, que tem várias threads e conexões abertas: um fork copiaria travas seguras
+# por outras threads (deadlock no filho) e os sockets das conexões. Os processos do pool nascem por
+# forkserver (ou spawn), sem nada herdado, e configuram o Django no inicializador.
+# Este módulo não importa modelos: ele é importado nos filhos antes do django.setup().
+
+
+def _inicializar():
+    import django
+    from django.db import connections
+    django.setup()
+    # Nenhuma conexão vem do processo pai; cada tarefa abre a sua quando precisar
+    connections.close_all()
+
+
+def criar_pool(processos):
+    """ProcessPoolExecutor com `processos` processos iniciados sem fork."""
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context(metodo), initializer=_inicializar)
@@ -0,0 +1,249 @@
+# financas_pessoais/core/relatorios.py
+
+from datetime import date
+from decimal import Decimal
+from itertools import repeat
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.functions import ExtractMonth
+from django.utils import timezone
+
+from .cambio import formatar, moeda_relatorio
+from .dinheiro import para_decimal, soma
+from .insights import obter_insights
+from .models import MetaFinanceira, Transacao
+
+# Relatório anual (extrato do ano) em XLSX ou PDF.
+# Cada seção vem de uma única consulta agregada e é independente das outras, então as seções
+# (ou, em lote, os relatórios inteiros) podem ser montadas em paralelo em um pool de processos.
+# As seções devolvem apenas dados simples ({'titulo', 'colunas', 'linhas'}), que atravessam o pool;
+# valores monetários são Decimal (na moeda de relatório) e percentuais são float.
+
+SECOES = {}
+FORMATOS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+MESES = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+
+def secao(nome):
+    """Registra uma seção do relatório: função(ano) -> {'titulo', 'colunas', 'linhas'}."""
+    def decorator(funcao):
+        SECOES[nome] = funcao
+        return funcao
+    return decorator
+
+
+@secao('saldo_mensal')
+def secao_saldo_mensal(ano):
+    totais = {
+        item['mes']: item
+        for item in Transacao.objects.filter(data_transacao__year=ano)
+        .annotate(mes=ExtractMonth('data_transacao'))
+        .values('mes')
+        .annotate(receitas=soma(filter=Q(tipo='receita')), despesas=soma(filter=Q(tipo='despesa')))
+    }
+    linhas = []
+    for mes in range(1, 13):
+        receitas = para_decimal(totais.get(mes, {}).get('receitas'))
+        despesas = para_decimal(totais.get(mes, {}).get('despesas'))
+        linhas.append([MESES[mes - 1], receitas, despesas, receitas - despesas])
+    linhas.append(['Total', sum(l[1] for l in linhas), sum(l[2] for l in linhas), sum(l[3] for l in linhas)])
+    return {'titulo': 'Saldo mensal', 'colunas': ['Mês', 'Receitas', 'Despesas', 'Saldo'], 'linhas': linhas}
+
+
+@secao('categorias')
+def secao_categorias(ano):
+    agrupado = (
+        Transacao.objects.filter(data_transacao__year=ano)
+        .values('tipo', 'categoria_nome')
+        .annotate(total=soma())
+        .order_by('tipo', 'categoria_nome')
+    )
+    linhas = [[item['tipo'].capitalize(), item['categoria_nome'] or 'Sem Categoria', para_decimal(item['total'])] for item in agrupado]
+    totais_por_tipo = {}
+    for linha in linhas:
+        totais_por_tipo[linha[0]] = totais_por_tipo.get(linha[0], Decimal('0.00')) + linha[2]
+    for linha in linhas:
+        total_tipo = totais_por_tipo[linha[0]]
+        linha.append(round(float(linha[2] / total_tipo * 100), 1) if total_tipo else 0.0)
+    return {'titulo': 'Por categoria', 'colunas': ['Tipo', 'Categoria', 'Total', '% do tipo'], 'linhas': linhas}
+
+
+@secao('metas')
+def secao_metas(ano):
+    # Metas vigentes em algum momento do ano
+    metas = MetaFinanceira.objects.filter(data_inicio__lte=date(ano, 12, 31), data_limite__gte=date(ano, 1, 1)).only(
+        'nome', 'tipo', 'valor_alvo', 'valor_atingido', 'data_limite', 'concluida'
+    )
+    linhas = [
+        [meta.nome, meta.get_tipo_display(), meta.valor_alvo, meta.valor_atingido,
+         round(float(meta.progresso_porcentagem), 1), meta.data_limite, 'Sim' if meta.concluida else 'Não']
+        for meta in metas
+    ]
+    return {
+        'titulo': 'Metas financeiras',
+        'colunas': ['Meta', 'Tipo', 'Valor alvo', 'Atingido', 'Progresso (%)', 'Data limite', 'Concluída'],
+        'linhas': linhas,
+    }
+
+
+@secao('insights')
+def secao_insights(ano):
+    # Os mesmos alertas e sugestões da ProjecaoFinanceiraView (persistidos em InsightsAno)
+    insights_ano = obter_insights(ano)
+    linhas = [['Alerta', item['message']] for item in insights_ano.alertas]
+    linhas += [['Sugestão', item['message']] for item in insights_ano.sugestoes]
+    linhas.append(['Situação', insights_ano.status_financeiro])
+    return {'titulo': 'Alertas e sugestões', 'colunas': ['Tipo', 'Mensagem'], 'linhas': linhas}
+
+
+def _pool(processos):
+    """
+    Pool de processos (None se estivermos dentro de uma transação, que os processos do pool não
+    enxergariam). Os processos nascem sem fork (core/processos.py) e cada um abre a sua conexão.
+    """
+    if processos <= 1 or connection.in_atomic_block:
+        return None
+    from .processos import criar_pool # Só os lotes usam o pool; o web worker não paga a importação
+    return criar_pool(processos)
+
+
+def _gerar_secao(nome, ano):
+    try:
+        return SECOES[nome](ano)
+    finally:
+        connections.close_all() # Processo do pool: encerra a conexão em vez de deixá-la órfã
+
+
+def montar_relatorio(ano, processos=1):
+    """Dados do relatório anual, com as seções montadas em paralelo quando processos > 1."""
+    pool = _pool(min(processos, len(SECOES)))
+    if pool is None:
+        secoes = [funcao(ano) for funcao in SECOES.values()]
+    else:
+        with pool:
+            secoes = list(pool.map(_gerar_secao, SECOES, repeat(ano)))
+    return {'ano': ano, 'moeda': moeda_relatorio(), 'gerado_em': timezone.localtime(), 'secoes': secoes}
+
+
+# --- Formatos de saída (openpyxl e reportlab são carregados só quando usados) ---
+
+def escrever_xlsx(relatorio, destino):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    # write_only: as linhas vão direto para o arquivo, sem manter a planilha inteira em memória
+    planilha = Workbook(write_only=True)
+    negrito = Font(bold=True)
+    for dados in relatorio['secoes']:
+        aba = planilha.create_sheet(dados['titulo'][:31])
+        aba.column_dimensions['A'].width = 24
+        aba.column_dimensions['B'].width = 40 if dados['colunas'][-1] == 'Mensagem' else 24
+        cabecalho = []
+        for coluna in dados['colunas']:
+            celula = WriteOnlyCell(aba, value=coluna)
+            celula.font = negrito
+            cabecalho.append(celula)
+        aba.append(cabecalho)
+        for linha in dados['linhas']:
+            aba.append(linha)
+    planilha.save(destino)
+
+
+def escrever_pdf(relatorio, destino):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    estilos = getSampleStyleSheet()
+    moeda = relatorio['moeda']
+
+    def texto(valor):
+        if isinstance(valor, Decimal):
+            return formatar(valor, moeda)
+        if isinstance(valor, date):
+            return valor.strftime('%d/%m/%Y')
+        return Paragraph(str(valor), estilos['BodyText']) if isinstance(valor, str) and len(valor) > 40 else str(valor)
+
+    conteudo = [
+        Paragraph(f"Relatório anual {relatorio['ano']}", estilos['Title']),
+        Paragraph(f"Gerado em {relatorio['gerado_em']:%d/%m/%Y %H:%M} | Valores em {moeda}", estilos['Normal']),
+    ]
+    for dados in relatorio['secoes']:
+        conteudo += [Spacer(1, 12), Paragraph(dados['titulo'], estilos['Heading2'])]
+        tabela = Table(
+            [dados['colunas']] + [[texto(valor) for valor in linha] for linha in dados['linhas']],
+            repeatRows=1,
+        )
+        tabela.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]))
+        conteudo.append(tabela)
+    SimpleDocTemplate(destino, pagesize=A4, title=f"Relatório anual {relatorio['ano']}").build(conteudo)
+
+
+ESCRITORES = {'xlsx': escrever_xlsx, 'pdf': escrever_pdf}
+
+
+def gerar_arquivo(ano, formato, processos=1):
+    """Gera o relatório em um arquivo temporário (apagado ao ser fechado), posicionado no início."""
+    import tempfile
+    arquivo = tempfile.TemporaryFile()
+    ESCRITORES[formato](montar_relatorio(ano, processos), arquivo)
+    arquivo.seek(0)
+    return arquivo
+
+
+def nome_arquivo(ano, formato):
+    return f"relatorio_anual_{ano}.{formato}"
+
+
+def caminho_armazenado(ano, formato):
+    return f"relatorios/{nome_arquivo(ano, formato)}"
+
+
+def armazenar(ano, formato, processos=1):
+    """Gera o relatório e grava no storage padrão (MEDIA_ROOT), substituindo a versão anterior."""
+    caminho = caminho_armazenado(ano, formato)
+    with gerar_arquivo(ano, formato, processos) as arquivo:
+        if default_storage.exists(caminho):
+            default_storage.delete(caminho)
+        return default_storage.save(caminho, File(arquivo, name=nome_arquivo(ano, formato)))
+
+
+def abrir_armazenado(ano, formato):
+    """Arquivo gravado por armazenar() (None se ainda não existir)."""
+    caminho = caminho_armazenado(ano, formato)
+    return default_storage.open(caminho) if default_storage.exists(caminho) else None
+
+
+def _armazenar_no_pool(ano, formato):
+    try:
+        return armazenar(ano, formato)
+    finally:
+        connections.close_all()
+
+
+def armazenar_varios(anos, formatos, processos=1):
+    """
+    Gera vários relatórios (ex.: fechamento do ano). Com vários relatórios o paralelismo é por
+    relatório inteiro (consultas e escrita do arquivo), o que ocupa todos os processos; com um só,
+    é por seção.
+    """
+    pedidos = [(ano, formato) for ano in anos for formato in formatos]
+    pool = _pool(min(processos, len(pedidos))) if len(pedidos) > 1 else None
+    if pool is None:
+        return [armazenar(ano, formato, processos) for ano, formato in pedidos]
+    with pool:
+        return list(pool.map(_armazenar_no_pool, *zip(*pedidos)))
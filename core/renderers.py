@@ -0,0 +1,43 @@
+# financas_pessoais/core/renderers.py
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError: # msgpack é opcional; as classes abaixo só são registradas se ele estiver instalado
+    msgpack = None
+
+# Converte Decimal, datas etc. exatamente como a resposta JSON faria
+_codificador_json = JSONEncoder()
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderiza a resposta como MessagePack (Accept: application/msgpack ou ?format=msgpack)."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_codificador_json.default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """Aceita corpos de requisição em MessagePack (Content-Type: application/msgpack)."""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as erro:
+            raise ParseError(f"MessagePack inválido: {erro}")
+
+
+def para_colunar(linhas, campos):
+    """Lista de dicts -> {'campos': [...], 'linhas': [[...], ...]} (formato colunar da API)."""
+    return {'campos': campos, 'linhas': [[linha.get(campo) for campo in campos] for linha in linhas]}
@@ -0,0 +1,158 @@
+# financas_pessoais/core/resumos.py
+
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import ExtractMonth
+from django.utils import timezone
+
+from .models import Transacao, ResumoMensal, SequenciaAlteracao
+from .dinheiro import soma, para_decimal
+from .cambio import moeda_relatorio
+
+# Meses encerrados praticamente não mudam, então seus totais ficam gravados em ResumoMensal
+# (um registro por mês, com checksum do conteúdo). As comparações com o ano anterior leem
+# esses resumos em vez de reagregar as transações. Um resumo só é apagado quando uma
+# transação daquele mês é criada, alterada ou excluída (lançamento retroativo).
+#
+# Corrida leitor x escritor: o leitor agrega sem ver um lançamento retroativo ainda não confirmado
+# e gravaria um resumo velho depois de o escritor já ter apagado o dele. Por isso o leitor anota a
+# sequência do log de alterações (core/auditoria.py, incrementada por toda escrita em transações)
+# antes de agregar e só grava se ela não mudou, conferindo com a linha do contador travada; e o
+# escritor apaga os resumos de novo depois do commit.
+
+
+def _versao(travar=False):
+    contador = SequenciaAlteracao.objects.filter(pk=1)
+    if travar:
+        contador = contador.select_for_update()
+    return contador.values_list('ultima', flat=True).first() or 0
+
+
+def mes_fechado(ano, mes):
+    hoje = timezone.now().date()
+    return (ano, mes) < (hoje.year, hoje.month)
+
+
+def ano_fechado(ano):
+    return ano < timezone.now().date().year
+
+
+def calcular_checksum(receitas, despesas, despesas_por_categoria):
+    # Totais com 2 casas fixas: o banco pode devolver o Decimal com outro expoente (ex.: 10.5 -> 10.50).
+    # A moeda de relatório entra no checksum: se MOEDA_RELATORIO mudar, os resumos antigos são refeitos.
+    conteudo = json.dumps([moeda_relatorio(), f'{receitas:.2f}', f'{despesas:.2f}', despesas_por_categoria], sort_keys=True)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def resumo_valido(resumo):
+    """Confere o checksum: um resumo corrompido/alterado manualmente é descartado e recalculado."""
+    return resumo.checksum == calcular_checksum(resumo.receitas, resumo.despesas, resumo.despesas_por_categoria)
+
+
+def _gerar_resumos(ano, meses):
+    """
+    Agrega as transações dos meses informados numa única consulta e grava um resumo por mês,
+    a não ser que alguma transação tenha sido alterada durante a agregação.
+    """
+    versao = _versao()
+    totais = (
+        Transacao.objects
+        .filter(data_transacao__year=ano)
+        .annotate(month=ExtractMonth('data_transacao'))
+        .filter(month__in=meses)
+        .values('month', 'tipo', 'categoria_nome')
+        .annotate(total=soma())
+        .order_by()
+    )
+    dados = {mes: {'receitas': 0, 'despesas': 0, 'categorias': {}} for mes in meses}
+    for item in totais:
+        mes = dados[item['month']]
+        if item['tipo'] == 'receita':
+            mes['receitas'] += item['total']
+        elif item['tipo'] == 'despesa':
+            mes['despesas'] += item['total']
+            cat_name = item['categoria_nome'] or 'Sem Categoria'
+            mes['categorias'][cat_name] = mes['categorias'].get(cat_name, 0) + item['total']
+
+    resumos = []
+    for mes, valores in dados.items():
+        receitas = para_decimal(valores['receitas'])
+        despesas = para_decimal(valores['despesas'])
+        por_categoria = {cat_name: str(para_decimal(total)) for cat_name, total in valores['categorias'].items()}
+        resumos.append(ResumoMensal(
+            ano=ano, mes=mes, receitas=receitas, despesas=despesas, despesas_por_categoria=por_categoria,
+            checksum=calcular_checksum(receitas, despesas, por_categoria),
+        ))
+    try:
+        with transaction.atomic():
+            # A trava espera o commit de um escritor em andamento, que então muda a versão
+            if _versao(travar=True) == versao:
+                ResumoMensal.objects.bulk_create(resumos)
+    except IntegrityError:
+        # Outro processo gravou os mesmos meses ao mesmo tempo; os valores são equivalentes
+        pass
+    return resumos
+
+
+def resumos_do_ano(ano):
+    """Resumos dos meses encerrados do ano, gerando (uma única vez) os que ainda não existem."""
+    meses_fechados = [mes for mes in range(1, 13) if mes_fechado(ano, mes)]
+    existentes = {}
+    invalidos = []
+    for resumo in ResumoMensal.objects.filter(ano=ano, mes__in=meses_fechados):
+        if resumo_valido(resumo):
+            existentes[resumo.mes] = resumo
+        else:
+            invalidos.append(resumo.pk)
+    if invalidos:
+        ResumoMensal.objects.filter(pk__in=invalidos).delete()
+
+    faltantes = [mes for mes in meses_fechados if mes not in existentes]
+    if faltantes:
+        existentes.update({resumo.mes: resumo for resumo in _gerar_resumos(ano, faltantes)})
+    return [existentes[mes] for mes in sorted(existentes)]
+
+
+def medias_mensais_por_categoria_do_ano(ano):
+    """
+    Mesmo resultado de insights.medias_mensais_por_categoria() para as despesas de um ano
+    encerrado ({categoria: (total, meses_com_gasto)}), lido dos resumos mensais.
+    """
+    resultado = {}
+    for resumo in resumos_do_ano(ano):
+        for cat_name, total in resumo.despesas_por_categoria.items():
+            acumulado, meses = resultado.get(cat_name, (Decimal('0.00'), 0))
+            resultado[cat_name] = (acumulado + Decimal(total), meses + 1)
+    return resultado
+
+
+def _apagar(filtro):
+    ResumoMensal.objects.filter(filtro).delete()
+    # De novo depois do commit: um leitor pode ter gravado o resumo antes de ver esta escrita
+    transaction.on_commit(lambda: ResumoMensal.objects.filter(filtro).delete(), robust=True)
+
+
+def invalidar(*datas):
+    """Apaga os resumos dos meses das datas informadas (lançamentos retroativos)."""
+    meses = {(data.year, data.month) for data in datas if data and mes_fechado(data.year, data.month)}
+    if meses:
+        filtro = Q()
+        for ano, mes in meses:
+            filtro |= Q(ano=ano, mes=mes)
+        _apagar(filtro)
+
+
+def invalidar_todos():
+    """Apaga todos os resumos (ex.: cotações alteradas mudam os totais convertidos de qualquer mês)."""
+    _apagar(Q())
+
+
+def invalidar_anos(*anos):
+    """Apaga os resumos dos anos informados (usado pelas alterações em lote, que não disparam sinais)."""
+    anos = [ano for ano in anos if ano <= timezone.now().date().year]
+    if anos:
+        _apagar(Q(ano__in=anos))
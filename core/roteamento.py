@@ -0,0 +1,67 @@
+# financas_pessoais/core/roteamento.py
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+# Estado do roteamento durante a requisição atual
+_leitura_em_replica = ContextVar('leitura_em_replica', default=False)
+_primario_fixado = ContextVar('primario_fixado', default=False)
+
+
+class ReplicaRouter:
+    """
+    Envia as leituras das views marcadas com LeituraEmReplicaMixin para uma das réplicas
+    configuradas em DATABASE_REPLICA_URLS. Todo o resto (escritas, leituras fora dessas views,
+    leituras depois de uma escrita na mesma requisição ou dentro de transação) fica no primário.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICAS_LEITURA
+        if not replicas or not _leitura_em_replica.get() or _primario_fixado.get():
+            return None
+        if connections['default'].in_atomic_block:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Depois de uma escrita, as leituras seguintes da requisição precisam enxergá-la
+        _primario_fixado.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplicas têm os mesmos dados
+        return True
+
+
+class LeituraEmReplicaMixin:
+    """
+    Mixin para APIViews/ViewSets: requisições GET (e, nos ViewSets, apenas as ações em
+    `acoes_em_replica`) passam a ler das réplicas.
+    """
+    acoes_em_replica = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        acao = getattr(self, 'action', None)
+        if request.method in SAFE_METHODS and (acao is None or acao in self.acoes_em_replica):
+            _leitura_em_replica.set(True)
+
+
+class RoteamentoBancoMiddleware:
+    """Zera o estado de roteamento a cada requisição (as escritas fixam o primário só até o fim dela)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token_replica = _leitura_em_replica.set(False)
+        token_primario = _primario_fixado.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _leitura_em_replica.reset(token_replica)
+            _primario_fixado.reset(token_primario)
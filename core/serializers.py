@@ -1,33 +1,164 @@
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
-from .models import Categoria, Transacao, MetaFinanceira # <<< Importar MetaFinanceira
+from rest_framework.permissions import SAFE_METHODS
+from .categorizacao import validar_padrao
+from .cambio import converter, moeda_suportada
+from .models import Categoria, Transacao, MetaFinanceira, InsightsAno, Tarefa, RegraCategorizacao, Orcamento, RegistroAlteracao, Anomalia # <<< Importar MetaFinanceira
+
+def campos_pedidos(request):
+    """Conjunto de campos de ?fields=a,b,c em requisições de leitura (None = todos)."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    pedidos = {nome.strip() for nome in request.query_params.get('fields', '').split(',') if nome.strip()}
+    return pedidos or None
+
+
+class CamposEsparsosMixin:
+    """
+    Serializer que, com ?fields=a,b,c, mantém só os campos pedidos (nomes desconhecidos são ignorados).
+    `campos_dependentes`: colunas do modelo de que cada campo calculado (@property) precisa.
+    """
+    campos_dependentes = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.campos_esparsos = campos_pedidos(self.context.get('request'))
+        if self.campos_esparsos:
+            for nome in set(self.fields) - self.campos_esparsos:
+                self.fields.pop(nome)
+
+    def colunas_necessarias(self):
+        """Colunas a carregar com .only() para os campos mantidos, ou None se todos foram pedidos."""
+        if not self.campos_esparsos:
+            return None
+        modelo = self.Meta.model
+        colunas = set()
+        for nome, campo in self.fields.items():
+            if nome in self.campos_dependentes:
+                colunas.update(self.campos_dependentes[nome])
+                continue
+            try:
+                colunas.add(modelo._meta.get_field(campo.source.split('.')[0]).name)
+            except FieldDoesNotExist:
+                pass
+        return colunas
+
 
 # Serializer para o modelo Categoria
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaSerializer(CamposEsparsosMixin, serializers.ModelSerializer):
     class Meta:
         model = Categoria
         fields = '__all__' # Inclui todos os campos do modelo Categoria
 
 # Serializer para o modelo Transacao
-class TransacaoSerializer(serializers.ModelSerializer):
-    # O campo 'categoria' agora exibirá o nome da categoria, não apenas o ID
-    # Isso é útil para visualização no frontend
-    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
+class TransacaoSerializer(CamposEsparsosMixin, serializers.ModelSerializer):
+    # 'categoria_nome' e 'categoria_tipo' são colunas desnormalizadas do próprio modelo (somente leitura),
+    # então o nome da categoria sai na resposta sem consultar Categoria para cada linha.
+    # Valor convertido para a moeda de relatório (cotações em cache, sem consulta por linha)
+    valor_relatorio = serializers.SerializerMethodField()
+    campos_dependentes = {'valor_relatorio': ['valor', 'moeda', 'data_transacao']}
 
     class Meta:
         model = Transacao
-        fields = '__all__' # Inclui todos os campos do modelo Transacao
+        exclude = ['valor_centavos'] # Todos os campos do modelo, exceto o espelho interno em centavos
         # Se quiser incluir o nome da categoria na resposta da API,
         # adicione 'categoria_nome' aqui junto com os outros campos.
         # Ex: fields = ['id', 'descricao', 'valor', 'data_transacao', 'tipo', 'status', 'categoria', 'categoria_nome', 'data_criacao', 'data_atualizacao']
         # Por enquanto, '__all__' já incluirá 'categoria_nome' se ele for um campo declarado acima.
+
+    def get_valor_relatorio(self, obj):
+        convertido = converter(obj.valor, obj.moeda, obj.data_transacao, exata=False) # Só exibição
+        return None if convertido is None else str(convertido) # Mesmo formato de 'valor'
+
+    def validate_moeda(self, value):
+        value = value.upper()
+        if len(value) != 3 or not value.isalpha():
+            raise serializers.ValidationError("Informe o código ISO 4217 da moeda (ex.: BRL, USD).")
+        if not moeda_suportada(value):
+            raise serializers.ValidationError(f"Não há cotações de {value} carregadas (use carregar_taxas_cambio).")
+        return value
         
         # NOVO SERIALIZER PARA METAS FINANCEIRAS
-class MetaFinanceiraSerializer(serializers.ModelSerializer):
+class MetaFinanceiraSerializer(CamposEsparsosMixin, serializers.ModelSerializer):
     # Campos @property do modelo não são incluídos automaticamente.
     # Adicionamos eles manualmente como read-only.
     progresso_porcentagem = serializers.ReadOnlyField()
     valor_restante = serializers.ReadOnlyField()
+    campos_dependentes = {
+        'progresso_porcentagem': ['valor_alvo', 'valor_atingido'],
+        'valor_restante': ['valor_alvo', 'valor_atingido'],
+    }
 
     class Meta:
         model = MetaFinanceira
-        fields = '__all__' # Inclui todos os campos do modelo, incluindo os @property acima
\ No newline at end of file
+        exclude = ['valor_alvo_centavos', 'valor_atingido_centavos'] # Todos os campos, incluindo os @property acima
+
+# Serializer para os insights persistidos de um ano
+class InsightsAnoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InsightsAno
+        fields = ['ano', 'periodo_inicio', 'periodo_fim', 'status_financeiro', 'alertas', 'sugestoes', 'impressao_digital', 'data_atualizacao']
+
+
+# Serializer para acompanhar o status das tarefas em segundo plano
+class TarefaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tarefa
+        fields = '__all__'
+
+
+# Serializer para as regras de categorização automática
+class RegraCategorizacaoSerializer(serializers.ModelSerializer):
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
+
+    class Meta:
+        model = RegraCategorizacao
+        fields = '__all__'
+
+    def validate_padrao_descricao(self, value):
+        try:
+            validar_padrao(value)
+        except ValueError as erro:
+            raise serializers.ValidationError(str(erro))
+        return value
+
+    def validate(self, attrs):
+        valor_min = attrs.get('valor_min', getattr(self.instance, 'valor_min', None))
+        valor_max = attrs.get('valor_max', getattr(self.instance, 'valor_max', None))
+        if valor_min is not None and valor_max is not None and valor_min > valor_max:
+            raise serializers.ValidationError({'valor_max': "O valor máximo deve ser maior ou igual ao mínimo."})
+        return attrs
+
+
+# Serializer para os orçamentos mensais por categoria
+class OrcamentoSerializer(serializers.ModelSerializer):
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
+
+    class Meta:
+        model = Orcamento
+        fields = '__all__'
+
+    def validate_limiar_alerta(self, value):
+        if not 1 <= value <= 100:
+            raise serializers.ValidationError("O limiar de alerta deve estar entre 1 e 100 (%).")
+        return value
+
+
+# Serializer para o feed de alterações (/api/changes/)
+class RegistroAlteracaoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RegistroAlteracao
+        fields = ['sequencia', 'modelo', 'objeto_id', 'operacao', 'dados', 'usuario', 'origem', 'data_criacao']
+
+
+# Serializer para os achados da detecção de anomalias: só a situação é editável (revisão do usuário)
+class AnomaliaSerializer(serializers.ModelSerializer):
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True, default=None)
+
+    class Meta:
+        model = Anomalia
+        fields = '__all__'
+        read_only_fields = [
+            'tipo', 'chave', 'transacao', 'transacao_relacionada', 'categoria', 'ano', 'mes',
+            'pontuacao', 'detalhes', 'data_criacao', 'data_atualizacao',
+        ]
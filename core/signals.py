@@ -0,0 +1,209 @@
+# financas_pessoais/core/signals.py
+
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Categoria, Transacao, MetaFinanceira, TaxaCambio
+from . import insights, resumos, cambio, orcamentos, auditoria, categorias, periodos
+from .categorizacao import categorizar
+from .dinheiro import para_centavos
+
+
+# Campos cujo valor original os sinais precisam (contadores de orçamentos e índice de períodos)
+CAMPOS_ORIGINAIS = ('data_transacao', 'categoria_id', 'tipo', 'valor', 'moeda')
+
+
+@receiver(post_init, sender=Transacao)
+def guardar_estado_original(sender, instance, **kwargs):
+    # Guarda a data original para saber quais anos foram afetados quando a data da transação muda.
+    # Lê direto do __dict__ para não disparar consulta em campos adiados (.only()/.defer()).
+    instance._data_transacao_original = instance.__dict__.get('data_transacao')
+    instance._categoria_id_original = instance.__dict__.get('categoria_id')
+    # Para desfazer a contribuição antiga no contador de gasto mensal (orçamentos)
+    instance._tipo_original = instance.__dict__.get('tipo')
+    instance._valor_original = instance.__dict__.get('valor')
+    instance._moeda_original = instance.__dict__.get('moeda')
+    instance._campos_adiados = {campo for campo in CAMPOS_ORIGINAIS if campo not in instance.__dict__}
+
+
+def carregar_campos_adiados(instance):
+    """
+    Instância carregada com .only()/.defer(): lê numa única consulta os campos originais que
+    faltam, em vez de refazer contadores e índices inteiros. Os campos ainda não atribuídos
+    também ficam carregados (o save() já decidiu antes quais colunas grava).
+    """
+    if instance._state.adding or not instance._campos_adiados:
+        return
+    valores = Transacao._base_manager.using(instance._state.db).filter(pk=instance.pk).values(*instance._campos_adiados).first()
+    if valores is None:
+        return
+    for campo, valor in valores.items():
+        instance.__dict__.setdefault(campo, valor)
+        setattr(instance, f'_{campo}_original', valor)
+    instance._campos_adiados = set()
+
+
+def contribuicao_original(instance):
+    return orcamentos.contribuicao(
+        instance._categoria_id_original,
+        instance._tipo_original,
+        instance._valor_original,
+        instance._moeda_original,
+        instance._data_transacao_original,
+    )
+
+
+def como_data(valor):
+    """
+    data_transacao como date: o campo aceita texto na atribuição (ex.: create(data_transacao='2024-01-05')),
+    que o Django só converte ao montar o SQL. Texto inválido vira None (o save() falha com a mensagem do campo).
+    """
+    if valor is None or isinstance(valor, date):
+        return valor
+    try:
+        return Transacao._meta.get_field('data_transacao').to_python(valor)
+    except ValidationError:
+        return None
+
+
+@receiver(pre_save, sender=Transacao)
+def carregar_originais_antes_de_salvar(sender, instance, raw=False, **kwargs):
+    carregar_campos_adiados(instance)
+
+
+@receiver(pre_save, sender=Transacao)
+def normalizar_data(sender, instance, raw=False, **kwargs):
+    # Receiver do pre_save logo depois dos originais: os seguintes (e o post_save) usam data_transacao.year/.month
+    data = como_data(instance.data_transacao)
+    if data is not None:
+        instance.data_transacao = data
+    instance._data_transacao_original = como_data(instance._data_transacao_original)
+
+
+@receiver(pre_save, sender=Transacao)
+def categorizar_nova_transacao(sender, instance, raw=False, **kwargs):
+    # Transações novas sem categoria passam pelas regras de categorização automática
+    if instance._state.adding and instance.categoria_id is None and not raw:
+        categorizar([instance])
+
+
+@receiver(pre_save, sender=Transacao)
+def sincronizar_categoria_desnormalizada(sender, instance, raw=False, **kwargs):
+    # Copia nome/tipo da categoria para a transação; só consulta Categoria se a categoria mudou
+    if raw:
+        return
+    if instance.categoria_id is None:
+        instance.categoria_nome = instance.categoria_tipo = None
+    elif instance.categoria_id != instance._categoria_id_original or instance.categoria_nome is None:
+        instance.categoria_nome = instance.categoria.nome
+        instance.categoria_tipo = instance.categoria.tipo_categoria
+
+
+@receiver(pre_save, sender=Transacao)
+def sincronizar_valor_centavos(sender, instance, **kwargs):
+    instance.valor_centavos = para_centavos(instance.valor)
+
+
+@receiver(pre_save, sender=MetaFinanceira)
+def sincronizar_meta_centavos(sender, instance, **kwargs):
+    instance.valor_alvo_centavos = para_centavos(instance.valor_alvo)
+    instance.valor_atingido_centavos = para_centavos(instance.valor_atingido)
+
+
+@receiver(post_save, sender=Transacao)
+def transacao_salva(sender, instance, created=False, **kwargs):
+    # Lançamento em mês já encerrado: o resumo gravado daquele mês deixa de valer
+    resumos.invalidar(instance.data_transacao, instance._data_transacao_original)
+    # Os originais de instâncias com campos adiados foram lidos no pre_save (carregar_campos_adiados)
+    contribuicao = orcamentos.contribuicao(instance.categoria_id, instance.tipo, instance.valor, instance.moeda, instance.data_transacao)
+    orcamentos.aplicar_diferenca(None if created else contribuicao_original(instance), contribuicao)
+    # Índice de períodos: a transação entra no mês/tipo novo e sai do antigo
+    periodo_original = periodos.chave(instance._data_transacao_original, instance._tipo_original)
+    periodos.aplicar_diferenca(None if created else periodo_original, periodos.chave(instance.data_transacao, instance.tipo))
+    anos = {instance.data_transacao.year}
+    if instance._data_transacao_original:
+        anos.add(instance._data_transacao_original.year)
+    # O ano seguinte também é afetado, pois compara suas categorias com este ano
+    insights.agendar_atualizacao(*anos, *(ano + 1 for ano in anos))
+    instance._data_transacao_original = instance.data_transacao
+    instance._categoria_id_original = instance.categoria_id
+    instance._tipo_original = instance.__dict__.get('tipo')
+    instance._valor_original = instance.__dict__.get('valor')
+    instance._moeda_original = instance.__dict__.get('moeda')
+    instance._campos_adiados = {campo for campo in CAMPOS_ORIGINAIS if campo not in instance.__dict__}
+
+
+@receiver(pre_delete, sender=Transacao)
+def carregar_originais_antes_de_excluir(sender, instance, **kwargs):
+    # No post_delete a linha já não existe para ler os campos adiados
+    carregar_campos_adiados(instance)
+
+
+@receiver(post_delete, sender=Transacao)
+def transacao_excluida(sender, instance, **kwargs):
+    resumos.invalidar(instance._data_transacao_original)
+    orcamentos.aplicar_diferenca(contribuicao_original(instance), None)
+    periodos.aplicar_diferenca(periodos.chave(instance._data_transacao_original, instance._tipo_original), None)
+    ano = instance._data_transacao_original.year
+    insights.agendar_atualizacao(ano, ano + 1)
+
+
+@receiver(post_init, sender=Categoria)
+def guardar_categoria_original(sender, instance, **kwargs):
+    instance._nome_original = instance.__dict__.get('nome')
+    instance._tipo_categoria_original = instance.__dict__.get('tipo_categoria')
+
+
+@receiver(post_save, sender=Categoria)
+def categoria_salva(sender, instance, created=False, **kwargs):
+    # Renomear (ou mudar o tipo de) uma categoria atualiza a cópia desnormalizada com um único UPDATE
+    if not created and (instance.nome != instance._nome_original or instance.tipo_categoria != instance._tipo_categoria_original):
+        transacoes = Transacao.objects.filter(categoria=instance)
+        anos = {data.year for data in transacoes.dates('data_transacao', 'year')}
+        transacoes.update(categoria_nome=instance.nome, categoria_tipo=instance.tipo_categoria)
+        # Os insights e os resumos mensais citam as categorias pelo nome
+        if anos:
+            resumos.invalidar_anos(*anos)
+            insights.agendar_atualizacao(*anos, *(ano + 1 for ano in anos))
+    instance._nome_original = instance.nome
+    instance._tipo_categoria_original = instance.tipo_categoria
+
+
+@receiver([post_save, post_delete], sender=Categoria)
+def limpar_mapa_categorias(sender, **kwargs):
+    categorias.limpar_cache()
+
+
+@receiver(pre_delete, sender=Categoria)
+def categoria_excluida(sender, instance, **kwargs):
+    # A FK vira NULL (SET_NULL); a cópia desnormalizada acompanha
+    # (a FK é zerada aqui mesmo para o log de alterações registrar o estado final das transações)
+    transacoes = Transacao.objects.filter(categoria=instance)
+    anos = {data.year for data in transacoes.dates('data_transacao', 'year')}
+    transacoes.update(categoria=None, categoria_nome=None, categoria_tipo=None)
+    # Como ao renomear: os insights e os resumos mensais citam as categorias pelo nome
+    if anos:
+        resumos.invalidar_anos(*anos)
+        insights.agendar_atualizacao(*anos, *(ano + 1 for ano in anos))
+
+
+@receiver([post_save, post_delete], sender=TaxaCambio)
+def taxa_cambio_alterada(sender, **kwargs):
+    # Cotação nova/corrigida muda os totais convertidos de todos os períodos que a usam
+    cambio.cotacoes_alteradas()
+
+
+@receiver(post_save, sender=Transacao)
+@receiver(post_save, sender=MetaFinanceira)
+def registrar_alteracao(sender, instance, created=False, **kwargs):
+    auditoria.registrar_objetos([instance], 'criacao' if created else 'alteracao')
+
+
+@receiver(pre_delete, sender=Transacao)
+@receiver(pre_delete, sender=MetaFinanceira)
+def registrar_exclusao(sender, instance, **kwargs):
+    # No pre_delete a linha ainda existe (e a exclusão já está dentro da transação do Collector)
+    auditoria.registrar_objetos([instance], 'exclusao')
@@ -0,0 +1,138 @@
+# financas_pessoais/core/simulacao.py
+
+from datetime import date
+
+import numpy as np
+from django.db.models import Q
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .dinheiro import para_decimal, soma
+from .models import MetaFinanceira, Transacao
+
+# Simulação de Monte Carlo das metas financeiras.
+# O histórico são os saldos (receitas - despesas) de cada um dos últimos HISTORICO_MESES meses
+# fechados com transações, agregados por mês no banco. Cada caminho sorteia (com reposição) meses
+# inteiros desse histórico: assim salário e gastos que andam juntos no mesmo mês continuam juntos.
+# Os caminhos são gerados de uma vez só como uma matriz (caminhos x meses) de saldos e acumulados
+# com cumsum, sem laços em Python; para a memória ficar limitada, caminhos x meses não passa de
+# CELULAS_MAXIMAS (cerca de 45 MB no pico, entre o sorteio e o acumulado).
+# Todas as metas abertas usam os mesmos caminhos (até a data limite mais distante) e os mesmos
+# percentis: cada meta só desloca e escala o acumulado, o que custa O(caminhos) por meta, então
+# não há ganho em distribuir as metas num pool de processos.
+
+CAMINHOS = 10000
+CAMINHOS_MAXIMOS = 100000
+HISTORICO_MESES = 24
+MESES_MAXIMOS = 360
+CELULAS_MAXIMAS = CAMINHOS * MESES_MAXIMOS
+PERCENTIS = (5, 25, 50, 75, 95)
+
+
+def historico_mensal(meses=HISTORICO_MESES, hoje=None):
+    """
+    Saldo de cada mês com transações (receitas positivas, despesas negativas, na moeda de
+    relatório), em ordem cronológica. O mês corrente, ainda incompleto, fica de fora.
+    """
+    hoje = hoje or timezone.now().date()
+    fim = date(hoje.year, hoje.month, 1)
+    indice_inicio = hoje.year * 12 + hoje.month - 1 - meses
+    inicio = date(indice_inicio // 12, indice_inicio % 12 + 1, 1)
+    totais = (
+        Transacao.objects.filter(data_transacao__gte=inicio, data_transacao__lt=fim)
+        .annotate(ano=ExtractYear('data_transacao'), mes=ExtractMonth('data_transacao'))
+        .values('ano', 'mes')
+        .annotate(receitas=soma(filter=Q(tipo='receita')), despesas=soma(filter=Q(tipo='despesa')))
+        .order_by('ano', 'mes')
+    )
+    return np.array(
+        [float(para_decimal(item['receitas']) - para_decimal(item['despesas'])) for item in totais],
+        dtype=float,
+    )
+
+
+def meses_ate(data_limite, hoje=None):
+    """Meses inteiros entre o mês corrente e o mês da data limite (0 se ela já está no mês corrente ou passou)."""
+    hoje = hoje or timezone.now().date()
+    return max(0, min(MESES_MAXIMOS, (data_limite.year - hoje.year) * 12 + data_limite.month - hoje.month))
+
+
+def meses_simulados(metas, hoje=None):
+    """Horizonte dos caminhos: os meses até a data limite mais distante entre as metas."""
+    return max((meses_ate(meta.data_limite, hoje) for meta in metas), default=0)
+
+
+def gerar_caminhos(saldos_mensais, meses, caminhos=CAMINHOS, semente=None):
+    """
+    Bootstrap vetorizado dos saldos mensais em (caminhos x meses). Devolve o máximo já alcançado pelo
+    saldo acumulado de cada caminho até cada mês (uma meta atingida no meio do caminho conta como
+    atingida) e os PERCENTIS do acumulado em cada mês (linhas = percentis, colunas = meses).
+    Acumulado e máximo reaproveitam a mesma matriz: só o sorteio e ela ficam na memória.
+    """
+    if caminhos * meses > CELULAS_MAXIMAS:
+        raise ValueError(f"caminhos x meses acima de {CELULAS_MAXIMAS}")
+    gerador = np.random.default_rng(semente)
+    sorteio = gerador.integers(0, len(saldos_mensais), size=(caminhos, meses), dtype=np.int32)
+    acumulado = saldos_mensais[sorteio]
+    del sorteio
+    np.cumsum(acumulado, axis=1, out=acumulado)
+    faixas = np.percentile(acumulado, PERCENTIS, axis=0)
+    np.maximum.accumulate(acumulado, axis=1, out=acumulado)
+    return acumulado, faixas
+
+
+def simular_meta(meta, maximo, faixas, fracao=1.0, hoje=None):
+    """
+    Probabilidade de a meta chegar ao valor alvo até a data limite e as faixas de percentis do valor
+    acumulado mês a mês. Só a fração `fracao` do saldo mensal vai para a meta (saldos negativos também
+    a reduzem); como ela é positiva, os percentis da meta são os do acumulado deslocados e escalados.
+    """
+    alvo = float(meta.valor_alvo)
+    atingido = float(meta.valor_atingido)
+    meses = meses_ate(meta.data_limite, hoje)
+    resultado = {
+        'meta': meta.pk,
+        'nome': meta.nome,
+        'valor_alvo': meta.valor_alvo,
+        'valor_atingido': meta.valor_atingido,
+        'data_limite': meta.data_limite,
+        'meses': meses,
+        'fracao_do_saldo': fracao,
+    }
+    if meses == 0 or maximo.shape[0] == 0:
+        resultado.update(probabilidade=1.0 if atingido >= alvo else 0.0, valor_final={}, faixas=[])
+        return resultado
+
+    valores = (atingido + fracao * faixas[:, :meses]).round(2)
+    resultado.update(
+        probabilidade=1.0 if atingido >= alvo else round(float(np.mean(atingido + fracao * maximo[:, meses - 1] >= alvo)), 4),
+        valor_final={f'p{p}': float(valores[i, -1]) for i, p in enumerate(PERCENTIS)},
+        faixas=[
+            {'mes': indice + 1, **{f'p{p}': float(valores[i, indice]) for i, p in enumerate(PERCENTIS)}}
+            for indice in range(meses)
+        ],
+    )
+    return resultado
+
+
+def simular(metas=None, caminhos=CAMINHOS, historico=HISTORICO_MESES, fracao=1.0, semente=None):
+    """
+    Simula as metas informadas (padrão: todas as abertas). O histórico é lido numa única consulta
+    agrupada e os caminhos são gerados uma vez para todas as metas.
+    """
+    hoje = timezone.now().date()
+    if metas is None:
+        metas = MetaFinanceira.objects.filter(concluida=False)
+    metas = list(metas)
+    saldos_mensais = historico_mensal(historico, hoje)
+    meses = meses_simulados(metas, hoje)
+    if len(saldos_mensais) and meses:
+        maximo, faixas = gerar_caminhos(saldos_mensais, meses, caminhos, semente)
+    else:
+        maximo = faixas = np.zeros((0, 0))
+    return {
+        'caminhos': maximo.shape[0],
+        'meses_no_historico': len(saldos_mensais),
+        'saldo_mensal_medio': round(float(saldos_mensais.mean()), 2) if len(saldos_mensais) else 0.0,
+        'metas': [simular_meta(meta, maximo, faixas, fracao, hoje) for meta in metas],
+    }
@@ -0,0 +1,204 @@
+# financas_pessoais/core/tarefas.py
+
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Tarefa, RegraCategorizacao
+from .auditoria import origem
+
+logger = logging.getLogger(__name__)
+
+# Registro das tarefas conhecidas pelo worker: {nome: {'funcao', 'max_tentativas', 'backoff'}}
+TAREFAS = {}
+
+
+def tarefa(nome, max_tentativas=3, backoff=30):
+    """
+    Decorator para registrar uma função como tarefa de segundo plano.
+    backoff: espera (em segundos) antes da 1ª nova tentativa; dobra a cada falha.
+    """
+    def decorator(funcao):
+        TAREFAS[nome] = {'funcao': funcao, 'max_tentativas': max_tentativas, 'backoff': backoff}
+        return funcao
+    return decorator
+
+
+def enfileirar(nome, **parametros):
+    """Cria uma tarefa pendente. Os parâmetros precisam ser serializáveis em JSON."""
+    if nome not in TAREFAS:
+        raise ValueError(f"Tarefa desconhecida: {nome}")
+    return Tarefa.objects.create(
+        nome=nome,
+        parametros=parametros,
+        max_tentativas=TAREFAS[nome]['max_tentativas'],
+    )
+
+
+# Tarefas em execução renovam data_atualizacao a cada TAREFAS_BATIMENTO_SEGUNDOS; uma tarefa
+# 'executando' sem batimento há TAREFAS_ABANDONO_SEGUNDOS ficou para trás com um worker que caiu.
+_ultima_recuperacao = {'em': None}
+
+
+def recuperar_abandonadas():
+    """
+    Devolve à fila as tarefas abandonadas (contando a execução interrompida como uma tentativa);
+    as que já esgotaram as tentativas ficam como 'falhou'. Devolve quantas foram recuperadas.
+    """
+    agora = timezone.now()
+    abandonadas = Tarefa.objects.filter(
+        status='executando',
+        data_atualizacao__lt=agora - timedelta(seconds=getattr(settings, 'TAREFAS_ABANDONO_SEGUNDOS', 300)),
+    )
+    erro = "Execução interrompida: o worker parou de responder."
+    abandonadas.filter(tentativas__gte=F('max_tentativas') - 1).update(
+        status='falhou', tentativas=F('tentativas') + 1, erro=erro, data_conclusao=agora, data_atualizacao=agora,
+    )
+    return abandonadas.update(
+        status='pendente', tentativas=F('tentativas') + 1, erro=erro, worker='', executar_apos=agora, data_atualizacao=agora,
+    )
+
+
+def reservar_tarefa(worker, nomes):
+    """
+    Reserva a próxima tarefa pendente entre os nomes informados.
+    No PostgreSQL usa SELECT ... FOR UPDATE SKIP LOCKED, então vários workers não disputam a mesma linha.
+    Nos bancos sem SKIP LOCKED (SQLite) a reserva é feita com um UPDATE condicional ao status.
+    Antes, no máximo uma vez por TAREFAS_BATIMENTO_SEGUNDOS no processo, recupera as tarefas abandonadas.
+    """
+    intervalo = getattr(settings, 'TAREFAS_BATIMENTO_SEGUNDOS', 30)
+    ultima = _ultima_recuperacao['em']
+    if ultima is None or time.monotonic() - ultima >= intervalo:
+        _ultima_recuperacao['em'] = time.monotonic()
+        recuperadas = recuperar_abandonadas()
+        if recuperadas:
+            logger.warning("%s tarefa(s) abandonada(s) devolvida(s) à fila", recuperadas)
+
+    agora = timezone.now()
+    pendentes = (
+        Tarefa.objects
+        .filter(status='pendente', nome__in=nomes, executar_apos__lte=agora)
+        .order_by('executar_apos', 'id')
+    )
+    reserva = {'status': 'executando', 'worker': worker, 'data_inicio': agora, 'data_atualizacao': agora}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            tarefa_reservada = pendentes.select_for_update(skip_locked=True).first()
+            if tarefa_reservada is None:
+                return None
+            Tarefa.objects.filter(pk=tarefa_reservada.pk).update(**reserva)
+    else:
+        tarefa_reservada = None
+        for tarefa_id in pendentes.values_list('id', flat=True)[:10]:
+            if Tarefa.objects.filter(pk=tarefa_id, status='pendente').update(**reserva):
+                tarefa_reservada = tarefa_id
+                break
+        if tarefa_reservada is None:
+            return None
+
+    return Tarefa.objects.get(pk=getattr(tarefa_reservada, 'pk', tarefa_reservada))
+
+
+class _Batimento(threading.Thread):
+    """Renova data_atualizacao da tarefa em execução (com a sua própria conexão) até ser parada."""
+
+    def __init__(self, tarefa_id):
+        super().__init__(daemon=True)
+        self.tarefa_id = tarefa_id
+        self.parar = threading.Event()
+
+    def run(self):
+        try:
+            while not self.parar.wait(getattr(settings, 'TAREFAS_BATIMENTO_SEGUNDOS', 30)):
+                Tarefa.objects.filter(pk=self.tarefa_id, status='executando').update(data_atualizacao=timezone.now())
+        finally:
+            connection.close()
+
+
+# Campos gravados ao fim de cada execução
+CAMPOS_DO_DESFECHO = ('status', 'tentativas', 'resultado', 'erro', 'executar_apos', 'data_conclusao', 'data_atualizacao')
+
+
+def executar_tarefa(tarefa_reservada):
+    """Executa uma tarefa reservada, registrando o resultado ou agendando nova tentativa com backoff exponencial."""
+    config = TAREFAS.get(tarefa_reservada.nome)
+    tarefa_reservada.tentativas += 1
+    batimento = _Batimento(tarefa_reservada.pk)
+    batimento.start()
+    try:
+        if config is None:
+            raise ValueError(f"Tarefa desconhecida: {tarefa_reservada.nome}")
+        with origem(f"tarefa {tarefa_reservada.nome}"):
+            resultado = config['funcao'](**tarefa_reservada.parametros)
+    except Exception:
+        tarefa_reservada.erro = traceback.format_exc()
+        logger.exception("Falha na tarefa %s", tarefa_reservada)
+        if config and tarefa_reservada.tentativas < tarefa_reservada.max_tentativas:
+            espera = config['backoff'] * 2 ** (tarefa_reservada.tentativas - 1)
+            tarefa_reservada.status = 'pendente'
+            tarefa_reservada.executar_apos = timezone.now() + timedelta(seconds=espera)
+        else:
+            tarefa_reservada.status = 'falhou'
+            tarefa_reservada.data_conclusao = timezone.now()
+    else:
+        tarefa_reservada.status = 'concluida'
+        tarefa_reservada.resultado = resultado
+        tarefa_reservada.erro = ''
+        tarefa_reservada.data_conclusao = timezone.now()
+    finally:
+        batimento.parar.set()
+        batimento.join()
+    # Só grava se a reserva ainda é deste worker: se recuperar_abandonadas já devolveu a tarefa à fila
+    # (ou outro worker a reservou de novo), o desfecho desta execução é descartado.
+    tarefa_reservada.data_atualizacao = timezone.now()
+    gravadas = Tarefa.objects.filter(
+        pk=tarefa_reservada.pk, status='executando', worker=tarefa_reservada.worker,
+    ).update(**{campo: getattr(tarefa_reservada, campo) for campo in CAMPOS_DO_DESFECHO})
+    if not gravadas:
+        logger.warning("Tarefa %s foi recuperada por outro worker; resultado descartado", tarefa_reservada)
+    return tarefa_reservada
+
+
+def concorrencia_por_tarefa():
+    """Número de threads por tipo de tarefa: TAREFAS_CONCORRENCIA sobrescreve o padrão de 1 thread."""
+    configurada = getattr(settings, 'TAREFAS_CONCORRENCIA', {})
+    return {nome: configurada.get(nome, 1) for nome in TAREFAS}
+
+
+# --- Tarefas disponíveis ---
+# As implementações são importadas dentro das funções para que o worker só carregue o que usar.
+
+@tarefa('insights.atualizar')
+def tarefa_atualizar_insights(ano):
+    from .insights import atualizar_insights
+    insights_ano = atualizar_insights(ano)
+    return {'ano': insights_ano.ano, 'impressao_digital': insights_ano.impressao_digital}
+
+
+@tarefa('categorizacao.aplicar')
+def tarefa_aplicar_regras(regras=None, somente_sem_categoria=False):
+    from .categorizacao import aplicar_regras
+    selecionadas = RegraCategorizacao.objects.filter(ativa=True)
+    if regras is not None:
+        selecionadas = selecionadas.filter(id__in=regras)
+    return aplicar_regras(selecionadas, somente_sem_categoria=somente_sem_categoria)
+
+
+@tarefa('deteccao.executar')
+def tarefa_detectar_anomalias(completo=False, processos=None):
+    from .deteccao import executar
+    return executar(completo=completo, processos=processos or settings.DETECCAO_PROCESSOS)
+
+
+@tarefa('relatorios.gerar')
+def tarefa_gerar_relatorios(anos, formatos=('xlsx',), processos=None):
+    from .relatorios import armazenar_varios
+    return {'arquivos': armazenar_varios(anos, formatos, processos or settings.RELATORIOS_PROCESSOS)}
@@ -0,0 +1,43 @@
+# financas_pessoais/core/tests/test_admin.py
+
+from datetime import date
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.admin import PaginadorEstimado, estimar_contagem
+from core.models import Transacao
+
+
+class PaginadorEstimadoTests(TestCase):
+    def setUp(self):
+        for indice in range(5):
+            Transacao.objects.create(descricao=f't{indice}', valor=Decimal('1.00'), tipo='despesa', data_transacao=date(2023, 1, 1))
+        self.transacoes = Transacao.objects.order_by('pk')
+
+    def contar(self, estimativa):
+        with mock.patch('core.admin.estimar_contagem', return_value=estimativa):
+            return PaginadorEstimado(self.transacoes, 2).count
+
+    def test_estimativa_so_acima_do_limite(self):
+        self.assertEqual(self.contar(None), 5) # Banco sem estimativa: COUNT(*)
+        self.assertEqual(self.contar(PaginadorEstimado.LIMITE_CONTAGEM_EXATA - 1), 5)
+        self.assertEqual(self.contar(250000), 250000)
+
+    def test_listagem_do_admin(self):
+        usuario = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'senha')
+        self.client.force_login(usuario)
+        resposta = self.client.get('/admin/core/transacao/', {'tipo__exact': 'despesa'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context['cl'].result_count, 5)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Estimativa só existe no PostgreSQL')
+    def test_estimativa_do_planejador(self):
+        self.assertIsInstance(estimar_contagem(Transacao.objects.filter(tipo='despesa')), int)
+
+    @skipUnless(connection.vendor != 'postgresql', 'Nos outros bancos não há estimativa')
+    def test_sem_estimativa_fora_do_postgresql(self):
+        self.assertIsNone(estimar_contagem(Transacao.objects.filter(tipo='despesa')))
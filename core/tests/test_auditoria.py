@@ -0,0 +1,52 @@
+# financas_pessoais/core/tests/test_auditoria.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.auditoria import dados_do_objeto
+from core.models import Categoria, MetaFinanceira, RegistroAlteracao, SequenciaAlteracao, Transacao
+
+
+class UpdateAuditadoTests(TestCase):
+    """update() em lote grava o log no banco, sem carregar as linhas no Python."""
+
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nome='Mercado')
+        self.transacoes = [
+            Transacao.objects.create(descricao=f't{i}', valor=Decimal('12.30'), tipo='despesa', data_transacao=date(2024, 1, 5))
+            for i in range(3)
+        ]
+
+    def test_dados_do_log_iguais_aos_do_objeto(self):
+        inicio = SequenciaAlteracao.objects.get(pk=1).ultima
+        afetadas = Transacao.objects.filter(descricao__in=['t0', 't2']).update(status='pendente')
+        self.assertEqual(afetadas, 2)
+        registros = list(RegistroAlteracao.objects.filter(sequencia__gt=inicio))
+        self.assertEqual([registro.sequencia for registro in registros], [inicio + 1, inicio + 2])
+        self.assertEqual(SequenciaAlteracao.objects.get(pk=1).ultima, inicio + 2)
+        for registro in registros:
+            self.assertEqual(registro.operacao, 'alteracao')
+            self.assertEqual(registro.dados, dados_do_objeto(Transacao.objects.get(pk=registro.objeto_id)))
+
+    def test_booleanos_e_nulos(self):
+        meta = MetaFinanceira.objects.create(nome='Viagem', tipo='economia', valor_alvo=Decimal('1000'), data_limite=date(2030, 1, 1))
+        MetaFinanceira.objects.filter(pk=meta.pk).update(concluida=True, descricao=None)
+        registro = RegistroAlteracao.objects.filter(modelo='metafinanceira').last()
+        self.assertEqual(registro.dados, dados_do_objeto(MetaFinanceira.objects.get(pk=meta.pk)))
+        self.assertIs(registro.dados['concluida'], True)
+
+    def test_sem_linhas_nao_reserva_sequencias(self):
+        inicio = SequenciaAlteracao.objects.get(pk=1).ultima
+        self.assertEqual(Transacao.objects.filter(descricao='nenhuma').update(status='pendente'), 0)
+        self.assertEqual(SequenciaAlteracao.objects.get(pk=1).ultima, inicio)
+
+    def test_numero_de_consultas_independe_das_linhas(self):
+        with CaptureQueriesContext(connection) as poucas:
+            Transacao.objects.filter(pk=self.transacoes[0].pk).update(status='pendente')
+        with CaptureQueriesContext(connection) as todas:
+            Transacao.objects.update(status='concluida')
+        self.assertEqual(len(poucas), len(todas))
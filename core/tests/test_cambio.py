@@ -0,0 +1,27 @@
+# financas_pessoais/core/tests/test_cambio.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core import cambio
+from core.models import Categoria, GastoMensal, TaxaCambio, Transacao
+
+
+class CacheDeCotacoesTests(TestCase):
+    def test_cotacao_gravada_por_outro_processo_vale_na_hora(self):
+        TaxaCambio.objects.create(moeda='USD', data=date(2024, 1, 1), taxa=Decimal('5.00'))
+        self.assertEqual(cambio.converter(Decimal('10.00'), 'USD', date(2024, 2, 1)), Decimal('50.00'))
+        # bulk_create não dispara sinais: é o que este processo veria de uma carga feita em outro worker
+        TaxaCambio.objects.bulk_create([TaxaCambio(moeda='USD', data=date(2024, 2, 1), taxa=Decimal('6.00'))])
+        self.assertEqual(cambio.converter(Decimal('10.00'), 'USD', date(2024, 2, 1)), Decimal('60.00'))
+
+    def test_contador_de_gastos_usa_a_cotacao_atual(self):
+        categoria = Categoria.objects.create(nome='Viagem')
+        TaxaCambio.objects.create(moeda='USD', data=date(2024, 1, 1), taxa=Decimal('5.00'))
+        Transacao.objects.create(descricao='a', valor=Decimal('1.00'), moeda='USD', tipo='despesa', data_transacao=date(2024, 3, 1), categoria=categoria)
+        TaxaCambio.objects.filter(moeda='USD').update(taxa=Decimal('4.00'), data_atualizacao=timezone.now())
+        Transacao.objects.create(descricao='b', valor=Decimal('1.00'), moeda='USD', tipo='despesa', data_transacao=date(2024, 3, 1), categoria=categoria)
+        self.assertEqual(GastoMensal.objects.get(categoria=categoria).total_centavos, 500 + 400)
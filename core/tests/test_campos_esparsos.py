@@ -0,0 +1,57 @@
+# financas_pessoais/core/tests/test_campos_esparsos.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import MetaFinanceira, Transacao
+
+
+class CamposEsparsosTests(TestCase):
+    def criar_transacoes(self, quantidade):
+        for indice in range(quantidade):
+            Transacao.objects.create(
+                descricao=f'Compra {indice}', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2023, 1, indice + 1),
+            )
+
+    def listar(self, url, fields):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url, {'fields': fields})
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json(), consultas
+
+    def test_so_os_campos_pedidos_e_so_as_colunas_deles(self):
+        self.criar_transacoes(3)
+        itens, consultas = self.listar('/api/transacoes/', 'id,descricao,inexistente')
+        self.assertEqual([set(item) for item in itens], [{'id', 'descricao'}] * 3)
+        selects = [consulta['sql'] for consulta in consultas if '"core_transacao"' in consulta['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('"valor"', selects[0])
+
+    def test_campo_calculado_carrega_as_colunas_de_que_depende(self):
+        # Sem as colunas dependentes, cada linha faria uma consulta extra para o campo adiado
+        self.criar_transacoes(2)
+        _, poucas = self.listar('/api/transacoes/', 'id,valor_relatorio')
+        self.criar_transacoes(8)
+        itens, muitas = self.listar('/api/transacoes/', 'id,valor_relatorio')
+        self.assertEqual(len(muitas), len(poucas))
+        self.assertEqual({item['valor_relatorio'] for item in itens}, {'10.00'})
+
+    def test_propriedades_da_meta(self):
+        MetaFinanceira.objects.create(
+            nome='Viagem', valor_alvo=Decimal('1000.00'), valor_atingido=Decimal('250.00'), data_limite=date(2030, 1, 1),
+        )
+        itens, _ = self.listar('/api/metas/', 'nome,progresso_porcentagem,valor_restante')
+        self.assertEqual(itens, [{'nome': 'Viagem', 'progresso_porcentagem': 25.0, 'valor_restante': 750.0}])
+
+    def test_escrita_ignora_fields(self):
+        resposta = self.client.post(
+            '/api/transacoes/?fields=id',
+            {'descricao': 'Feira', 'valor': '8.50', 'tipo': 'despesa', 'data_transacao': '2023-06-01'},
+            content_type='application/json',
+        )
+        self.assertEqual(resposta.status_code, 201)
+        self.assertIn('descricao', resposta.json())
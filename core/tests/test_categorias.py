@@ -0,0 +1,20 @@
+# financas_pessoais/core/tests/test_categorias.py
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Categoria
+
+
+class ListaDeCategoriasTests(TestCase):
+    def nomes(self):
+        return {item['nome'] for item in self.client.get('/api/categorias/').json()}
+
+    def test_alteracao_feita_por_outro_processo_aparece_na_hora(self):
+        categoria = Categoria.objects.create(nome='Hortifruti')
+        self.assertIn('Hortifruti', self.nomes())
+        # update() não dispara sinais: é o que este processo veria de uma gravação feita em outro worker
+        Categoria.objects.filter(pk=categoria.pk).update(nome='Feira', data_atualizacao=timezone.now())
+        nomes = self.nomes()
+        self.assertIn('Feira', nomes)
+        self.assertNotIn('Hortifruti', nomes)
@@ -0,0 +1,123 @@
+# financas_pessoais/core/tests/test_categorizacao.py
+
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from core.categorizacao import MotorCategorizacao, aplicar_regras, obter_motor, padrao_portavel, validar_padrao
+from core.models import Categoria, RegraCategorizacao, Transacao
+from core.serializers import RegraCategorizacaoSerializer
+
+
+class ValidarPadraoTests(TestCase):
+    def test_rejeita_flags_globais(self):
+        for padrao in ('(?i)mercado', 'mercado(?s)', '(?im)feira'):
+            with self.subTest(padrao=padrao), self.assertRaises(ValueError):
+                validar_padrao(padrao)
+
+    def test_aceita_flags_locais_e_padroes_comuns(self):
+        for padrao in ('(?i:mercado)', r'\bifood\b', 'uber|99', ''):
+            with self.subTest(padrao=padrao):
+                validar_padrao(padrao)
+
+    def test_serializer_rejeita_flag_global(self):
+        categoria = Categoria.objects.create(nome='Mercado')
+        serializer = RegraCategorizacaoSerializer(data={'nome': 'r', 'padrao_descricao': '(?i)mercado', 'categoria': categoria.pk})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('padrao_descricao', serializer.errors)
+
+
+class PadraoPortavelTests(TestCase):
+    def test_padroes_comuns_vao_para_o_banco(self):
+        for padrao in ('mercado', 'uber|99', r'posto\s+\w+', '[a-z0-9.-]+', r'[\d\.]+', 'a{2,3}', '(?:pix|ted)'):
+            with self.subTest(padrao=padrao):
+                self.assertTrue(padrao_portavel(padrao))
+
+    def test_padroes_com_dialeto_diferente_ficam_no_python(self):
+        for padrao in (r'\bifood\b', r'[\D]', '(?=a)', '(?<!x)y', '[[:alpha:]]', '{x}', r'fim\Z'):
+            with self.subTest(padrao=padrao):
+                self.assertFalse(padrao_portavel(padrao))
+
+
+class MotorCategorizacaoTests(TestCase):
+    def setUp(self):
+        self.mercado = Categoria.objects.create(nome='Mercado')
+
+    def test_regra_gravada_com_padrao_invalido_nao_derruba_o_motor(self):
+        # Regressão: um (?i) no meio do regex combinado levantava re.error em toda criação sem categoria
+        RegraCategorizacao.objects.create(nome='ruim', padrao_descricao='(?i)padaria', categoria=self.mercado, prioridade=1)
+        RegraCategorizacao.objects.create(nome='boa', padrao_descricao='mercado', categoria=self.mercado, prioridade=2)
+
+        transacao = Transacao.objects.create(
+            descricao='Compra no MERCADO', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2024, 1, 5)
+        )
+        self.assertEqual(transacao.categoria_id, self.mercado.pk)
+        self.assertEqual([regra.nome for regra in obter_motor().regras], ['boa'])
+
+    def test_prioridade_e_faixa_de_valor(self):
+        outros = Categoria.objects.create(nome='Outros')
+        regras = [
+            RegraCategorizacao.objects.create(nome='grande', padrao_descricao='loja', valor_min=Decimal('100'), categoria=outros, prioridade=1),
+            RegraCategorizacao.objects.create(nome='loja', padrao_descricao='loja', categoria=self.mercado, prioridade=2),
+        ]
+        motor = MotorCategorizacao(regras)
+        self.assertEqual(motor.regra_para('Loja X', Decimal('150'), 'despesa').nome, 'grande')
+        self.assertEqual(motor.regra_para('Loja X', Decimal('15'), 'despesa').nome, 'loja')
+        self.assertIsNone(motor.regra_para('Farmácia', Decimal('15'), 'despesa'))
+
+
+class AplicarRegrasTests(TestCase):
+    def setUp(self):
+        self.mercado = Categoria.objects.create(nome='Mercado')
+        self.delivery = Categoria.objects.create(nome='Delivery')
+        for descricao in ('Mercado Central', 'iFood mercado', 'iFood pedido', 'ifoodie bar', 'Posto'):
+            Transacao.objects.create(descricao=descricao, valor=Decimal('20.00'), tipo='despesa', data_transacao=date(2023, 3, 1))
+        # As regras são criadas depois das transações para não categorizá-las na criação
+        self.regras = [
+            RegraCategorizacao.objects.create(nome='ifood', padrao_descricao=r'\bifood\b', categoria=self.delivery, prioridade=1),
+            RegraCategorizacao.objects.create(nome='mercado', padrao_descricao='mercado', categoria=self.mercado, prioridade=2),
+        ]
+
+    def test_dry_run_conta_o_mesmo_que_a_aplicacao(self):
+        # "iFood mercado" casa com as duas regras e só conta para a de maior prioridade
+        simulado = aplicar_regras(self.regras, dry_run=True)
+        aplicado = aplicar_regras(self.regras)
+        self.assertEqual(simulado, aplicado)
+        self.assertEqual({item['nome']: item['afetadas'] for item in aplicado}, {'ifood': 2, 'mercado': 1})
+
+    def test_historico_usa_a_mesma_semantica_das_transacoes_novas(self):
+        aplicar_regras(self.regras)
+        categorias = dict(Transacao.objects.values_list('descricao', 'categoria_nome'))
+        self.assertEqual(categorias['iFood mercado'], 'Delivery')
+        self.assertEqual(categorias['ifoodie bar'], None) # \b do Python
+        nova = Transacao.objects.create(descricao='ifoodie bar', valor=Decimal('5.00'), tipo='despesa', data_transacao=date(2023, 3, 2))
+        self.assertIsNone(nova.categoria_id)
+
+    def test_segunda_aplicacao_nao_altera_nada(self):
+        aplicar_regras(self.regras)
+        self.assertEqual(sum(item['afetadas'] for item in aplicar_regras(self.regras)), 0)
+
+    def test_categoria_renomeada_depois_do_motor_em_cache(self):
+        obter_motor() # Motor compilado (e em cache) antes da mudança de nome
+        self.mercado.nome = 'Supermercado'
+        self.mercado.save()
+        nova = Transacao.objects.create(descricao='Mercado da esquina', valor=Decimal('8.00'), tipo='despesa', data_transacao=date(2023, 4, 1))
+        self.assertEqual(nova.categoria_id, self.mercado.pk)
+        self.assertEqual(nova.categoria_nome, 'Supermercado')
+
+    def test_regras_no_banco_e_no_motor_respeitam_a_prioridade(self):
+        # Como no PostgreSQL: \b não é portável e a regra de maior prioridade passa pelo motor em Python
+        with mock.patch('core.categorizacao.padrao_no_banco', lambda padrao, vendor: padrao_portavel(padrao)):
+            simulado = aplicar_regras(self.regras, dry_run=True)
+            aplicado = aplicar_regras(self.regras)
+        self.assertEqual(simulado, aplicado)
+        self.assertEqual({item['nome']: item['afetadas'] for item in aplicado}, {'ifood': 2, 'mercado': 1})
+        self.assertEqual(Transacao.objects.get(descricao='iFood mercado').categoria_id, self.delivery.pk)
+
+    def test_somente_sem_categoria_preserva_as_existentes(self):
+        Transacao.objects.filter(descricao='Mercado Central').update(categoria=self.delivery)
+        resultado = aplicar_regras(self.regras, somente_sem_categoria=True)
+        self.assertEqual({item['nome']: item['afetadas'] for item in resultado}, {'ifood': 2, 'mercado': 0})
+        self.assertEqual(Transacao.objects.get(descricao='Mercado Central').categoria_id, self.delivery.pk)
@@ -0,0 +1,100 @@
+# financas_pessoais/core/tests/test_coalescencia.py
+
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.http import QueryDict
+from django.test import SimpleTestCase, override_settings
+
+from core import coalescencia
+
+CACHES_TESTE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'teste-default'},
+    'coalescencia': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'teste-coalescencia'},
+}
+
+
+@override_settings(CACHES=CACHES_TESTE, COALESCENCIA_VALIDADE_SEGUNDOS=30, COALESCENCIA_JANELA_OBSOLETA_SEGUNDOS=5)
+class CoalescenciaTests(SimpleTestCase):
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        configuracao = override_settings(COALESCENCIA_DIR=pasta.name) # Exercita também a trava de arquivo
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        coalescencia._cache().clear() # O LocMemCache é compartilhado entre os testes
+        self.versao = 'v1'
+        versao = mock.patch('core.coalescencia.versao_dados', lambda: self.versao)
+        versao.start()
+        self.addCleanup(versao.stop)
+        self.parametros = QueryDict('ano=2023')
+        self.chamadas = 0
+        self.calculando = threading.Event()
+        self.liberar = threading.Event()
+        self.liberar.set()
+
+    def calcular(self):
+        self.chamadas += 1
+        self.calculando.set()
+        self.liberar.wait(5)
+        return 200, {'calculo': self.chamadas}
+
+    def em_paralelo(self, quantidade):
+        """Dispara `quantidade` requisições idênticas enquanto a primeira ainda está calculando."""
+        resultados = []
+
+        def requisicao():
+            resultados.append(coalescencia.obter('teste', self.parametros, self.calcular))
+
+        self.liberar.clear()
+        self.calculando.clear()
+        threads = [threading.Thread(target=requisicao) for _ in range(quantidade)]
+        threads[0].start()
+        self.assertTrue(self.calculando.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.2) # As demais chegam enquanto o cálculo está em voo
+        self.liberar.set()
+        for thread in threads:
+            thread.join(5)
+        return resultados
+
+    def test_requisicoes_simultaneas_compartilham_um_calculo(self):
+        resultados = self.em_paralelo(8)
+        self.assertEqual(self.chamadas, 1)
+        self.assertEqual(resultados, [(200, {'calculo': 1})] * 8)
+        # Depois, a resposta fresca sai do cache
+        self.assertEqual(coalescencia.obter('teste', self.parametros, self.calcular), (200, {'calculo': 1}))
+        self.assertEqual(self.chamadas, 1)
+
+    def test_obsoleta_servida_enquanto_um_unico_calculo_renova(self):
+        coalescencia.obter('teste', self.parametros, self.calcular)
+        self.versao = 'v2' # Uma escrita mudou os dados
+        self.liberar.clear()
+        renovacao = threading.Thread(target=coalescencia.obter, args=('teste', self.parametros, self.calcular))
+        renovacao.start()
+        self.assertTrue(self.calculando.wait(5))
+        # Dentro da janela, quem chega durante a renovação recebe o resultado anterior sem esperar
+        self.assertEqual(coalescencia.obter('teste', self.parametros, self.calcular), (200, {'calculo': 1}))
+        self.liberar.set()
+        renovacao.join(5)
+        self.assertEqual(self.chamadas, 2)
+        self.assertEqual(coalescencia.obter('teste', self.parametros, self.calcular), (200, {'calculo': 2}))
+
+    def test_fora_da_janela_recalcula(self):
+        with override_settings(COALESCENCIA_VALIDADE_SEGUNDOS=0, COALESCENCIA_JANELA_OBSOLETA_SEGUNDOS=0):
+            coalescencia.obter('teste', self.parametros, self.calcular)
+            coalescencia.obter('teste', self.parametros, self.calcular)
+        self.assertEqual(self.chamadas, 2)
+
+    def test_parametros_diferentes_nao_se_misturam(self):
+        coalescencia.obter('teste', self.parametros, self.calcular)
+        coalescencia.obter('teste', QueryDict('ano=2024'), self.calcular)
+        self.assertEqual(self.chamadas, 2)
+
+    def test_erro_nao_fica_em_cache(self):
+        coalescencia.obter('teste', self.parametros, lambda: (400, {'ano': 'inválido'}))
+        coalescencia.obter('teste', self.parametros, self.calcular)
+        self.assertEqual(self.chamadas, 1)
@@ -0,0 +1,73 @@
+# financas_pessoais/core/tests/test_deteccao.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core import deteccao
+from core.models import Anomalia, Categoria, Transacao
+
+
+class DeteccaoDuplicatasTests(TestCase):
+    def criar(self, descricao, valor, data, tipo='despesa'):
+        return Transacao.objects.create(descricao=descricao, valor=Decimal(valor), tipo=tipo, data_transacao=data)
+
+    def setUp(self):
+        self.netflix = self.criar('NETFLIX.COM assinatura', '39.90', date(2023, 5, 10))
+        self.netflix_dup = self.criar('Netflix.com - assinatura', '39.90', date(2023, 5, 11))
+        self.netflix_junho = self.criar('NETFLIX.COM assinatura', '39.90', date(2023, 6, 10)) # Mesmo valor, um mês depois
+        self.criar('Padaria do bairro', '39.90', date(2023, 5, 10))      # Mesmo valor e data, outra descrição
+        self.uber = self.criar('Uber viagem', '22.00', date(2023, 5, 12))
+        self.uber_dup = self.criar('UBER *VIAGEM', '22.00', date(2023, 5, 14))
+        self.criar('Uber viagem', '22.00', date(2023, 5, 14), tipo='receita') # Outro tipo: outro bloco
+
+    def pares(self):
+        return {
+            (anomalia.transacao_id, anomalia.transacao_relacionada_id)
+            for anomalia in Anomalia.objects.filter(tipo='duplicata', situacao='aberta')
+        }
+
+    def test_varredura_completa(self):
+        resultado = deteccao.executar()
+        self.assertEqual(resultado['modo'], 'completo')
+        self.assertEqual(self.pares(), {(self.netflix.pk, self.netflix_dup.pk), (self.uber.pk, self.uber_dup.pk)})
+
+    def test_lotes_pequenos_dao_o_mesmo_resultado(self):
+        deteccao.executar(completo=True)
+        esperado = self.pares()
+        deteccao.executar(completo=True, tamanho_lote=2)
+        self.assertEqual(self.pares(), esperado)
+
+    def test_incremental_igual_a_completa(self):
+        deteccao.executar()
+        novo = self.criar('Netflix assinatura mensal', '39.90', date(2023, 6, 12))
+        self.netflix_dup.valor = Decimal('45.00') # Deixa de ser duplicata
+        self.netflix_dup.save()
+        resultado = deteccao.executar()
+        self.assertEqual(resultado['modo'], 'incremental')
+        self.assertEqual(resultado['transacoes_reavaliadas'], 2)
+        incremental = self.pares()
+        deteccao.executar(completo=True)
+        self.assertEqual(incremental, self.pares())
+        self.assertIn((self.netflix_junho.pk, novo.pk), incremental)
+
+    def test_revisao_mantida_entre_execucoes(self):
+        deteccao.executar()
+        Anomalia.objects.filter(transacao=self.netflix).update(situacao='descartada')
+        deteccao.executar(completo=True)
+        self.assertEqual(Anomalia.objects.get(transacao=self.netflix).situacao, 'descartada')
+        self.assertNotIn((self.netflix.pk, self.netflix_dup.pk), self.pares())
+
+
+class DeteccaoAtipicosTests(TestCase):
+    def test_mes_muito_acima_da_mediana(self):
+        categoria = Categoria.objects.create(nome='Farmácia')
+        gastos = ['100.00', '110.00', '95.00', '105.00', '100.00', '98.00', '102.00', '900.00']
+        for mes, valor in enumerate(gastos, start=1):
+            Transacao.objects.create(
+                descricao='Drogaria', valor=Decimal(valor), tipo='despesa', data_transacao=date(2023, mes, 3), categoria=categoria,
+            )
+        deteccao.executar()
+        atipicos = Anomalia.objects.filter(tipo='atipico')
+        self.assertEqual([(anomalia.categoria_id, anomalia.ano, anomalia.mes) for anomalia in atipicos], [(categoria.pk, 2023, 8)])
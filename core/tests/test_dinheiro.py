@@ -0,0 +1,133 @@
+# financas_pessoais/core/tests/test_dinheiro.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import F
+from django.test import TestCase, override_settings
+from hypothesis import given, settings as configuracao_hypothesis, strategies as st
+from hypothesis.extra.django import TestCase as HypothesisTestCase
+
+from core import cambio, coalescencia
+from core.dinheiro import de_centavos, dividir, para_centavos, para_decimal, soma
+from core.models import Categoria, GastoMensal, TaxaCambio, Transacao
+
+# Valores que cabem em Transacao.valor (max_digits=10, decimal_places=2)
+valores = st.decimals(min_value=Decimal('-99999999.99'), max_value=Decimal('99999999.99'), places=2, allow_nan=False, allow_infinity=False)
+transacoes = st.lists(st.tuples(valores, st.sampled_from(['BRL', 'USD']), st.sampled_from(['receita', 'despesa'])), max_size=30)
+
+
+class CentavosTests(HypothesisTestCase):
+    @given(valores)
+    def test_ida_e_volta(self, valor):
+        self.assertEqual(de_centavos(para_centavos(valor)), valor)
+
+    @given(valores)
+    def test_texto_igual_a_decimal(self, valor):
+        self.assertEqual(para_centavos(str(valor)), para_centavos(valor))
+
+    @given(st.lists(valores, max_size=50))
+    def test_soma_em_centavos_igual_a_soma_decimal(self, lista):
+        self.assertEqual(de_centavos(sum(para_centavos(valor) for valor in lista)), sum(lista, Decimal('0.00')))
+
+    @given(valores, st.one_of(st.integers(min_value=1, max_value=36), st.sampled_from([Decimal('30.44'), Decimal('4.345'), Decimal('-3')])))
+    def test_divisao_em_centavos_igual_a_divisao_decimal(self, valor, divisor):
+        with override_settings(VALORES_EM_CENTAVOS=True):
+            em_centavos = dividir(para_centavos(valor), divisor)
+            self.assertIsInstance(em_centavos, int)
+            em_centavos = para_decimal(em_centavos)
+        with override_settings(VALORES_EM_CENTAVOS=False):
+            self.assertEqual(em_centavos, para_decimal(dividir(valor, divisor)))
+
+
+class AgregacaoNosDoisModosTests(HypothesisTestCase):
+    """soma() dá o mesmo Decimal com VALORES_EM_CENTAVOS ligado ou desligado."""
+
+    def setUp(self):
+        TaxaCambio.objects.create(moeda='USD', data=date(2024, 1, 1), taxa=Decimal('5.4321'))
+        cambio.limpar_cache()
+
+    def totais(self):
+        return {
+            tipo: para_decimal(Transacao.objects.filter(tipo=tipo).aggregate(total=soma())['total'])
+            for tipo in ('receita', 'despesa')
+        }
+
+    @configuracao_hypothesis(max_examples=50, deadline=None)
+    @given(transacoes)
+    def test_totais_iguais(self, linhas):
+        Transacao.objects.bulk_create([
+            Transacao(descricao='t', valor=valor, moeda=moeda, tipo=tipo, data_transacao=date(2024, 2, 1))
+            for valor, moeda, tipo in linhas
+        ])
+        with override_settings(VALORES_EM_CENTAVOS=False):
+            em_decimal = self.totais()
+        with override_settings(VALORES_EM_CENTAVOS=True):
+            em_centavos = self.totais()
+        self.assertEqual(em_centavos, em_decimal)
+        esperado = {
+            tipo: sum((cambio.converter(valor, moeda, date(2024, 2, 1)) for valor, moeda, t in linhas if t == tipo), Decimal('0.00'))
+            for tipo in ('receita', 'despesa')
+        }
+        self.assertEqual(em_decimal, esperado)
+
+
+class EscritasEmLoteTests(TestCase):
+    """bulk_create() e update() mantêm as colunas espelho como o save()."""
+
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nome='Mercado')
+
+    def test_bulk_create_preenche_centavos_e_categoria(self):
+        transacao, = Transacao.objects.bulk_create([
+            Transacao(descricao='a', valor=Decimal('12.34'), tipo='despesa', data_transacao=date(2024, 1, 5), categoria=self.categoria)
+        ])
+        transacao.refresh_from_db()
+        self.assertEqual(transacao.valor_centavos, 1234)
+        self.assertEqual((transacao.categoria_nome, transacao.categoria_tipo), ('Mercado', 'despesa'))
+        self.assertEqual(GastoMensal.objects.get(categoria=self.categoria, ano=2024, mes=1).total_centavos, 1234)
+
+    def test_update_de_valor(self):
+        transacao = Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2024, 1, 5), categoria=self.categoria)
+        Transacao.objects.filter(pk=transacao.pk).update(valor=Decimal('7.25'))
+        transacao.refresh_from_db()
+        self.assertEqual(transacao.valor_centavos, 725)
+        Transacao.objects.filter(pk=transacao.pk).update(valor=F('valor') * 2)
+        transacao.refresh_from_db()
+        self.assertEqual((transacao.valor, transacao.valor_centavos), (Decimal('14.50'), 1450))
+        self.assertEqual(GastoMensal.objects.get(categoria=self.categoria, ano=2024, mes=1).total_centavos, 1450)
+
+    def test_update_de_categoria(self):
+        transacao = Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2024, 1, 5))
+        Transacao.objects.filter(pk=transacao.pk).update(categoria=self.categoria.pk)
+        transacao.refresh_from_db()
+        self.assertEqual(transacao.categoria_nome, 'Mercado')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'teste-default'},
+    'coalescencia': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'teste-coalescencia'},
+})
+class ProjecaoNosDoisModosTests(TestCase):
+    """As médias e projeções da ProjecaoFinanceiraView são as mesmas nos dois modos."""
+
+    def setUp(self):
+        mercado = Categoria.objects.create(nome='Mercado')
+        for mes, receita, despesa in [(10, '3000.00', '1234.57'), (11, '3100.10', '2000.01'), (12, '2900.00', '3333.33')]:
+            Transacao.objects.create(descricao='Salário', valor=Decimal(receita), tipo='receita', data_transacao=date(2023, mes, 5))
+            Transacao.objects.create(descricao='Compras', valor=Decimal(despesa), tipo='despesa', data_transacao=date(2023, mes, 9), categoria=mercado)
+
+    def projecao(self, meses):
+        coalescencia._cache().clear()
+        return self.client.get('/api/projecoes/', {'year': 2023, 'meses': meses}).json()
+
+    def test_mesma_resposta(self):
+        for meses in (12, 3):
+            with override_settings(VALORES_EM_CENTAVOS=False):
+                em_decimal = self.projecao(meses)
+            with override_settings(VALORES_EM_CENTAVOS=True):
+                em_centavos = self.projecao(meses)
+            self.assertEqual(em_centavos, em_decimal)
+        # (1234.57 + 2000.01 + 3333.33) / 3 = 2189.303333... -> 2189.30
+        self.assertEqual(Decimal(str(em_decimal['projecao_despesa_media_mensal_geral'])), Decimal('2189.30'))
+        self.assertEqual(Decimal(str(em_decimal['projecao_3_meses_despesa'])), Decimal('6567.90'))
@@ -0,0 +1,70 @@
+# financas_pessoais/core/tests/test_facetas.py
+
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.test import TestCase
+
+from core import facetas
+from core.models import Categoria, Transacao
+
+
+class FacetasTests(TestCase):
+    def setUp(self):
+        mercado = Categoria.objects.create(nome='Hortifruti')
+        lancamentos = [
+            ('despesa', 'pago', mercado, date(2023, 1, 5), '10.00'),
+            ('despesa', 'pendente', mercado, date(2023, 1, 9), '5.50'),
+            ('despesa', 'pago', None, date(2023, 2, 1), '7.25'),
+            ('receita', 'pago', None, date(2023, 2, 3), '100.00'),
+        ]
+        for tipo, status, categoria, data, valor in lancamentos:
+            Transacao.objects.create(descricao='x', valor=Decimal(valor), tipo=tipo, status=status, categoria=categoria, data_transacao=data)
+
+    def facetas(self, **filtros):
+        resposta = self.client.get('/api/transacoes/facets/', filtros)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+
+    def esperado(self, transacoes, campo):
+        """A mesma faceta com um values().annotate() simples."""
+        return {
+            item['chave']: (item['quantidade'], item['total'])
+            for item in transacoes.values(chave=F(campo)).annotate(quantidade=Count('id'), total=Sum('valor')).order_by()
+        }
+
+    def obtido(self, itens):
+        return {item['valor']: (item['quantidade'], Decimal(item['total'])) for item in itens}
+
+    def test_facetas_batem_com_agrupamentos_simples(self):
+        for filtros in ({}, {'tipo': 'despesa'}):
+            with self.subTest(filtros=filtros):
+                facetas = self.facetas(**filtros)
+                transacoes = Transacao.objects.filter(**filtros)
+                self.assertEqual(self.obtido(facetas['tipo']), self.esperado(transacoes, 'tipo'))
+                self.assertEqual(self.obtido(facetas['status']), self.esperado(transacoes, 'status'))
+                self.assertEqual(self.obtido(facetas['categoria']), self.esperado(transacoes, 'categoria_id'))
+                meses = {
+                    f"{chave:%Y-%m}": totais
+                    for chave, totais in self.esperado(transacoes.annotate(mes=TruncMonth('data_transacao')), 'mes').items()
+                }
+                self.assertEqual(self.obtido(facetas['mes']), meses)
+                self.assertEqual(facetas['total']['quantidade'], transacoes.count())
+
+    def test_escrita_invalida_o_cache(self):
+        self.assertEqual(self.facetas()['total']['quantidade'], 4)
+        Transacao.objects.create(descricao='y', valor=Decimal('1.00'), tipo='despesa', data_transacao=date(2023, 3, 1))
+        self.assertEqual(self.facetas()['total']['quantidade'], 5)
+
+    @skipUnless(connection.vendor == 'postgresql', 'GROUPING SETS só é usado no PostgreSQL')
+    def test_grouping_sets_igual_ao_fallback(self):
+        for transacoes in (Transacao.objects.all(), Transacao.objects.filter(tipo='despesa')):
+            with self.subTest(consulta=str(transacoes.query)):
+                self.assertEqual(
+                    sorted(facetas._agrupar_grouping_sets(transacoes), key=repr),
+                    sorted(facetas._agrupar_combinacoes(transacoes), key=repr),
+                )
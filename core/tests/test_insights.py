@@ -0,0 +1,68 @@
+# financas_pessoais/core/tests/test_insights.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from core.insights import obter_insights
+from core.models import Categoria, InsightsAno, Tarefa, Transacao
+
+
+class AgendarAtualizacaoTests(TestCase):
+    def criar(self, ano=2023):
+        return Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(ano, 5, 1))
+
+    def test_escrita_so_invalida_e_a_leitura_recalcula(self):
+        obter_insights(2023)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.criar()
+        # Nada dos insights roda depois do commit na requisição que escreveu (só o DELETE dos resumos)
+        self.assertEqual([callback.__module__ for callback in callbacks], ['core.resumos'])
+        self.assertFalse(InsightsAno.objects.filter(ano=2023).exists())
+        self.assertTrue(obter_insights(2023).pk)
+
+    def test_rollback_mantem_os_insights(self):
+        obter_insights(2023)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.criar()
+            raise RuntimeError
+        self.assertTrue(InsightsAno.objects.filter(ano=2023).exists())
+
+    def test_excluir_categoria_invalida_os_insights(self):
+        categoria = Categoria.objects.create(nome='Academia')
+        Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2023, 5, 1), categoria=categoria)
+        obter_insights(2023)
+        obter_insights(2024)
+        categoria.delete()
+        self.assertFalse(InsightsAno.objects.filter(ano__in=[2023, 2024]).exists())
+
+    @override_settings(TAREFAS_EM_SEGUNDO_PLANO=True)
+    def test_fila_sem_duplicar_anos_pendentes(self):
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.criar()
+        anos = sorted(Tarefa.objects.filter(nome='insights.atualizar').values_list('parametros__ano', flat=True))
+        self.assertEqual(anos, [2023, 2024])
+
+    @override_settings(TAREFAS_EM_SEGUNDO_PLANO=True)
+    def test_fila_nada_enfileirado_em_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.criar(2022)
+                raise RuntimeError
+        self.assertFalse(Tarefa.objects.exists())
+
+
+class InsightsViewTests(TestCase):
+    def test_ano_invalido_responde_400(self):
+        for ano in ('abc', '0', '10000'):
+            with self.subTest(ano=ano):
+                resposta = self.client.get('/api/insights/', {'year': ano})
+                self.assertEqual(resposta.status_code, 400)
+                self.assertIn('year', resposta.json())
+
+    def test_ano_valido(self):
+        resposta = self.client.get('/api/insights/', {'year': '2023'})
+        self.assertEqual(resposta.status_code, 200)
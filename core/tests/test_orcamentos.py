@@ -0,0 +1,76 @@
+# financas_pessoais/core/tests/test_orcamentos.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core import orcamentos
+from core.models import Categoria, GastoMensal, Orcamento, TaxaCambio, Transacao
+
+
+class ContadoresDeGastoTests(TestCase):
+    """Os contadores mantidos a cada escrita batem com o recálculo completo a partir das transações."""
+
+    def setUp(self):
+        self.mercado = Categoria.objects.create(nome='Hortifruti')
+        self.lazer = Categoria.objects.create(nome='Cinema')
+        TaxaCambio.objects.create(moeda='USD', data=date(2023, 1, 1), taxa=Decimal('5.00'))
+        self.transacao = Transacao.objects.create(
+            descricao='Feira', valor=Decimal('40.00'), tipo='despesa', data_transacao=date(2023, 3, 10), categoria=self.mercado,
+        )
+
+    def assertContadoresConferem(self):
+        mantidos = {
+            (gasto.categoria_id, gasto.ano, gasto.mes): gasto.total_centavos
+            for gasto in GastoMensal.objects.exclude(total_centavos=0)
+        }
+        orcamentos.recalcular_gastos()
+        recalculados = {(gasto.categoria_id, gasto.ano, gasto.mes): gasto.total_centavos for gasto in GastoMensal.objects.all()}
+        self.assertEqual(mantidos, recalculados)
+        return mantidos
+
+    def test_criacao_e_alteracoes_de_uma_transacao(self):
+        self.assertEqual(self.assertContadoresConferem(), {(self.mercado.pk, 2023, 3): 4000})
+        alteracoes = [
+            {'valor': Decimal('55.10')},
+            {'categoria': self.lazer},
+            {'data_transacao': date(2023, 4, 2)},
+            {'moeda': 'USD'},
+            {'tipo': 'receita'},
+            {'tipo': 'despesa'},
+        ]
+        for alteracao in alteracoes:
+            with self.subTest(alteracao=alteracao):
+                for campo, valor in alteracao.items():
+                    setattr(self.transacao, campo, valor)
+                self.transacao.save()
+                self.assertContadoresConferem()
+        self.assertEqual(self.assertContadoresConferem(), {(self.lazer.pk, 2023, 4): 27550})
+
+    def test_instancia_com_campos_adiados_e_exclusao(self):
+        transacao = Transacao.objects.only('descricao').get(pk=self.transacao.pk)
+        transacao.valor = Decimal('12.00')
+        transacao.save()
+        self.assertEqual(self.assertContadoresConferem(), {(self.mercado.pk, 2023, 3): 1200})
+        Transacao.objects.only('descricao').get(pk=self.transacao.pk).delete()
+        self.assertEqual(self.assertContadoresConferem(), {})
+
+    def test_escritas_em_lote(self):
+        Transacao.objects.bulk_create([
+            Transacao(descricao='x', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2023, 3, 11), categoria=self.mercado),
+            Transacao(descricao='y', valor=Decimal('2.00'), moeda='USD', tipo='despesa', data_transacao=date(2023, 5, 1), categoria=self.lazer),
+        ])
+        self.assertContadoresConferem()
+        Transacao.objects.filter(categoria=self.mercado).update(valor=Decimal('1.00'))
+        self.assertEqual(self.assertContadoresConferem(), {(self.mercado.pk, 2023, 3): 200, (self.lazer.pk, 2023, 5): 1000})
+
+    def test_status_do_orcamento(self):
+        Orcamento.objects.create(categoria=self.mercado, valor_limite=Decimal('50.00'), limiar_alerta=75)
+        resposta = self.client.get('/api/orcamentos/status/', {'ano': 2023, 'mes': 3}).json()
+        self.assertEqual(resposta['orcamentos'][0]['situacao'], 'alerta')
+        self.assertEqual(Decimal(resposta['orcamentos'][0]['gasto']), Decimal('40.00'))
+        Transacao.objects.create(descricao='Sacolão', valor=Decimal('15.00'), tipo='despesa', data_transacao=date(2023, 3, 20), categoria=self.mercado)
+        resposta = self.client.get('/api/orcamentos/status/', {'ano': 2023, 'mes': 3}).json()
+        self.assertEqual(resposta['orcamentos'][0]['situacao'], 'estourado')
+        self.assertEqual(len(resposta['alertas']), 1)
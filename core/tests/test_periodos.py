@@ -0,0 +1,54 @@
+# financas_pessoais/core/tests/test_periodos.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db.models import F
+from django.test import TestCase
+
+from core import periodos
+from core.models import PeriodoIndice, Transacao
+
+
+class IndicePeriodosTests(TestCase):
+    """O índice mantido pelos sinais e pelas escritas em lote bate com a contagem das transações."""
+
+    def setUp(self):
+        for mes, tipo in ((1, 'despesa'), (1, 'despesa'), (1, 'receita'), (2, 'despesa'), (3, 'receita')):
+            Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo=tipo, data_transacao=date(2023, mes, 10))
+        # Nenhuma escrita pode cair no recálculo completo do índice
+        recalcular = mock.patch('core.periodos.recalcular', side_effect=AssertionError('recalcular() chamado'))
+        recalcular.start()
+        self.addCleanup(recalcular.stop)
+
+    def assertIndiceConfere(self):
+        indice = {
+            (item.ano, item.mes, item.tipo): item.quantidade
+            for item in PeriodoIndice.objects.filter(quantidade__gt=0)
+        }
+        self.assertEqual(indice, dict(periodos.totais(Transacao.objects.all())))
+
+    def test_update_em_lote_com_data_fixa(self):
+        Transacao.objects.filter(data_transacao__month=1).update(data_transacao=date(2023, 4, 1))
+        self.assertIndiceConfere()
+        self.assertEqual(periodos.meses_disponiveis(2023), [2, 3, 4])
+
+    def test_update_em_lote_com_expressao_e_tipo(self):
+        Transacao.objects.filter(tipo='despesa').update(data_transacao=F('data_transacao') + timedelta(days=31))
+        self.assertIndiceConfere()
+        Transacao.objects.filter(data_transacao__month=3).update(tipo='despesa')
+        self.assertIndiceConfere()
+
+    def test_instancia_com_campos_adiados(self):
+        transacao = Transacao.objects.only('descricao').get(data_transacao__month=2)
+        transacao.data_transacao = date(2023, 5, 1)
+        transacao.save()
+        self.assertIndiceConfere()
+        Transacao.objects.only('descricao').get(pk=transacao.pk).delete()
+        self.assertIndiceConfere()
+
+    def test_exclusoes(self):
+        Transacao.objects.filter(data_transacao__month=1).delete()
+        self.assertIndiceConfere()
+        self.assertEqual(periodos.meses_disponiveis(2023), [2, 3])
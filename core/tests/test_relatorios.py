@@ -0,0 +1,78 @@
+# financas_pessoais/core/tests/test_relatorios.py
+
+import io
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from openpyxl import load_workbook
+
+from core import relatorios
+from core.models import Categoria, MetaFinanceira, Transacao
+
+
+class RelatorioAnualTests(TestCase):
+    def setUp(self):
+        moradia = Categoria.objects.create(nome='Aluguel')
+        lancamentos = [
+            ('receita', None, date(2023, 1, 5), '3000.00'),
+            ('despesa', moradia, date(2023, 1, 10), '1200.00'),
+            ('despesa', None, date(2023, 2, 10), '300.00'),
+            ('despesa', moradia, date(2024, 1, 10), '999.00'), # Outro ano: fica de fora
+        ]
+        for tipo, categoria, data, valor in lancamentos:
+            Transacao.objects.create(descricao='x', valor=Decimal(valor), tipo=tipo, categoria=categoria, data_transacao=data)
+        MetaFinanceira.objects.create(
+            nome='Reserva', valor_alvo=Decimal('1000.00'), valor_atingido=Decimal('400.00'),
+            data_inicio=date(2023, 1, 1), data_limite=date(2023, 12, 31),
+        )
+
+    def secoes(self):
+        return {secao['titulo']: secao for secao in relatorios.montar_relatorio(2023)['secoes']}
+
+    def test_secoes(self):
+        secoes = self.secoes()
+        self.assertEqual(list(secoes), ['Saldo mensal', 'Por categoria', 'Metas financeiras', 'Alertas e sugestões'])
+        saldo = secoes['Saldo mensal']['linhas']
+        self.assertEqual(saldo[0], ['Jan', Decimal('3000.00'), Decimal('1200.00'), Decimal('1800.00')])
+        self.assertEqual(saldo[-1], ['Total', Decimal('3000.00'), Decimal('1500.00'), Decimal('1500.00')])
+        # Sem ordem fixa para 'Sem Categoria' (NULL vem antes ou depois conforme o banco)
+        self.assertCountEqual(
+            secoes['Por categoria']['linhas'],
+            [
+                ['Despesa', 'Aluguel', Decimal('1200.00'), 80.0],
+                ['Despesa', 'Sem Categoria', Decimal('300.00'), 20.0],
+                ['Receita', 'Sem Categoria', Decimal('3000.00'), 100.0],
+            ],
+        )
+        self.assertEqual(secoes['Metas financeiras']['linhas'][0][:5], ['Reserva', 'Economizar', Decimal('1000.00'), Decimal('400.00'), 40.0])
+        self.assertEqual(secoes['Alertas e sugestões']['linhas'][-1][0], 'Situação')
+
+    def test_xlsx_com_uma_aba_por_secao(self):
+        resposta = self.client.get('/api/relatorios/anual/', {'ano': 2023, 'formato': 'xlsx'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta['Content-Type'], relatorios.FORMATOS['xlsx'])
+        self.assertIn('relatorio_anual_2023.xlsx', resposta['Content-Disposition'])
+        planilha = load_workbook(io.BytesIO(b''.join(resposta.streaming_content)))
+        self.assertEqual(planilha.sheetnames, list(self.secoes()))
+        self.assertEqual([celula.value for celula in planilha['Saldo mensal'][14]], ['Total', 3000, 1500, 1500])
+
+    def test_pdf(self):
+        resposta = self.client.get('/api/relatorios/anual/', {'ano': 2023, 'formato': 'pdf'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(b''.join(resposta.streaming_content).startswith(b'%PDF'))
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/api/relatorios/anual/', {'formato': 'csv'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/relatorios/anual/', {'ano': 'dois mil'}).status_code, 400)
+
+    def test_relatorio_armazenado(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        with override_settings(MEDIA_ROOT=pasta.name):
+            self.assertEqual(self.client.get('/api/relatorios/anual/', {'ano': 2023, 'armazenado': 1}).status_code, 404)
+            relatorios.armazenar(2023, 'xlsx')
+            resposta = self.client.get('/api/relatorios/anual/', {'ano': 2023, 'armazenado': 1})
+            self.assertEqual(resposta.status_code, 200)
+            self.assertTrue(b''.join(resposta.streaming_content).startswith(b'PK')) # XLSX é um zip
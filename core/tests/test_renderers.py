@@ -0,0 +1,49 @@
+# financas_pessoais/core/tests/test_renderers.py
+
+import gzip
+import json
+from datetime import date
+from decimal import Decimal
+
+import brotli
+import msgpack
+from django.test import TestCase
+
+from core.models import Transacao
+
+
+class FormatosDeRespostaTests(TestCase):
+    def setUp(self):
+        for indice in range(20):
+            Transacao.objects.create(
+                descricao=f'Compra {indice}', valor=Decimal('12.34'), tipo='despesa', data_transacao=date(2023, 5, indice + 1),
+            )
+        self.json = self.client.get('/api/transacoes/').json()
+
+    def test_messagepack_tem_os_mesmos_dados_do_json(self):
+        for parametros, cabecalhos in (({'format': 'msgpack'}, {}), ({}, {'HTTP_ACCEPT': 'application/msgpack'})):
+            with self.subTest(parametros=parametros):
+                resposta = self.client.get('/api/transacoes/', parametros, **cabecalhos)
+                self.assertEqual(resposta['Content-Type'], 'application/msgpack')
+                self.assertEqual(msgpack.unpackb(resposta.content, raw=False), self.json)
+
+    def test_corpo_em_messagepack(self):
+        corpo = msgpack.packb({'descricao': 'Feira', 'valor': '8.50', 'tipo': 'despesa', 'data_transacao': '2023-06-01'})
+        resposta = self.client.post('/api/transacoes/', corpo, content_type='application/msgpack')
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(Transacao.objects.get(descricao='Feira').valor, Decimal('8.50'))
+        resposta = self.client.post('/api/transacoes/', b'\xc1', content_type='application/msgpack')
+        self.assertEqual(resposta.status_code, 400)
+
+    def test_formato_colunar(self):
+        colunar = self.client.get('/api/transacoes/', {'formato': 'colunar'}).json()
+        self.assertEqual([dict(zip(colunar['campos'], linha)) for linha in colunar['linhas']], self.json)
+
+    def test_compressao_negociada(self):
+        resposta = self.client.get('/api/transacoes/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(resposta['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(resposta.content)), self.json)
+        resposta = self.client.get('/api/transacoes/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resposta['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(resposta.content)), self.json)
+        self.assertFalse(self.client.get('/api/transacoes/').has_header('Content-Encoding'))
@@ -0,0 +1,62 @@
+# financas_pessoais/core/tests/test_resumos.py
+
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from core.models import ResumoMensal, Transacao
+from core import resumos
+from core.resumos import resumos_do_ano
+
+
+class InvalidacaoEmLoteTests(TestCase):
+    def setUp(self):
+        for mes in (1, 2, 3):
+            Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2023, mes, 5))
+        resumos_do_ano(2023)
+
+    def meses_em_cache(self):
+        return set(ResumoMensal.objects.filter(ano=2023).values_list('mes', flat=True))
+
+    def test_bulk_create_apaga_so_os_meses_alcancados(self):
+        Transacao.objects.bulk_create([
+            Transacao(descricao='b', valor=Decimal('1.00'), tipo='despesa', data_transacao=date(2023, 2, 9)),
+        ])
+        self.assertEqual(self.meses_em_cache(), set(range(1, 13)) - {2})
+
+    def test_update_apaga_os_meses_de_origem_e_de_destino(self):
+        Transacao.objects.filter(data_transacao__month=1).update(data_transacao=date(2023, 3, 1))
+        self.assertEqual(self.meses_em_cache(), set(range(1, 13)) - {1, 3})
+        self.assertEqual(
+            [resumo.despesas for resumo in resumos_do_ano(2023)[:3]],
+            [Decimal('0.00'), Decimal('10.00'), Decimal('20.00')],
+        )
+
+
+class CorridaLeitorEscritorTests(TestCase):
+    def test_escrita_durante_a_agregacao_nao_grava_resumo_velho(self):
+        Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2023, 1, 5))
+        para_decimal = resumos.para_decimal
+        escrita = []
+
+        def escrever_no_meio(valor):
+            # Lançamento retroativo confirmado depois da agregação e antes da gravação dos resumos
+            if not escrita:
+                escrita.append(Transacao.objects.create(
+                    descricao='b', valor=Decimal('5.00'), tipo='despesa', data_transacao=date(2023, 1, 6),
+                ))
+            return para_decimal(valor)
+
+        with mock.patch('core.resumos.para_decimal', escrever_no_meio):
+            resumos_do_ano(2023)
+        self.assertFalse(ResumoMensal.objects.filter(ano=2023).exists())
+        self.assertEqual(resumos_do_ano(2023)[0].despesas, Decimal('15.00'))
+
+    def test_escritor_apaga_de_novo_depois_do_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2023, 1, 5))
+            # Resumo gravado por um leitor concorrente antes do commit do escritor
+            resumos._gerar_resumos(2023, [1])
+        self.assertFalse(ResumoMensal.objects.filter(ano=2023, mes=1).exists())
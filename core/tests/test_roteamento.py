@@ -0,0 +1,47 @@
+# financas_pessoais/core/tests/test_roteamento.py
+
+from contextvars import copy_context
+
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from core import roteamento
+from core.models import Transacao
+
+
+@override_settings(REPLICAS_LEITURA=['replica_1'])
+class ReplicaRouterTests(TransactionTestCase):
+    # TransactionTestCase: fora de um TestCase o teste não roda inteiro dentro de um atomic()
+
+    def setUp(self):
+        self.router = roteamento.ReplicaRouter()
+
+    def em_requisicao(self, funcao, leitura_em_replica=True):
+        """Roda `funcao` com o estado de roteamento de uma requisição nova (como o middleware)."""
+        def requisicao():
+            roteamento._leitura_em_replica.set(leitura_em_replica)
+            roteamento._primario_fixado.set(False)
+            return funcao()
+        return copy_context().run(requisicao)
+
+    def test_so_as_views_marcadas_leem_da_replica(self):
+        self.assertEqual(self.em_requisicao(lambda: self.router.db_for_read(Transacao)), 'replica_1')
+        self.assertIsNone(self.em_requisicao(lambda: self.router.db_for_read(Transacao), leitura_em_replica=False))
+
+    def test_escrita_fixa_o_primario_ate_o_fim_da_requisicao(self):
+        def escrever_e_ler():
+            self.assertEqual(self.router.db_for_write(Transacao), 'default')
+            return self.router.db_for_read(Transacao)
+        self.assertIsNone(self.em_requisicao(escrever_e_ler))
+        # A requisição seguinte volta para a réplica
+        self.assertEqual(self.em_requisicao(lambda: self.router.db_for_read(Transacao)), 'replica_1')
+
+    def test_nenhuma_leitura_em_replica_dentro_de_transacao(self):
+        def ler_em_transacao():
+            with transaction.atomic():
+                return self.router.db_for_read(Transacao)
+        self.assertIsNone(self.em_requisicao(ler_em_transacao))
+
+    def test_sem_replicas_configuradas(self):
+        with override_settings(REPLICAS_LEITURA=[]):
+            self.assertIsNone(self.em_requisicao(lambda: self.router.db_for_read(Transacao)))
@@ -0,0 +1,16 @@
+# financas_pessoais/core/tests/test_saude.py
+
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase
+
+
+class SaudeTests(TestCase):
+    def test_erro_do_banco_nao_vaza_na_resposta(self):
+        erro = OperationalError('could not connect to server: host db-interno.local, user financas')
+        with mock.patch('django.db.backends.utils.CursorWrapper.execute', side_effect=erro), self.assertLogs('core.views', 'ERROR'):
+            resposta = self.client.get('/api/saude/')
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(resposta.json()['bancos']['default'], {'status': 'erro'})
+        self.assertNotIn('db-interno', resposta.content.decode())
@@ -0,0 +1,46 @@
+# financas_pessoais/core/tests/test_series.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import Transacao
+
+
+class SerieTemporalTests(TestCase):
+    def setUp(self):
+        lancamentos = [
+            (date(2023, 1, 5), 'receita', '1000.00'),
+            (date(2023, 1, 20), 'despesa', '300.00'),
+            (date(2023, 2, 3), 'despesa', '200.00'),
+            (date(2023, 3, 15), 'receita', '500.00'),
+            (date(2023, 3, 16), 'despesa', '100.00'),
+        ]
+        for data, tipo, valor in lancamentos:
+            Transacao.objects.create(descricao='x', valor=Decimal(valor), tipo=tipo, data_transacao=data)
+
+    def serie(self, **params):
+        resposta = self.client.get('/api/series/', {'inicio': '2023-01-01', 'fim': '2023-12-31', **params})
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()['serie']
+
+    def test_totais_e_janela_movel_por_mes(self):
+        serie = self.serie(granularidade='mes', janela=2)
+        self.assertEqual([item['periodo'][:7] for item in serie], ['2023-01', '2023-02', '2023-03'])
+        self.assertEqual([Decimal(item['saldo']) for item in serie], [Decimal('700'), Decimal('-200'), Decimal('400')])
+        # Soma móvel de 2 períodos: o primeiro só tem ele mesmo na janela
+        self.assertEqual([Decimal(item['saldo_soma_movel']) for item in serie], [Decimal('700'), Decimal('500'), Decimal('200')])
+        self.assertEqual([Decimal(item['saldo_media_movel']) for item in serie], [Decimal('700'), Decimal('250'), Decimal('100')])
+
+    def test_janela_particionada_pela_dimensao(self):
+        serie = self.serie(granularidade='trimestre', dimensoes='tipo', janela=3)
+        por_tipo = {item['tipo']: Decimal(item['receitas']) + Decimal(item['despesas']) for item in serie}
+        self.assertEqual(por_tipo, {'receita': Decimal('1500'), 'despesa': Decimal('600')})
+        self.assertEqual([item['quantidade'] for item in serie if item['tipo'] == 'despesa'], [3])
+
+    def test_parametros_invalidos(self):
+        for params in ({'granularidade': 'hora'}, {'janela': '0'}, {'dimensoes': 'usuario'}, {'inicio': '2024-13-01'}):
+            with self.subTest(params=params):
+                resposta = self.client.get('/api/series/', params)
+                self.assertEqual(resposta.status_code, 400)
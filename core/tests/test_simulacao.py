@@ -0,0 +1,80 @@
+# financas_pessoais/core/tests/test_simulacao.py
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.test import TestCase
+from django.utils import timezone
+
+from core import simulacao
+from core.models import MetaFinanceira, Transacao
+
+
+class LimiteDeMemoriaTests(TestCase):
+    def test_caminhos_vezes_meses_acima_do_limite_responde_400(self):
+        hoje = timezone.now().date()
+        MetaFinanceira.objects.create(
+            nome='Casa', valor_alvo=Decimal('100000.00'), data_limite=date(hoje.year + 30, hoje.month, 1),
+        )
+        resposta = self.client.get('/api/metas/simulacao/', {'caminhos': simulacao.CAMINHOS_MAXIMOS})
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('caminhos', resposta.json())
+        resposta = self.client.get('/api/metas/simulacao/', {'caminhos': simulacao.CAMINHOS})
+        self.assertEqual(resposta.status_code, 200)
+
+
+class SimulacaoTests(TestCase):
+    def setUp(self):
+        self.hoje = timezone.now().date()
+        # Seis meses fechados alternando saldo +1000 e +200, e um lançamento no mês corrente (fica de fora)
+        for atras, saldo in enumerate(['1000.00', '200.00', '1000.00', '200.00', '1000.00', '200.00'], start=1):
+            indice = self.hoje.year * 12 + self.hoje.month - 1 - atras
+            data = date(indice // 12, indice % 12 + 1, 15)
+            Transacao.objects.create(descricao='Salário', valor=Decimal('3000.00'), tipo='receita', data_transacao=data)
+            Transacao.objects.create(descricao='Gastos', valor=Decimal('3000.00') - Decimal(saldo), tipo='despesa', data_transacao=data)
+        Transacao.objects.create(descricao='Gastos', valor=Decimal('9999.00'), tipo='despesa', data_transacao=self.hoje)
+
+    def meta(self, alvo, meses, atingido='0.00'):
+        indice = self.hoje.year * 12 + self.hoje.month - 1 + meses
+        return MetaFinanceira.objects.create(
+            nome=f'Meta {alvo}', valor_alvo=Decimal(alvo), valor_atingido=Decimal(atingido),
+            data_limite=date(indice // 12, indice % 12 + 1, 1),
+        )
+
+    def test_historico_agregado_por_mes(self):
+        self.assertEqual(sorted(simulacao.historico_mensal(hoje=self.hoje).tolist()), [200.0] * 3 + [1000.0] * 3)
+
+    def test_probabilidade_dentro_dos_limites_do_historico(self):
+        # Em 10 meses o acumulado fica entre 2000 (só meses de 200) e 10000 (só meses de 1000)
+        certa, impossivel, incerta = self.meta('1500.00', 10), self.meta('10500.00', 10), self.meta('6000.00', 10)
+        resultado = simulacao.simular([certa, impossivel, incerta], caminhos=2000, semente=7)
+        probabilidades = [item['probabilidade'] for item in resultado['metas']]
+        self.assertEqual(probabilidades[:2], [1.0, 0.0])
+        # Acumulado = 2000 + 800 x (meses de 1000), binomial(10, 1/2): P(>= 5 meses de 1000) = 638/1024
+        self.assertAlmostEqual(probabilidades[2], 638 / 1024, delta=0.04)
+        faixas = resultado['metas'][2]['faixas']
+        self.assertEqual(len(faixas), 10)
+        for faixa in faixas:
+            valores = [faixa[f'p{p}'] for p in simulacao.PERCENTIS]
+            self.assertEqual(valores, sorted(valores))
+            self.assertTrue(200 * faixa['mes'] <= valores[0] and valores[-1] <= 1000 * faixa['mes'])
+
+    def test_semente_reproduz_o_resultado(self):
+        meta = self.meta('6000.00', 10)
+        self.assertEqual(
+            simulacao.simular([meta], caminhos=500, semente=3),
+            simulacao.simular([meta], caminhos=500, semente=3),
+        )
+
+    def test_meta_no_mes_corrente(self):
+        pendente, atingida = self.meta('500.00', 0), self.meta('500.00', 0, atingido='600.00')
+        resultado = simulacao.simular([pendente, atingida], semente=1)
+        self.assertEqual(resultado['caminhos'], 0) # Nenhum mês a simular
+        self.assertEqual([(item['meses'], item['probabilidade'], item['faixas']) for item in resultado['metas']], [(0, 0.0, []), (0, 1.0, [])])
+
+    def test_maximo_acumulado_nao_diminui(self):
+        maximo, faixas = simulacao.gerar_caminhos(np.array([-50.0, 30.0]), 12, caminhos=100, semente=2)
+        self.assertEqual(maximo.shape, (100, 12))
+        self.assertTrue((np.diff(maximo, axis=1) >= 0).all())
+        self.assertEqual(faixas.shape, (len(simulacao.PERCENTIS), 12))
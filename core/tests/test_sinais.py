@@ -0,0 +1,53 @@
+# financas_pessoais/core/tests/test_sinais.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import Categoria, GastoMensal, PeriodoIndice, RegraCategorizacao, Transacao
+
+
+class TransacaoComValoresEmTextoTests(TestCase):
+    """create()/save() aceitam data e valor como texto, como antes dos sinais de manutenção."""
+
+    def test_data_em_texto(self):
+        transacao = Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao='2024-01-05')
+        self.assertEqual(transacao.data_transacao, date(2024, 1, 5))
+        self.assertTrue(PeriodoIndice.objects.filter(ano=2024, mes=1, tipo='despesa', quantidade=1).exists())
+
+    def test_data_em_texto_ao_alterar(self):
+        transacao = Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2024, 1, 5))
+        transacao.data_transacao = '2023-02-10'
+        transacao.save()
+        self.assertTrue(PeriodoIndice.objects.filter(ano=2023, mes=2, tipo='despesa', quantidade=1).exists())
+        self.assertFalse(PeriodoIndice.objects.filter(ano=2024, mes=1, quantidade__gt=0).exists())
+
+    def test_valor_em_texto(self):
+        categoria = Categoria.objects.create(nome='Mercado')
+        RegraCategorizacao.objects.create(nome='grande', padrao_descricao='mercado', valor_min=Decimal('5'), categoria=categoria)
+        transacao = Transacao.objects.create(descricao='Mercado', valor='10.00', tipo='despesa', data_transacao='2024-01-05')
+        self.assertEqual(transacao.categoria_id, categoria.pk)
+        self.assertEqual(transacao.valor_centavos, 1000)
+        self.assertEqual(GastoMensal.objects.get(categoria=categoria, ano=2024, mes=1).total_centavos, 1000)
+
+
+class SaveParcialTests(TestCase):
+    """Num save parcial as colunas espelho são gravadas junto com o campo de origem."""
+
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nome='Papelaria')
+        self.transacao = Transacao.objects.create(descricao='a', valor=Decimal('10.00'), tipo='despesa', data_transacao=date(2024, 1, 5))
+
+    def test_instancia_com_campos_adiados(self):
+        transacao = Transacao.objects.only('descricao').get(pk=self.transacao.pk)
+        transacao.valor = Decimal('12.34')
+        transacao.categoria = self.categoria
+        transacao.save()
+        gravada = Transacao.objects.values('valor_centavos', 'categoria_nome').get(pk=self.transacao.pk)
+        self.assertEqual(gravada, {'valor_centavos': 1234, 'categoria_nome': 'Papelaria'})
+
+    def test_update_fields(self):
+        self.transacao.valor = Decimal('7.00')
+        self.transacao.save(update_fields=['valor'])
+        self.assertEqual(Transacao.objects.values_list('valor_centavos', flat=True).get(pk=self.transacao.pk), 700)
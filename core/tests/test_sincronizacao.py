@@ -0,0 +1,61 @@
+# financas_pessoais/core/tests/test_sincronizacao.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import MetaFinanceira, Transacao
+
+
+class SincronizacaoCompletaTests(TestCase):
+    def setUp(self):
+        self.transacoes = [
+            Transacao.objects.create(descricao=f't{i}', valor=Decimal('1.00'), tipo='despesa', data_transacao=date(2024, 1, 1))
+            for i in range(5)
+        ]
+        self.metas = [
+            MetaFinanceira.objects.create(nome=f'm{i}', tipo='economizar', valor_alvo=Decimal('100'), data_limite=date(2030, 1, 1))
+            for i in range(2)
+        ]
+
+    def sincronizar(self, **parametros):
+        resposta = self.client.get('/api/sync/', parametros)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+
+    def test_paginas_pela_chave_primaria(self):
+        pagina = self.sincronizar(limit=3)
+        transacoes, metas, paginas = [], [], 0
+        while True:
+            paginas += 1
+            self.assertTrue(pagina['completo'])
+            self.assertLessEqual(len(pagina['transacoes']['alterados']) + len(pagina['metas']['alterados']), 3)
+            transacoes += [item['id'] for item in pagina['transacoes']['alterados']]
+            metas += [item['id'] for item in pagina['metas']['alterados']]
+            if not pagina['mais']:
+                break
+            pagina = self.sincronizar(token=pagina['proximo_token'], limit=3)
+        self.assertEqual(paginas, 3)
+        self.assertEqual(transacoes, [transacao.pk for transacao in self.transacoes])
+        self.assertEqual(metas, [meta.pk for meta in self.metas])
+        self.assertIsNone(pagina['proximo_token'])
+
+        # O token da última página continua a sincronização de forma incremental
+        excluida = self.transacoes[0].pk
+        self.transacoes[0].delete()
+        incremental = self.sincronizar(token=pagina['token'])
+        self.assertFalse(incremental['completo'])
+        self.assertEqual(incremental['transacoes']['excluidos'], [excluida])
+
+    def test_alteracao_durante_a_paginacao_vem_na_proxima_sincronizacao(self):
+        pagina = self.sincronizar(limit=4)
+        self.transacoes[1].descricao = 'alterada'
+        self.transacoes[1].save()
+        while pagina['mais']:
+            pagina = self.sincronizar(token=pagina['proximo_token'], limit=4)
+        incremental = self.sincronizar(token=pagina['token'])
+        self.assertEqual([item['descricao'] for item in incremental['transacoes']['alterados']], ['alterada'])
+
+    def test_token_de_continuacao_invalido(self):
+        self.assertEqual(self.client.get('/api/sync/', {'token': '1:outro:0'}).status_code, 400)
@@ -0,0 +1,67 @@
+# financas_pessoais/core/tests/test_tarefas.py
+
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tarefas
+from core.models import Tarefa
+
+
+@override_settings(TAREFAS_ABANDONO_SEGUNDOS=300)
+class TarefasAbandonadasTests(TestCase):
+    def criar(self, minutos_sem_batimento, tentativas=0):
+        tarefa = Tarefa.objects.create(nome='insights.atualizar', parametros={'ano': 2024}, max_tentativas=3, tentativas=tentativas)
+        Tarefa.objects.filter(pk=tarefa.pk).update(
+            status='executando', worker='caiu', data_atualizacao=timezone.now() - timedelta(minutes=minutos_sem_batimento),
+        )
+        return tarefa
+
+    def test_volta_para_a_fila_como_nova_tentativa(self):
+        tarefa = self.criar(10)
+        self.assertEqual(tarefas.recuperar_abandonadas(), 1)
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas, tarefa.worker), ('pendente', 1, ''))
+        self.assertEqual(tarefas.reservar_tarefa('outro', ['insights.atualizar']).pk, tarefa.pk)
+
+    def test_falha_quando_esgota_as_tentativas(self):
+        tarefa = self.criar(10, tentativas=2)
+        tarefas.recuperar_abandonadas()
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('falhou', 3))
+
+    def test_tarefa_com_batimento_recente_continua(self):
+        tarefa = self.criar(1)
+        self.assertEqual(tarefas.recuperar_abandonadas(), 0)
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'executando')
+
+
+class DesfechoDaTarefaTests(TestCase):
+    def reservar(self):
+        Tarefa.objects.create(nome='insights.atualizar', parametros={'ano': 2024})
+        return tarefas.reservar_tarefa('w1', ['insights.atualizar'])
+
+    def test_grava_o_resultado_da_reserva(self):
+        tarefa = self.reservar()
+        with mock.patch.dict(tarefas.TAREFAS['insights.atualizar'], funcao=lambda ano: {'ano': ano}):
+            tarefas.executar_tarefa(tarefa)
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas, tarefa.resultado), ('concluida', 1, {'ano': 2024}))
+
+    def test_nao_sobrescreve_tarefa_recuperada_durante_a_execucao(self):
+        tarefa = self.reservar()
+
+        def recuperada_no_meio(ano):
+            # Batimento atrasado: recuperar_abandonadas devolve a tarefa à fila antes de ela terminar
+            Tarefa.objects.filter(pk=tarefa.pk).update(data_atualizacao=timezone.now() - timedelta(hours=1))
+            tarefas.recuperar_abandonadas()
+            return {'ano': ano}
+
+        with mock.patch.dict(tarefas.TAREFAS['insights.atualizar'], funcao=recuperada_no_meio), \
+                self.assertLogs('core.tarefas', 'WARNING'):
+            tarefas.executar_tarefa(tarefa)
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas, tarefa.resultado), ('pendente', 1, None))
@@ -2,13 +2,17 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoriaViewSet, TransacaoViewSet, AnaliseFinanceiraView, ProjecaoFinanceiraView, DashboardView, MetaFinanceiraViewSet # <<< Importar MetaFinanceiraViewSet
+from .views import CategoriaViewSet, TransacaoViewSet, AnaliseFinanceiraView, ProjecaoFinanceiraView, DashboardView, MetaFinanceiraViewSet, InsightsView, TarefaViewSet, RegraCategorizacaoViewSet, SerieTemporalView, SaudeView, MetricasView, OrcamentoViewSet, AlteracoesView, SincronizacaoView, AnomaliaViewSet, RelatorioAnualView, PeriodosView # <<< Importar MetaFinanceiraViewSet
 
 # Cria um roteador para registrar os ViewSets (EXISTENTE, NÃO ALTERAR)
 router = DefaultRouter()
 router.register(r'categorias', CategoriaViewSet)
 router.register(r'transacoes', TransacaoViewSet)
 router.register(r'metas', MetaFinanceiraViewSet) # <<< NOVA LINHA AQUI: Registrar MetaFinanceiraViewSet
+router.register(r'tarefas', TarefaViewSet)
+router.register(r'regras-categorizacao', RegraCategorizacaoViewSet)
+router.register(r'orcamentos', OrcamentoViewSet)
+router.register(r'anomalias', AnomaliaViewSet)
 
 # As URLs da API para a aplicação 'core'
 urlpatterns = [
@@ -16,5 +20,13 @@ urlpatterns = [
     path('analises/', AnaliseFinanceiraView.as_view(), name='analises_financeiras'),
     path('projecoes/', ProjecaoFinanceiraView.as_view(), name='projecoes_financeiras'),
     path('dashboard/', DashboardView.as_view(), name='dashboard_financeiro'),
+    path('insights/', InsightsView.as_view(), name='insights_financeiros'),
+    path('series/', SerieTemporalView.as_view(), name='series_temporais'),
+    path('saude/', SaudeView.as_view(), name='saude'),
+    path('metricas/', MetricasView.as_view(), name='metricas'),
+    path('changes/', AlteracoesView.as_view(), name='alteracoes'),
+    path('sync/', SincronizacaoView.as_view(), name='sincronizacao'),
+    path('periodos/', PeriodosView.as_view(), name='periodos'),
+    path('relatorios/anual/', RelatorioAnualView.as_view(), name='relatorio_anual'),
     # As URLs de metas serão geradas automaticamente pelo router
 ]
\ No newline at end of file
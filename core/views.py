@@ -1,19 +1,36 @@
 # financas_pessoais/core/views.py
 
-from rest_framework import viewsets
+from rest_framework import viewsets, status, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Sum, F, Q, Avg, StdDev
-from django.db.models.functions import ExtractMonth, ExtractYear
+from django.db.models import Sum, F, Q, Avg, StdDev, Count, Func, Value, Window, RowRange
+from django.db.models.functions import ExtractMonth, ExtractYear, Trunc
+from django.db import connections, DatabaseError
+from django.http import FileResponse, Http404
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
+import logging
+import time
 from decimal import Decimal
 
 import django_filters.rest_framework
 
-from .models import Categoria, Transacao, MetaFinanceira
-from .serializers import CategoriaSerializer, TransacaoSerializer, MetaFinanceiraSerializer
+from .models import Categoria, Transacao, MetaFinanceira, Tarefa, RegraCategorizacao, Orcamento, RegistroAlteracao, SequenciaAlteracao, Anomalia
+from .serializers import CategoriaSerializer, TransacaoSerializer, MetaFinanceiraSerializer, InsightsAnoSerializer, TarefaSerializer, RegraCategorizacaoSerializer, OrcamentoSerializer, RegistroAlteracaoSerializer, AnomaliaSerializer
 from .filters import TransacaoFilter
+from .dinheiro import dividir, soma, para_decimal
+from .roteamento import LeituraEmReplicaMixin
+from .renderers import para_colunar
+from .insights import periodo_analise, montar_contexto, avaliar_regras, obter_insights
+from .categorizacao import aplicar_regras
+from . import metricas
+# Já carregados pelos sinais (AppConfig.ready) e pelos serializers; só simulacao, deteccao e
+# relatorios (NumPy, openpyxl, reportlab) são importados dentro das views que os usam
+from . import insights, resumos, orcamentos, tarefas, facetas, categorias, periodos, coalescencia
+
+logger = logging.getLogger(__name__)
 
 # Definir monthNamesFull aqui para uso no backend
 monthNamesFull = [
@@ -22,16 +39,37 @@ monthNamesFull = [
 ]
 
 
+class CamposEsparsosViewSetMixin:
+    """
+    ?fields=a,b,c nas listagens/detalhes: o serializer devolve só esses campos e a consulta
+    carrega só as colunas necessárias (.only()), em vez da linha inteira.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            colunas = self.get_serializer().colunas_necessarias()
+            if colunas is not None:
+                queryset = queryset.only(*colunas)
+        return queryset
+
+
 # ViewSet para o modelo Categoria
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(CamposEsparsosViewSetMixin, LeituraEmReplicaMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite que categorias sejam visualizadas ou editadas.
     """
     queryset = Categoria.objects.all().order_by('nome')
     serializer_class = CategoriaSerializer
 
+    def list(self, request, *args, **kwargs):
+        # Sem parâmetros (?fields=, ?format=...), a lista completa vem do mapa em memória (core/categorias.py)
+        if not request.query_params:
+            return Response(list(categorias.mapa_categorias().values()))
+        return super().list(request, *args, **kwargs)
+
 # ViewSet para o modelo Transacao (AGORA CONSOLIDADO COM FILTROS)
-class TransacaoViewSet(viewsets.ModelViewSet):
+class TransacaoViewSet(CamposEsparsosViewSetMixin, LeituraEmReplicaMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite que transações sejam visualizadas ou editadas.
     Agora com suporte a filtros por data, valor, categoria, tipo e status.
@@ -41,17 +79,65 @@ class TransacaoViewSet(viewsets.ModelViewSet):
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
     filterset_class = TransacaoFilter
 
+    def list(self, request, *args, **kwargs):
+        # ?formato=colunar: nomes dos campos uma única vez e cada transação como lista de valores,
+        # em vez de repetir as chaves em todos os objetos (bem menor em listas grandes)
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('formato') == 'colunar':
+            response.data = para_colunar(response.data, list(self.get_serializer().fields))
+        return response
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Contagens e totais por tipo, status, categoria e mês para os filtros atuais
+        (os mesmos da listagem), numa única consulta agrupada e com cache por filtro.
+        """
+        return Response(facetas.facetas_em_cache(self.filter_queryset(self.get_queryset()), request.query_params))
+
+    @action(detail=False, methods=['post'])
+    def recategorizar(self, request):
+        """
+        Recategoriza em lote (um único UPDATE) as transações que atendem aos filtros da query string.
+        Corpo: {"categoria": <id>}. Com ?dry_run=1 apenas informa quantas seriam alteradas.
+        """
+        categoria = Categoria.objects.filter(pk=request.data.get('categoria')).first()
+        if categoria is None:
+            return Response({'categoria': "Categoria inválida."}, status=status.HTTP_400_BAD_REQUEST)
 
-class AnaliseFinanceiraView(APIView):
+        transacoes = self.filter_queryset(self.get_queryset()).exclude(categoria=categoria)
+        if request.query_params.get('dry_run') in ('1', 'true'):
+            return Response({'dry_run': True, 'afetadas': transacoes.count()})
+
+        anos = set(transacoes.annotate(ano=ExtractYear('data_transacao')).values_list('ano', flat=True).order_by().distinct())
+        afetadas = transacoes.update(
+            categoria=categoria,
+            categoria_nome=categoria.nome,
+            categoria_tipo=categoria.tipo_categoria,
+            data_atualizacao=timezone.now()
+        )
+        if afetadas:
+            resumos.invalidar_anos(*anos)
+            orcamentos.recalcular_gastos(anos=anos)
+            insights.agendar_atualizacao(*anos, *(ano + 1 for ano in anos))
+        return Response({'dry_run': False, 'afetadas': afetadas})
+
+
+class AnaliseFinanceiraView(LeituraEmReplicaMixin, APIView):
     """
     API endpoint para análises financeiras (gastos por categoria por mês e saldo mensal).
-    Agora com filtros por mês e categoria.
+    Agora com filtros por mês, ano e categoria.
+    Sem ?year=, o filtro de mês junta o mesmo mês de todos os anos; para intervalos
+    arbitrários use /api/series/.
     """
     def get(self, request, format=None):
         month_param = request.query_params.get('month', None)
+        year_param = request.query_params.get('year', None)
         category_param = request.query_params.get('categoria', None)
 
         filters = Q()
+        if year_param:
+            filters &= Q(data_transacao__year=year_param)
         if month_param:
             filters &= Q(data_transacao__month=month_param)
         if category_param:
@@ -62,15 +148,16 @@ class AnaliseFinanceiraView(APIView):
             .filter(filters)
             .annotate(
                 mes=ExtractMonth('data_transacao'),
-                ano=ExtractYear('data_transacao'),
-                categoria_nome=F('categoria__nome')
+                ano=ExtractYear('data_transacao')
             )
-            .values('ano', 'mes', 'categoria_nome')
-            .annotate(total=Sum('valor'))
+            .values('ano', 'mes', 'categoria_nome') # categoria_nome é a coluna desnormalizada (sem JOIN)
+            .annotate(total=soma())
             .order_by('ano', 'mes', 'categoria_nome')
         )
 
         saldo_mensal_filters = Q()
+        if year_param:
+            saldo_mensal_filters &= Q(data_transacao__year=year_param)
         if month_param:
             saldo_mensal_filters &= Q(data_transacao__month=month_param)
 
@@ -84,16 +171,16 @@ class AnaliseFinanceiraView(APIView):
             )
             .values('ano', 'mes')
             .annotate(
-                receita_total=Sum('valor', filter=Q(tipo='receita')),
-                despesa_total=Sum('valor', filter=Q(tipo='despesa'))
+                receita_total=soma(filter=Q(tipo='receita')),
+                despesa_total=soma(filter=Q(tipo='despesa'))
             )
             .order_by('ano', 'mes')
         )
 
         saldo_mensal_formatado = []
         for item in saldo_mensal:
-            receita = item['receita_total'] if item['receita_total'] is not None else Decimal('0.00')
-            despesa = item['despesa_total'] if item['despesa_total'] is not None else Decimal('0.00')
+            receita = para_decimal(item['receita_total'])
+            despesa = para_decimal(item['despesa_total'])
             saldo_mensal_formatado.append({
                 'ano': item['ano'],
                 'mes': item['mes'],
@@ -103,18 +190,19 @@ class AnaliseFinanceiraView(APIView):
             })
 
         data = {
-            'gastos_por_categoria_mes': list(gastos_por_categoria_mes),
+            'gastos_por_categoria_mes': [{**item, 'total': para_decimal(item['total'])} for item in gastos_por_categoria_mes],
             'saldo_mensal': saldo_mensal_formatado,
         }
         return Response(data)
 
 # ProjecaoFinanceiraView - COM NOVAS FUNCIONALIDADES E CORREÇÃO DA MÉDIA
-class ProjecaoFinanceiraView(APIView):
+class ProjecaoFinanceiraView(LeituraEmReplicaMixin, APIView):
     """
     API endpoint para projeções financeiras.
     Calcula média de gastos, sugere valor para guardar,
     e agora fornece alertas, sugestões, e diversas projeções e médias.
     """
+    @coalescencia.agrupar('projecoes')
     def get(self, request, format=None):
         # Parâmetro para o ano selecionado (novo filtro)
         selected_year = int(request.query_params.get('year', timezone.now().year))
@@ -125,13 +213,9 @@ class ProjecaoFinanceiraView(APIView):
         # Tipo de cálculo da média (mantido para compatibilidade, mas a lógica será mais robusta)
         tipo_media_calculo = request.query_params.get('tipo_media_calculo', 'meses_com_transacao')
 
-        # Definir o período de análise (últimos X meses do ano selecionado, até o mês atual se for o ano corrente)
-        end_date_for_analysis = timezone.now().date() if selected_year == timezone.now().year else timezone.datetime(selected_year, 12, 31).date()
-        start_date_for_analysis = end_date_for_analysis - timedelta(days=30 * meses_para_analise)
-        
-        # Garante que a data de início da análise não seja anterior ao início do ano selecionado
-        if start_date_for_analysis.year < selected_year:
-            start_date_for_analysis = timezone.datetime(selected_year, 1, 1).date()
+        # Definir o período de análise (últimos X meses do ano selecionado, até o mês atual se for o ano corrente).
+        # A data de início nunca é anterior ao início do ano selecionado.
+        start_date_for_analysis, end_date_for_analysis = periodo_analise(selected_year, meses_para_analise)
 
         # Todas as transações DENTRO DO PERÍODO DE ANÁLISE definido
         all_transactions_in_analysis_period = Transacao.objects.filter(
@@ -150,8 +234,8 @@ class ProjecaoFinanceiraView(APIView):
             .annotate(month=ExtractMonth('data_transacao'), year=ExtractYear('data_transacao'))
             .values('month', 'year')
             .annotate(
-                total_receita_mes=Sum('valor', filter=Q(tipo='receita')),
-                total_despesa_mes=Sum('valor', filter=Q(tipo='despesa'))
+                total_receita_mes=soma(filter=Q(tipo='receita')),
+                total_despesa_mes=soma(filter=Q(tipo='despesa'))
             )
             .order_by('year', 'month')
         )
@@ -159,15 +243,21 @@ class ProjecaoFinanceiraView(APIView):
         # Contar quantos meses *tiveram transações* no período de análise
         months_with_actual_transactions = monthly_summary.count()
         
-        # Calcular totais para o período de análise
-        total_despesas_analysis_period = despesas_in_analysis_period.aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-        total_receitas_analysis_period = receitas_in_analysis_period.aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        # Calcular totais para o período de análise.
+        # Os totais, médias e projeções ficam brutos (int em centavos, se configurado) e arredondados
+        # ao centavo a cada divisão (dividir); só viram Decimal na saída.
+        total_despesas_bruto = despesas_in_analysis_period.aggregate(total=soma())['total'] or 0
+        total_receitas_bruto = receitas_in_analysis_period.aggregate(total=soma())['total'] or 0
+        total_despesas_analysis_period = para_decimal(total_despesas_bruto)
+        total_receitas_analysis_period = para_decimal(total_receitas_bruto)
 
         # O divisor para a média mensal geral será o número de meses com transações
-        divisor_general_avg = Decimal(months_with_actual_transactions) if months_with_actual_transactions > 0 else Decimal(1)
+        divisor_general_avg = months_with_actual_transactions if months_with_actual_transactions > 0 else 1
 
-        media_mensal_despesas_geral = total_despesas_analysis_period / divisor_general_avg
-        media_mensal_receitas_geral = total_receitas_analysis_period / divisor_general_avg
+        media_despesas_bruta = dividir(total_despesas_bruto, divisor_general_avg)
+        media_receitas_bruta = dividir(total_receitas_bruto, divisor_general_avg)
+        media_mensal_despesas_geral = para_decimal(media_despesas_bruta)
+        media_mensal_receitas_geral = para_decimal(media_receitas_bruta)
 
 
         # --- CÁLCULO DA MÉDIA MENSAL DE DESPESAS POR CATEGORIA (CORRIGIDO) ---
@@ -175,15 +265,15 @@ class ProjecaoFinanceiraView(APIView):
         monthly_category_expenses = (
             despesas_in_analysis_period
             .annotate(month=ExtractMonth('data_transacao'), year=ExtractYear('data_transacao'))
-            .values('categoria__nome', 'month', 'year')
-            .annotate(total_gasto_mes=Sum('valor'))
-            .order_by('categoria__nome', 'year', 'month')
+            .values('categoria_nome', 'month', 'year')
+            .annotate(total_gasto_mes=soma())
+            .order_by('categoria_nome', 'year', 'month')
         )
 
         # Dicionário para armazenar as somas mensais por categoria: {categoria: [total_mes1, total_mes2, ...]}
         category_monthly_totals = {}
         for item in monthly_category_expenses:
-            cat_name = item['categoria__nome'] or 'Sem Categoria'
+            cat_name = item['categoria_nome'] or 'Sem Categoria'
             if cat_name not in category_monthly_totals:
                 category_monthly_totals[cat_name] = []
             category_monthly_totals[cat_name].append(item['total_gasto_mes'])
@@ -191,11 +281,13 @@ class ProjecaoFinanceiraView(APIView):
         # Calcular a média dessas somas mensais para cada categoria
         projecao_despesa_media_mensal_por_categoria = []
         for cat_name, totals_list in category_monthly_totals.items():
-            # A média é a soma total da categoria dividida pelo NÚMERO DE MESES EM QUE HOUVE GASTO para aquela categoria
-            total_sum_for_category = sum(totals_list)
+            # A média é a soma total da categoria dividida pelo NÚMERO DE MESES EM QUE HOUVE GASTO para aquela categoria.
+            # Soma e média são feitas nos valores brutos (int em centavos, se configurado) e convertidas uma única vez.
+            total_bruto_for_category = sum(totals_list)
             num_months_with_expense_for_category = len(totals_list)
+            total_sum_for_category = para_decimal(total_bruto_for_category)
             
-            avg_valor_for_category = total_sum_for_category / Decimal(num_months_with_expense_for_category)
+            avg_valor_for_category = para_decimal(dividir(total_bruto_for_category, num_months_with_expense_for_category))
             
             projecao_despesa_media_mensal_por_categoria.append({
                 'categoria__nome': cat_name,
@@ -207,142 +299,75 @@ class ProjecaoFinanceiraView(APIView):
         projecao_despesa_media_mensal_por_categoria.sort(key=lambda x: x['categoria__nome'] or '')
 
         # --- OUTROS CÁLCULOS (reutilizando médias gerais) ---
-        media_diaria_despesas = media_mensal_despesas_geral / Decimal('30.44') # Média de dias no mês
-        media_semanal_despesas = media_mensal_despesas_geral / Decimal('4.345') # Média de semanas no mês
+        media_diaria_despesas = para_decimal(dividir(media_despesas_bruta, Decimal('30.44'))) # Média de dias no mês
+        media_semanal_despesas = para_decimal(dividir(media_despesas_bruta, Decimal('4.345'))) # Média de semanas no mês
         
-        projecao_3_meses_despesa = media_mensal_despesas_geral * 3
-        projecao_3_meses_receita = media_mensal_receitas_geral * 3
-        projecao_3_meses_saldo = projecao_3_meses_receita - projecao_3_meses_despesa
+        projecao_3_meses_despesa = para_decimal(media_despesas_bruta * 3)
+        projecao_3_meses_receita = para_decimal(media_receitas_bruta * 3)
+        projecao_3_meses_saldo = para_decimal((media_receitas_bruta - media_despesas_bruta) * 3)
 
         # --- Recomendação de Guardar (LÓGICA REFINADA) ---
-        valor_recomendado_guardar = Decimal('0.00')
+        # Calculada nos valores brutos, como as médias acima
+        guardar_bruto = 0
         
         # Pegar os saldos mensais do ano selecionado
         positive_monthly_saldos = []
         for item in monthly_summary:
-            receita = item['total_receita_mes'] if item['total_receita_mes'] is not None else Decimal('0.00')
-            despesa = item['total_despesa_mes'] if item['total_despesa_mes'] is not None else Decimal('0.00')
-            saldo_final_mes = receita - despesa
+            # Saldos calculados nos valores brutos (int em centavos, se configurado)
+            saldo_final_mes = (item['total_receita_mes'] or 0) - (item['total_despesa_mes'] or 0)
             if saldo_final_mes > 0:
                 positive_monthly_saldos.append(saldo_final_mes)
         
         if positive_monthly_saldos:
             # Sugestão 1: Média dos saldos positivos
-            avg_positive_saldo = sum(positive_monthly_saldos) / Decimal(len(positive_monthly_saldos))
-            valor_recomendado_guardar = avg_positive_saldo
+            guardar_bruto = dividir(sum(positive_monthly_saldos), len(positive_monthly_saldos))
             
             # Se a média dos saldos positivos for muito baixa (ex: menos de 5% da receita média),
             # talvez ainda sugira um mínimo percentual da receita, ou o maior dos dois.
-            if media_mensal_receitas_geral > 0:
-                min_percent_of_income = media_mensal_receitas_geral * Decimal('0.05') # Ex: 5% da receita
-                if valor_recomendado_guardar < min_percent_of_income:
-                    valor_recomendado_guardar = min_percent_of_income # Garante um mínimo
+            if media_receitas_bruta > 0:
+                min_percent_of_income = dividir(media_receitas_bruta * 5, 100) # Ex: 5% da receita
+                if guardar_bruto < min_percent_of_income:
+                    guardar_bruto = min_percent_of_income # Garante um mínimo
         else:
             # Se não houve saldos positivos, sugira um percentual da receita média (ex: 5%)
-            if media_mensal_receitas_geral > 0:
-                valor_recomendado_guardar = media_mensal_receitas_geral * Decimal('0.05')
+            if media_receitas_bruta > 0:
+                guardar_bruto = dividir(media_receitas_bruta * 5, 100)
+        valor_recomendado_guardar = para_decimal(guardar_bruto)
 
 
         # --- LÓGICA DE ALERTAS E SUGESTÕES ---
-        alerts = []
-        suggestions = []
-        financial_status = "EXCELLENT" # Padrão
-        
-        # 1. Alerta de Saldo Negativo no Ano Selecionado
-        num_negative_months = 0
-        total_months_in_summary = monthly_summary.count()
-        for item in monthly_summary:
-            receita = item['total_receita_mes'] if item['total_receita_mes'] is not None else Decimal('0.00')
-            despesa = item['total_despesa_mes'] if item['total_despesa_mes'] is not None else Decimal('0.00')
-            saldo_final = receita - despesa
-            
-            if saldo_final < 0:
-                num_negative_months += 1
-        
-        if total_months_in_summary > 0:
-            if num_negative_months > (total_months_in_summary / 2): # Mais da metade dos meses com dados
-                alerts.append({
-                    'type': 'warning',
-                    'message': f"Atenção: Seu saldo foi negativo em {num_negative_months} de {total_months_in_summary} meses com transações no ano {selected_year}. É fundamental revisar suas finanças."
-                })
-                financial_status = "CRITICAL"
-            elif num_negative_months > 0:
-                alerts.append({
-                    'type': 'info',
-                    'message': f"Seu saldo foi negativo em {num_negative_months} meses com transações no ano {selected_year}. Fique de olho!"
-                })
-                if financial_status == "EXCELLENT": financial_status = "GOOD"
+        # As regras ficam em core/insights.py. No período padrão (12 meses) os insights
+        # já estão persistidos e são lidos em O(1); em outros períodos são avaliados na hora.
+        if meses_para_analise == 12:
+            insights_ano = obter_insights(selected_year)
+            alerts = list(insights_ano.alertas)
+            suggestions = list(insights_ano.sugestoes)
+            financial_status = insights_ano.status_financeiro
         else:
-            alerts.append({'type': 'info', 'message': f"Nenhum dado financeiro para o ano {selected_year}. Adicione transações para ver as projeções!"})
-
-
-        # 2. Alertas de Gastos em Categorias Excedem Padrões Históricos (em relação à média do ano anterior)
-        previous_year = selected_year - 1
-        despesas_previous_year_data = Transacao.objects.filter(
-            tipo='despesa',
-            data_transacao__year=previous_year
-        )
-        
-        # Agrupar despesas do ano anterior por categoria E por mês/ano
-        monthly_category_expenses_prev_year = (
-            despesas_previous_year_data
-            .annotate(month=ExtractMonth('data_transacao'), year=ExtractYear('data_transacao'))
-            .values('categoria__nome', 'month', 'year')
-            .annotate(total_gasto_mes=Sum('valor'))
-            .order_by('categoria__nome', 'year', 'month')
-        )
-        
-        # Calcular a média mensal de gastos por categoria para o ano anterior
-        prev_year_category_monthly_totals = {}
-        for item in monthly_category_expenses_prev_year:
-            cat_name = item['categoria__nome'] or 'Sem Categoria'
-            if cat_name not in prev_year_category_monthly_totals:
-                prev_year_category_monthly_totals[cat_name] = []
-            prev_year_category_monthly_totals[cat_name].append(item['total_gasto_mes'])
-
-        previous_year_avg_map = {}
-        for cat_name, totals_list in prev_year_category_monthly_totals.items():
-            if totals_list:
-                previous_year_avg_map[cat_name] = sum(totals_list) / Decimal(len(totals_list))
-            else:
-                previous_year_avg_map[cat_name] = Decimal('0.00')
-
-
-        for item_categoria_atual in projecao_despesa_media_mensal_por_categoria:
-            cat_nome = item_categoria_atual['categoria__nome']
-            current_avg_valor = item_categoria_atual['avg_valor'] or Decimal('0.00')
-            
-            if cat_nome in previous_year_avg_map and previous_year_avg_map[cat_name] is not None:
-                historic_avg = previous_year_avg_map[cat_name]
-                if historic_avg > 0 and current_avg_valor > historic_avg * Decimal('1.25'): # Aumento de 25%
-                    alerts.append({
-                        'type': 'warning',
-                        'message': f"Gasto alto em {cat_nome}: R$ {current_avg_valor:.2f}/mês é significativamente maior que sua média de R$ {historic_avg:.2f}/mês no ano anterior. Analise este aumento!"
-                    })
-                    if financial_status == "EXCELLENT": financial_status = "GOOD"
-                elif historic_avg > 0 and current_avg_valor < historic_avg * Decimal('0.75'): # Redução de 25%
-                    suggestions.append({
-                        'type': 'success',
-                        'message': f"Ótimo trabalho em {cat_nome}! Seus gastos de R$ {current_avg_valor:.2f}/mês estão bem abaixo da média de R$ {historic_avg:.2f}/mês do ano anterior. Continue assim!"
-                    })
-            elif current_avg_valor > 0 and media_mensal_despesas_geral > 0 and current_avg_valor > media_mensal_despesas_geral * Decimal('0.4'):
-                # Se não há histórico na categoria, mas o gasto é grande parte do total
-                 alerts.append({
-                    'type': 'info',
-                    'message': f"Atenção: Grande parte de suas despesas em {selected_year} vem de {cat_nome} (R$ {current_avg_valor:.2f}/mês). Monitore esta categoria de perto."
-                })
-                 if financial_status == "EXCELLENT": financial_status = "GOOD"
+            saldos_mensais = [
+                para_decimal(item['total_receita_mes']) - para_decimal(item['total_despesa_mes'])
+                for item in monthly_summary
+            ]
+            contexto = montar_contexto(
+                selected_year,
+                saldos_mensais,
+                {item['categoria__nome']: item['avg_valor'] for item in projecao_despesa_media_mensal_por_categoria},
+                media_mensal_despesas_geral,
+            )
+            resultado_insights = avaliar_regras(contexto)
+            alerts = resultado_insights['alerts']
+            suggestions = resultado_insights['suggestions']
+            financial_status = resultado_insights['status_financeiro']
         
         # --- Tendência Geral de Despesas/Receitas (comparar os dois últimos meses com transações) ---
         # Encontrar os dois últimos meses com transações
         last_two_months = (
-            Transacao.objects
-            .filter(data_transacao__year=selected_year) # Ainda filtrando pelo ano selecionado para contextualizar
-            .annotate(month=ExtractMonth('data_transacao'), year=ExtractYear('data_transacao'))
-            .order_by('-year', '-month') # Ordenar do mais recente para o mais antigo
-            .values('month', 'year')
+            periodos.periodos_com_dados(selected_year) # Ainda filtrando pelo ano selecionado para contextualizar
+            .order_by('-ano', '-mes') # Ordenar do mais recente para o mais antigo
+            .values('mes', 'ano')
             .distinct()[:2] # Pegar os dois primeiros (mais recentes)
         )
+        last_two_months = [{'month': item['mes'], 'year': item['ano']} for item in last_two_months]
         
         period_one_data = {'month': None, 'year': None, 'total_despesas': Decimal('0.00'), 'total_receitas': Decimal('0.00')}
         period_two_data = {'month': None, 'year': None, 'total_despesas': Decimal('0.00'), 'total_receitas': Decimal('0.00')}
@@ -355,8 +380,8 @@ class ProjecaoFinanceiraView(APIView):
             )
             period_one_data['month'] = month_one['month']
             period_one_data['year'] = month_one['year']
-            period_one_data['total_despesas'] = period_one_transactions.filter(tipo='despesa').aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-            period_one_data['total_receitas'] = period_one_transactions.filter(tipo='receita').aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+            period_one_data['total_despesas'] = para_decimal(period_one_transactions.filter(tipo='despesa').aggregate(total=soma())['total'])
+            period_one_data['total_receitas'] = para_decimal(period_one_transactions.filter(tipo='receita').aggregate(total=soma())['total'])
 
         if len(last_two_months) == 2:
             month_two = last_two_months[1]
@@ -366,8 +391,8 @@ class ProjecaoFinanceiraView(APIView):
             )
             period_two_data['month'] = month_two['month']
             period_two_data['year'] = month_two['year']
-            period_two_data['total_despesas'] = period_two_transactions.filter(tipo='despesa').aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-            period_two_data['total_receitas'] = period_two_transactions.filter(tipo='receita').aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+            period_two_data['total_despesas'] = para_decimal(period_two_transactions.filter(tipo='despesa').aggregate(total=soma())['total'])
+            period_two_data['total_receitas'] = para_decimal(period_two_transactions.filter(tipo='receita').aggregate(total=soma())['total'])
 
         # Tendência Despesas
         trend_despesas = 0.0
@@ -431,35 +456,26 @@ class ProjecaoFinanceiraView(APIView):
         }
 
         # Calcula a economia real do ano selecionado (saldo anual)
-        receita_ano_selecionado_total = Transacao.objects.filter(
+        receita_ano_selecionado_total = para_decimal(Transacao.objects.filter(
             tipo='receita',
             data_transacao__year=selected_year
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        ).aggregate(total=soma())['total'])
 
-        despesa_ano_selecionado_total = Transacao.objects.filter(
+        despesa_ano_selecionado_total = para_decimal(Transacao.objects.filter(
             tipo='despesa',
             data_transacao__year=selected_year
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        ).aggregate(total=soma())['total'])
 
         economia_real_no_ano_selecionado = receita_ano_selecionado_total - despesa_ano_selecionado_total
 
-        # Obter os anos com transações para o filtro no frontend
-        years_with_data = Transacao.objects.annotate(year=ExtractYear('data_transacao')).values_list('year', flat=True).distinct().order_by('-year')
+        # Obter os anos com transações para o filtro no frontend (índice de períodos, sem varrer as transações)
+        years_with_data = periodos.anos_disponiveis()
         
         # Obter os meses com transações para o ano selecionado
-        months_with_data_in_selected_year_query = (
-            Transacao.objects
-            .filter(data_transacao__year=selected_year)
-            .annotate(month=ExtractMonth('data_transacao'))
-            .values('month')
-            .distinct()
-            .order_by('month')
-        )
-        
         available_months_data = []
-        for month_num in months_with_data_in_selected_year_query:
-            month_label = monthNamesFull[month_num['month'] - 1] # Usar monthNamesFull
-            available_months_data.append({'value': month_num['month'], 'label': month_label})
+        for month_num in periodos.meses_disponiveis(selected_year):
+            month_label = monthNamesFull[month_num - 1] # Usar monthNamesFull
+            available_months_data.append({'value': month_num, 'label': month_label})
 
 
         # --- Saída de Dados ---
@@ -501,13 +517,14 @@ class ProjecaoFinanceiraView(APIView):
         return Response(data)
 
 # DashboardView - SEM ALTERAÇÕES NESTA CORREÇÃO (mas deve ser definida antes de qualquer uso)
-class DashboardView(APIView):
+class DashboardView(LeituraEmReplicaMixin, APIView):
     """
     API endpoint para dados do Dashboard Financeiro.
     Inclui total gasto no mês, despesas pendentes, saldo projetado e gráficos.
     Suporta filtro por mês e ano via query parameters (?month=X&year=Y).
     Adiciona opção para ver dados agregados de todos os meses (?period=all).
     """
+    @coalescencia.agrupar('dashboard')
     def get(self, request, format=None):
         period = request.query_params.get('period', 'month').lower()
 
@@ -523,27 +540,27 @@ class DashboardView(APIView):
             }
             mes_referencia_display = f"{current_month:02d}/{current_year}"
 
-        total_gasto_periodo = Transacao.objects.filter(
+        total_gasto_periodo = para_decimal(Transacao.objects.filter(
             tipo='despesa',
             **date_filter
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        ).aggregate(total=soma())['total'])
 
-        total_despesas_pendentes = Transacao.objects.filter(
+        total_despesas_pendentes = para_decimal(Transacao.objects.filter(
             tipo='despesa',
             status='pendente',
             **date_filter
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        ).aggregate(total=soma())['total'])
 
-        receitas_periodo = Transacao.objects.filter(
+        receitas_periodo = para_decimal(Transacao.objects.filter(
             tipo='receita',
             **date_filter
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        ).aggregate(total=soma())['total'])
 
-        despesas_pagas_periodo = Transacao.objects.filter(
+        despesas_pagas_periodo = para_decimal(Transacao.objects.filter(
             tipo='despesa',
             status='pago',
             **date_filter
-        ).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        ).aggregate(total=soma())['total'])
 
         saldo_final_projetado = receitas_periodo - despesas_pagas_periodo - total_despesas_pendentes
 
@@ -552,8 +569,8 @@ class DashboardView(APIView):
                 tipo='despesa',
                 **date_filter
             )
-            .values('categoria__nome')
-            .annotate(total=Sum('valor'))
+            .values(categoria__nome=F('categoria_nome')) # Mantém a chave da resposta, agrupando sem JOIN
+            .annotate(total=soma())
             .order_by('categoria__nome')
         )
 
@@ -563,7 +580,7 @@ class DashboardView(APIView):
                 **date_filter
             )
             .values('status')
-            .annotate(total=Sum('valor'))
+            .annotate(total=soma())
             .order_by('status')
         )
 
@@ -574,15 +591,487 @@ class DashboardView(APIView):
             'saldo_final_projetado': saldo_final_projetado,
             'receitas_mes_atual': receitas_periodo,
             'despesas_pagas_mes_atual': despesas_pagas_periodo,
-            'gastos_por_categoria_mes_atual': list(gastos_por_categoria_periodo),
-            'gastos_por_status_mes_atual': list(gastos_por_status_periodo),
+            'gastos_por_categoria_mes_atual': [{**item, 'total': para_decimal(item['total'])} for item in gastos_por_categoria_periodo],
+            'gastos_por_status_mes_atual': [{**item, 'total': para_decimal(item['total'])} for item in gastos_por_status_periodo],
         }
         return Response(data)
 
 # ViewSet para Metas Financeiras
-class MetaFinanceiraViewSet(viewsets.ModelViewSet):
+class MetaFinanceiraViewSet(CamposEsparsosViewSetMixin, LeituraEmReplicaMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite que metas financeiras sejam visualizadas ou editadas.
+    As ações simulacao/ estimam, por Monte Carlo sobre o histórico mensal (core/simulacao.py), a
+    probabilidade de cada meta atingir o valor alvo até a data limite, com faixas de percentis:
+      - GET /api/metas/simulacao/: todas as metas abertas; GET /api/metas/<id>/simulacao/: uma meta
+      - ?caminhos=N (padrão 10000; caminhos x meses limitado a simulacao.CELULAS_MAXIMAS),
+        ?historico=meses (padrão 24), ?fracao=0..1 (parte do saldo mensal destinada à meta,
+        padrão 1) e ?semente=N (resultado reproduzível)
     """
     queryset = MetaFinanceira.objects.all().order_by('data_limite', '-data_criacao')
-    serializer_class = MetaFinanceiraSerializer
\ No newline at end of file
+    serializer_class = MetaFinanceiraSerializer
+    acoes_em_replica = ('list', 'retrieve', 'simulacao', 'simular_todas')
+
+    def _simular(self, request, metas):
+        from . import simulacao # NumPy só é carregado por quem usa a simulação
+        try:
+            caminhos = int(request.query_params.get('caminhos', simulacao.CAMINHOS))
+            historico = int(request.query_params.get('historico', simulacao.HISTORICO_MESES))
+            fracao = float(request.query_params.get('fracao', 1))
+            semente = request.query_params.get('semente')
+            semente = int(semente) if semente is not None else None
+        except ValueError:
+            raise ValidationError({'detail': "Parâmetros 'caminhos', 'historico', 'fracao' e 'semente' devem ser números."})
+        if not 1 <= caminhos <= simulacao.CAMINHOS_MAXIMOS:
+            raise ValidationError({'caminhos': f"Informe entre 1 e {simulacao.CAMINHOS_MAXIMOS} caminhos."})
+        if historico < 1:
+            raise ValidationError({'historico': "Informe pelo menos 1 mês de histórico."})
+        if not 0 < fracao <= 1:
+            raise ValidationError({'fracao': "Informe uma fração maior que 0 e até 1."})
+        metas = list(metas)
+        meses = simulacao.meses_simulados(metas)
+        if caminhos * meses > simulacao.CELULAS_MAXIMAS:
+            raise ValidationError({'caminhos': (
+                f"Para {meses} meses, informe no máximo {simulacao.CELULAS_MAXIMAS // meses} caminhos."
+            )})
+        return Response(simulacao.simular(metas, caminhos=caminhos, historico=historico, fracao=fracao, semente=semente))
+
+    @action(detail=True, methods=['get'])
+    def simulacao(self, request, pk=None):
+        return self._simular(request, [self.get_object()])
+
+    @action(detail=False, methods=['get'], url_path='simulacao')
+    def simular_todas(self, request):
+        return self._simular(request, self.get_queryset().filter(concluida=False))
+
+# ViewSet para os orçamentos mensais por categoria
+class OrcamentoViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint que permite que orçamentos sejam visualizados ou editados.
+    /api/orcamentos/status/?ano=AAAA&mes=M traz a utilização de todos eles no mês (padrão: mês atual).
+    """
+    queryset = Orcamento.objects.select_related('categoria').order_by('categoria__nome')
+    serializer_class = OrcamentoSerializer
+
+    @action(detail=False, methods=['get'])
+    def status(self, request):
+        hoje = timezone.now().date()
+        try:
+            ano = int(request.query_params.get('ano', hoje.year))
+            mes = int(request.query_params.get('mes', hoje.month))
+        except ValueError:
+            raise ValidationError({'detail': "Parâmetros 'ano' e 'mes' devem ser números."})
+        if not 1 <= mes <= 12:
+            raise ValidationError({'mes': "Informe um mês entre 1 e 12."})
+        return Response(orcamentos.status_orcamentos(ano, mes))
+
+
+# ViewSet para os achados da detecção de anomalias (core/deteccao.py)
+class AnomaliaViewSet(mixins.UpdateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint com as possíveis duplicatas e os gastos mensais atípicos encontrados.
+    Filtros: ?tipo=duplicata|atipico, ?situacao=aberta|confirmada|descartada e ?categoria=<id>.
+    PATCH em situacao registra a revisão (mantida nas próximas execuções da detecção).
+    POST /api/anomalias/detectar/ executa a detecção (incremental; ?completo=1 varre tudo;
+    ?assincrono=1 enfileira como tarefa em segundo plano).
+    """
+    queryset = Anomalia.objects.select_related('categoria').order_by('-data_criacao', '-id')
+    serializer_class = AnomaliaSerializer
+    filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
+    filterset_fields = ['tipo', 'situacao', 'categoria']
+
+    @action(detail=False, methods=['post'])
+    def detectar(self, request):
+        completo = request.query_params.get('completo') in ('1', 'true')
+        if request.query_params.get('assincrono') in ('1', 'true'):
+            tarefa_criada = tarefas.enfileirar('deteccao.executar', completo=completo)
+            return Response(TarefaSerializer(tarefa_criada).data, status=status.HTTP_202_ACCEPTED)
+        from .deteccao import executar # NumPy só é carregado por quem usa a detecção
+        return Response(executar(completo=completo))
+
+
+class AlteracoesView(LeituraEmReplicaMixin, APIView):
+    """
+    Feed incremental do log de alterações de transações e metas.
+    ?since=<sequência> traz as alterações seguintes em ordem (até ?limit=, padrão 500);
+    o cliente guarda 'proximo' e o envia como since na próxima chamada enquanto 'mais' for true.
+    Filtros opcionais: ?modelo=transacao|metafinanceira e ?objeto=<id>.
+    """
+    LIMITE_PADRAO = 500
+    LIMITE_MAXIMO = 5000
+
+    def get(self, request, format=None):
+        try:
+            desde = int(request.query_params.get('since', 0))
+            limite = min(int(request.query_params.get('limit', self.LIMITE_PADRAO)), self.LIMITE_MAXIMO)
+        except ValueError:
+            raise ValidationError({'detail': "Parâmetros 'since' e 'limit' devem ser números."})
+        if limite < 1:
+            raise ValidationError({'limit': "Informe um limite positivo."})
+
+        registros = RegistroAlteracao.objects.filter(sequencia__gt=desde).order_by('sequencia')
+        if request.query_params.get('modelo'):
+            registros = registros.filter(modelo=request.query_params['modelo'])
+        if request.query_params.get('objeto'):
+            registros = registros.filter(objeto_id=request.query_params['objeto'])
+        registros = list(registros[:limite + 1])
+        mais = len(registros) > limite
+        registros = registros[:limite]
+        return Response({
+            'alteracoes': RegistroAlteracaoSerializer(registros, many=True).data,
+            'proximo': registros[-1].sequencia if registros else desde,
+            'mais': mais,
+        })
+
+
+class SincronizacaoView(APIView):
+    """
+    Sincronização incremental de transações e metas para clientes offline.
+    Sem ?token= começa uma sincronização completa, paginada pela chave primária (?limit=, padrão
+    2000): enquanto 'mais' for true, chame de novo com ?token=<proximo_token>. A última página traz
+    o token da sequência do log lida no início, e o que mudou durante a paginação vem na próxima
+    sincronização incremental.
+    Com o token de uma sincronização concluída devolve só o que mudou depois dele: objetos
+    criados/alterados (estado atual) e ids excluídos (tombstones), lidos do log de alterações pela
+    sequência (índice da chave primária). O custo é proporcional à quantidade de alterações, não ao
+    tamanho do livro.
+    Fica no primário: token e dados precisam vir do mesmo banco.
+    """
+    LIMITE_ALTERACOES = 2000
+    LIMITE_MAXIMO = 5000
+    COLECOES = {
+        'transacao': ('transacoes', Transacao, TransacaoSerializer),
+        'metafinanceira': ('metas', MetaFinanceira, MetaFinanceiraSerializer),
+    }
+
+    def _completa(self, request, sequencia, modelo_inicial, depois_de, limite):
+        """Uma página da sincronização completa: as coleções em ordem, cada uma pela chave primária."""
+        resposta = {'completo': True}
+        restantes = limite
+        proximo = None
+        modelos = list(self.COLECOES)
+        for indice, modelo in enumerate(modelos):
+            nome, classe, serializer_class = self.COLECOES[modelo]
+            objetos = []
+            if indice >= modelos.index(modelo_inicial) and proximo is None:
+                inicio = depois_de if modelo == modelo_inicial else 0
+                objetos = list(classe.objects.filter(pk__gt=inicio).order_by('pk')[:restantes + 1])
+                if len(objetos) > restantes:
+                    objetos = objetos[:restantes]
+                    proximo = f'{sequencia}:{modelo}:{objetos[-1].pk if objetos else inicio}'
+                restantes -= len(objetos)
+            resposta[nome] = {'alterados': serializer_class(objetos, many=True, context={'request': request}).data, 'excluidos': []}
+        resposta.update(token=proximo or str(sequencia), proximo_token=proximo, mais=proximo is not None)
+        return resposta
+
+    def get(self, request, format=None):
+        try:
+            limite = min(int(request.query_params.get('limit', self.LIMITE_ALTERACOES)), self.LIMITE_MAXIMO)
+        except ValueError:
+            raise ValidationError({'limit': "Informe o limite como número."})
+        if limite < 1:
+            raise ValidationError({'limit': "Informe um limite positivo."})
+        # O token é lido antes dos dados: o que mudar no meio aparece de novo na próxima sincronização
+        ultima = SequenciaAlteracao.objects.filter(pk=1).values_list('ultima', flat=True).first() or 0
+        token = request.query_params.get('token')
+        if not token:
+            return Response(self._completa(request, ultima, next(iter(self.COLECOES)), 0, limite))
+
+        try:
+            if ':' in token:
+                # Continuação de uma sincronização completa: "<sequência>:<modelo>:<última chave>"
+                sequencia, modelo, depois_de = token.split(':')
+                sequencia, depois_de = int(sequencia), int(depois_de)
+                if modelo not in self.COLECOES or not 0 <= sequencia <= ultima:
+                    raise ValueError
+                return Response(self._completa(request, sequencia, modelo, depois_de, limite))
+            desde = int(token)
+        except ValueError:
+            raise ValidationError({'token': "Token de sincronização inválido."})
+        if not 0 <= desde <= ultima:
+            raise ValidationError({'token': "Token de sincronização inválido; faça uma sincronização completa (sem token)."})
+
+        registros = list(
+            RegistroAlteracao.objects
+            .filter(sequencia__gt=desde, sequencia__lte=ultima, modelo__in=list(self.COLECOES))
+            .order_by('sequencia')
+            .values_list('sequencia', 'modelo', 'objeto_id')[:limite + 1]
+        )
+        mais = len(registros) > limite
+        registros = registros[:limite]
+        alterados = {modelo: set() for modelo in self.COLECOES}
+        for _, modelo, objeto_id in registros:
+            alterados[modelo].add(objeto_id)
+
+        token = str(registros[-1][0] if mais else ultima)
+        resposta = {'token': token, 'proximo_token': token if mais else None, 'completo': False, 'mais': mais}
+        for modelo, (nome, classe, serializer_class) in self.COLECOES.items():
+            objetos = list(classe.objects.filter(pk__in=alterados[modelo]).order_by('pk')) if alterados[modelo] else []
+            existentes = {objeto.pk for objeto in objetos}
+            resposta[nome] = {
+                'alterados': serializer_class(objetos, many=True, context={'request': request}).data,
+                'excluidos': sorted(alterados[modelo] - existentes),
+            }
+        return Response(resposta)
+
+
+class InsightsView(APIView):
+    """
+    API endpoint com os alertas e sugestões pré-calculados de um ano (?year=AAAA).
+    Depois de uma mudança nas transações do ano, os insights são reavaliados na primeira leitura
+    (ou pela fila, com TAREFAS_EM_SEGUNDO_PLANO=1); as leituras seguintes são O(1).
+    """
+    def get(self, request, format=None):
+        try:
+            selected_year = int(request.query_params.get('year', timezone.now().year))
+        except ValueError:
+            raise ValidationError({'year': "Informe o ano como número."})
+        if not 1 <= selected_year <= 9999:
+            raise ValidationError({'year': "Informe um ano entre 1 e 9999."})
+        insights_ano = obter_insights(selected_year)
+        return Response(InsightsAnoSerializer(insights_ano).data)
+
+
+# ViewSet (somente leitura) para acompanhar a fila de tarefas em segundo plano
+class TarefaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint com o status das tarefas em segundo plano.
+    Suporta filtro por nome e status (?nome=insights.atualizar&status=falhou).
+    """
+    queryset = Tarefa.objects.all().order_by('-data_criacao')
+    serializer_class = TarefaSerializer
+    filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
+    filterset_fields = ['nome', 'status']
+
+
+# ViewSet para as regras de categorização automática
+class RegraCategorizacaoViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint para as regras de categorização automática.
+    Novas transações sem categoria são categorizadas pelas regras ativas ao serem gravadas.
+    As ações aplicar/ recategorizam o histórico com a mesma semântica das transações novas
+    (um UPDATE por regra, na ordem de prioridade; ver categorizacao.aplicar_regras):
+      - ?dry_run=1: apenas conta as transações que seriam alteradas
+      - ?somente_sem_categoria=1: não sobrescreve categorias já definidas
+      - ?assincrono=1: enfileira a aplicação como tarefa em segundo plano
+    """
+    queryset = RegraCategorizacao.objects.select_related('categoria').order_by('prioridade', 'id')
+    serializer_class = RegraCategorizacaoSerializer
+
+    def _aplicar(self, request, regras):
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        somente_sem_categoria = request.query_params.get('somente_sem_categoria') in ('1', 'true')
+        if request.query_params.get('assincrono') in ('1', 'true') and not dry_run:
+            tarefa_criada = tarefas.enfileirar(
+                'categorizacao.aplicar',
+                regras=[regra.id for regra in regras],
+                somente_sem_categoria=somente_sem_categoria,
+            )
+            return Response(TarefaSerializer(tarefa_criada).data, status=status.HTTP_202_ACCEPTED)
+        resultado = aplicar_regras(regras, dry_run=dry_run, somente_sem_categoria=somente_sem_categoria)
+        return Response({'dry_run': dry_run, 'regras': resultado})
+
+    @action(detail=True, methods=['post'])
+    def aplicar(self, request, pk=None):
+        return self._aplicar(request, [self.get_object()])
+
+    @action(detail=False, methods=['post'], url_path='aplicar')
+    def aplicar_todas(self, request):
+        return self._aplicar(request, list(self.get_queryset().filter(ativa=True)))
+
+
+class AgregadoJanela(Func):
+    """Agregação aplicada como função de janela sobre linhas já agrupadas, ex.: SUM(SUM(valor)) OVER (...)."""
+    window_compatible = True
+
+
+class SerieTemporalView(LeituraEmReplicaMixin, APIView):
+    """
+    API endpoint de séries temporais para os gráficos, em uma única consulta.
+    Parâmetros:
+      - inicio / fim (AAAA-MM-DD): intervalo arbitrário (padrão: últimos 12 meses até hoje)
+      - granularidade: dia, semana, mes, trimestre ou ano (também aceita day/week/month/quarter/year)
+      - dimensoes: lista separada por vírgula entre categoria, tipo e status (opcional)
+      - janela: número de períodos das somas/médias móveis (padrão 3)
+      - filtros do TransacaoFilter (tipo, status, categoria, descricao, valor_min, valor_max)
+    O agrupamento usa date_trunc e as médias móveis usam funções de janela no próprio banco.
+    """
+    GRANULARIDADES = {
+        'dia': 'day', 'semana': 'week', 'mes': 'month', 'trimestre': 'quarter', 'ano': 'year',
+        'day': 'day', 'week': 'week', 'month': 'month', 'quarter': 'quarter', 'year': 'year',
+    }
+    DIMENSOES = {'categoria': 'categoria_nome', 'tipo': 'tipo', 'status': 'status'}
+
+    def get(self, request, format=None):
+        params = request.query_params
+        try:
+            fim = date.fromisoformat(params['fim']) if params.get('fim') else timezone.now().date()
+            inicio = date.fromisoformat(params['inicio']) if params.get('inicio') else fim - timedelta(days=365)
+        except ValueError:
+            raise ValidationError({'inicio': "Use datas no formato AAAA-MM-DD."})
+        if inicio > fim:
+            raise ValidationError({'inicio': "A data de início deve ser anterior à data de fim."})
+
+        granularidade = self.GRANULARIDADES.get(params.get('granularidade', 'mes'))
+        if granularidade is None:
+            raise ValidationError({'granularidade': f"Use uma entre: {', '.join(list(self.GRANULARIDADES)[:5])}."})
+
+        nomes_dimensoes = [nome for nome in params.get('dimensoes', '').split(',') if nome]
+        if any(nome not in self.DIMENSOES for nome in nomes_dimensoes):
+            raise ValidationError({'dimensoes': f"Use uma ou mais entre: {', '.join(self.DIMENSOES)}."})
+        dimensoes = [self.DIMENSOES[nome] for nome in nomes_dimensoes]
+
+        janela = params.get('janela', '3')
+        janela = int(janela) if janela.isdigit() else 0
+        if janela < 1:
+            raise ValidationError({'janela': "A janela deve ter pelo menos 1 período."})
+
+        transacoes = TransacaoFilter(params, queryset=Transacao.objects.all()).qs.filter(
+            data_transacao__gte=inicio,
+            data_transacao__lte=fim,
+        )
+
+        receitas = soma(filter=Q(tipo='receita'))
+        despesas = soma(filter=Q(tipo='despesa'))
+
+        def movel(expressao, funcao='SUM'):
+            return Window(
+                expression=AgregadoJanela(expressao, function=funcao),
+                partition_by=[F(dimensao) for dimensao in dimensoes] or None,
+                order_by=F('periodo').asc(),
+                frame=RowRange(start=-(janela - 1), end=0),
+            )
+
+        linhas = (
+            transacoes
+            .annotate(periodo=Trunc('data_transacao', granularidade))
+            .values('periodo', *dimensoes)
+            .annotate(
+                receitas=receitas,
+                despesas=despesas,
+                quantidade=Count('id'),
+            )
+            # As janelas precisam vir num annotate separado para não entrarem no GROUP BY
+            .annotate(
+                receitas_movel=movel(receitas),
+                despesas_movel=movel(despesas),
+                periodos_na_janela=movel(Value(1), 'COUNT'),
+            )
+            .order_by(*dimensoes, 'periodo')
+        )
+
+        serie = []
+        for linha in linhas:
+            receita = para_decimal(linha['receitas'])
+            despesa = para_decimal(linha['despesas'])
+            receita_movel = para_decimal(linha['receitas_movel'])
+            despesa_movel = para_decimal(linha['despesas_movel'])
+            periodos = Decimal(linha['periodos_na_janela'])
+            item = {'periodo': linha['periodo']}
+            item.update({nome: linha[self.DIMENSOES[nome]] for nome in nomes_dimensoes})
+            item.update({
+                'receitas': receita,
+                'despesas': despesa,
+                'saldo': receita - despesa,
+                'quantidade': linha['quantidade'],
+                'receitas_soma_movel': receita_movel,
+                'despesas_soma_movel': despesa_movel,
+                'saldo_soma_movel': receita_movel - despesa_movel,
+                'receitas_media_movel': receita_movel / periodos,
+                'despesas_media_movel': despesa_movel / periodos,
+                'saldo_media_movel': (receita_movel - despesa_movel) / periodos,
+            })
+            serie.append(item)
+
+        data = {
+            'inicio': inicio,
+            'fim': fim,
+            'granularidade': granularidade,
+            'dimensoes': nomes_dimensoes,
+            'janela': janela,
+            'serie': serie,
+        }
+        return Response(data)
+
+
+class RelatorioAnualView(APIView):
+    """
+    API endpoint do relatório anual: saldo mensal, totais por categoria, metas e alertas/sugestões.
+    ?ano=AAAA (padrão: ano atual) e ?formato=xlsx|pdf (padrão: xlsx). O arquivo é enviado em streaming.
+      - ?assincrono=1: enfileira a geração (tarefa relatorios.gerar), que grava o arquivo no storage
+      - ?armazenado=1: envia o arquivo já gravado por essa tarefa (404 se ainda não existir)
+    """
+    def get(self, request, format=None):
+        from . import relatorios # Geração de planilhas/PDF: só carregada por quem pede relatórios
+        try:
+            ano = int(request.query_params.get('ano', timezone.now().year))
+        except ValueError:
+            raise ValidationError({'ano': "Informe o ano com 4 dígitos."})
+        formato = request.query_params.get('formato', 'xlsx')
+        if formato not in relatorios.FORMATOS:
+            raise ValidationError({'formato': f"Formatos disponíveis: {', '.join(relatorios.FORMATOS)}."})
+
+        if request.query_params.get('assincrono') in ('1', 'true'):
+            tarefa_criada = tarefas.enfileirar('relatorios.gerar', anos=[ano], formatos=[formato])
+            return Response(TarefaSerializer(tarefa_criada).data, status=status.HTTP_202_ACCEPTED)
+        if request.query_params.get('armazenado') in ('1', 'true'):
+            arquivo = relatorios.abrir_armazenado(ano, formato)
+            if arquivo is None:
+                raise Http404("Relatório ainda não gerado.")
+        else:
+            arquivo = relatorios.gerar_arquivo(ano, formato) # No próprio processo: o web worker não cria pool
+        return FileResponse(
+            arquivo, as_attachment=True, filename=relatorios.nome_arquivo(ano, formato),
+            content_type=relatorios.FORMATOS[formato],
+        )
+
+
+class PeriodosView(LeituraEmReplicaMixin, APIView):
+    """
+    API endpoint com os anos/meses que têm transações e quantas há de cada tipo, lido do índice
+    de períodos (O(períodos), sem varrer as transações). Filtros opcionais: ?ano=AAAA e ?tipo=receita|despesa.
+    """
+    def get(self, request, format=None):
+        tipo = request.query_params.get('tipo') or None
+        if tipo is not None and tipo not in dict(Transacao.TIPO_CHOICES):
+            raise ValidationError({'tipo': "Use 'receita' ou 'despesa'."})
+        try:
+            ano = int(request.query_params['ano']) if request.query_params.get('ano') else None
+        except ValueError:
+            raise ValidationError({'ano': "Informe o ano com 4 dígitos."})
+        return Response({
+            'anos': periodos.anos_disponiveis(tipo) if ano is None else [ano],
+            'periodos': periodos.listar(ano, tipo),
+        })
+
+
+class SaudeView(APIView):
+    """
+    API endpoint de health check: executa SELECT 1 em cada banco configurado (primário e réplicas)
+    e informa a latência. Responde 503 se o banco principal estiver indisponível.
+    """
+    def get(self, request, format=None):
+        bancos = {}
+        for alias in connections:
+            inicio = time.perf_counter()
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                bancos[alias] = {'status': 'ok', 'latencia_ms': (time.perf_counter() - inicio) * 1000}
+            except DatabaseError:
+                # O detalhe fica no log: a mensagem do banco pode expor host, usuário ou nome do banco
+                logger.exception("Health check: banco %s indisponível", alias)
+                bancos[alias] = {'status': 'erro'}
+        saudavel = bancos['default']['status'] == 'ok'
+        return Response(
+            {'status': 'ok' if saudavel else 'erro', 'bancos': bancos, 'pool': metricas.metricas_pool()},
+            status=status.HTTP_200_OK if saudavel else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+class MetricasView(APIView):
+    """
+    API endpoint com as métricas do processo atual: requisições (contagem e tempos),
+    conexões físicas abertas por banco e estatísticas do pool de conexões.
+    """
+    def get(self, request, format=None):
+        return Response(metricas.instantaneo())
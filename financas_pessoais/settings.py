@@ -1,7 +1,10 @@
 # financas_pessoais/settings.py
 
 import os
+import tempfile
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metricas.MetricasMiddleware', # Contagem e tempo das requisições (exposto em /api/metricas/)
+    'core.compressao.CompressaoApiMiddleware', # brotli/gzip nas respostas da API
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # WhiteNoise para arquivos estáticos
     'django.contrib.sessions.middleware.SessionMiddleware', # Essencial para o Admin
@@ -51,7 +56,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.auditoria.AuditoriaMiddleware', # Usuário/origem de cada alteração no log de auditoria
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.roteamento.RoteamentoBancoMiddleware', # Roteamento de leituras para as réplicas
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -86,6 +93,51 @@ DATABASES = {
     )
 }
 
+# Réplicas de leitura (opcional): DATABASE_REPLICA_URLS com uma ou mais URLs separadas por vírgula.
+# As views de análise e as ações list/retrieve dos ViewSets leem delas (ver core/roteamento.py).
+# Para testar localmente, aponte a réplica para outro Postgres/SQLite com os mesmos dados
+# (ou para o mesmo arquivo SQLite do banco principal).
+REPLICAS_LEITURA = []
+for indice, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    alias = f'replica_{indice}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=600,
+        ssl_require='RENDER' in os.environ
+    )
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICAS_LEITURA.append(alias)
+
+DATABASE_ROUTERS = ['core.roteamento.ReplicaRouter']
+
+# Conexões com o PostgreSQL (funciona com psycopg2-binary ou psycopg 3; o Django prefere o psycopg 3 se instalado).
+# - DB_POOL=1: pool de conexões nativo do Django 5.1+ (requer `pip install "psycopg[binary,pool]"`). Cada worker mantém
+#   de DB_POOL_MIN a DB_POOL_MAX conexões abertas e reaproveita entre requisições.
+# - DB_PGBOUNCER=1: Django atrás de um PgBouncer em modo "transaction": sem cursores do lado do servidor
+#   e sem prepared statements automáticos (estado de sessão não sobrevive entre transações).
+# Sem nenhum dos dois, mantém as conexões persistentes (CONN_MAX_AGE) de antes.
+USAR_PSYCOPG3 = find_spec('psycopg') is not None
+DB_POOL = os.environ.get('DB_POOL') == '1'
+if DB_POOL and not (USAR_PSYCOPG3 and find_spec('psycopg_pool') is not None):
+    raise ImproperlyConfigured('DB_POOL=1 requer o psycopg 3 com o pool: pip install "psycopg[binary,pool]"')
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER') == '1'
+
+for banco in DATABASES.values():
+    if 'postgresql' not in banco['ENGINE']:
+        continue
+    banco['CONN_HEALTH_CHECKS'] = True # Descarta conexões persistentes quebradas antes de reutilizá-las
+    if DB_POOL:
+        banco['CONN_MAX_AGE'] = 0 # O pool já reaproveita as conexões; o Django exige 0 com pool
+        banco.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN', 1)),
+            'max_size': int(os.environ.get('DB_POOL_MAX', 4)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    if DB_PGBOUNCER:
+        banco['DISABLE_SERVER_SIDE_CURSORS'] = True
+        if USAR_PSYCOPG3:
+            banco.setdefault('OPTIONS', {})['prepare_threshold'] = None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,6 +178,9 @@ STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Arquivos gerados pela aplicação (ex.: relatórios anuais em relatorios/), no storage padrão
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -149,5 +204,85 @@ CSRF_TRUSTED_ORIGINS = [
 
 # Configurações para o Django REST Framework para usar django-filter
 REST_FRAMEWORK = {
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
-}
\ No newline at end of file
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# MessagePack (application/msgpack) como formato alternativo, se o pacote estiver instalado
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('core.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('core.renderers.MessagePackParser')
+
+
+# --- VALORES MONETÁRIOS ---
+# Com VALORES_EM_CENTAVOS=1 as agregações usam as colunas BIGINT em centavos (valor_centavos etc.)
+# e as contas intermediárias ficam em int; a API continua respondendo com os mesmos valores decimais.
+# As colunas em centavos são sempre mantidas, então o modo pode ser ligado/desligado a qualquer momento.
+VALORES_EM_CENTAVOS = os.environ.get('VALORES_EM_CENTAVOS') == '1'
+
+
+# --- MOEDAS ---
+# Cada transação tem sua moeda (padrão BRL). Análises, projeções e insights somam os valores
+# convertidos para MOEDA_RELATORIO usando a tabela local de cotações (TaxaCambio), carregada com
+# `python manage.py carregar_taxas_cambio arquivo.csv`. Nenhum acesso à rede é necessário.
+MOEDA_RELATORIO = os.environ.get('MOEDA_RELATORIO', 'BRL')
+
+# Por quanto tempo (segundos) as conversões só de exibição (valor_relatorio) reaproveitam as cotações em memória
+# sem conferir a versão no banco; contadores e validações conferem sempre
+CAMBIO_CACHE_SEGUNDOS = int(os.environ.get('CAMBIO_CACHE_SEGUNDOS', 300))
+
+
+# Validade (segundos) do cache de /api/transacoes/facets/; qualquer escrita em transações já invalida antes
+FACETAS_CACHE_SEGUNDOS = int(os.environ.get('FACETAS_CACHE_SEGUNDOS', 300))
+
+# Coalescência de /api/projecoes/ e /api/dashboard/ (core/coalescencia.py): requisições idênticas
+# simultâneas compartilham um cálculo. Travas e resultados ficam em COALESCENCIA_DIR, compartilhado
+# pelos workers da máquina. Depois de VALIDADE_SEGUNDOS (ou de uma escrita), o resultado anterior
+# ainda é servido por JANELA_OBSOLETA_SEGUNDOS enquanto um único cálculo o renova.
+COALESCENCIA_DIR = os.environ.get('COALESCENCIA_DIR', os.path.join(tempfile.gettempdir(), 'financas_coalescencia'))
+COALESCENCIA_VALIDADE_SEGUNDOS = int(os.environ.get('COALESCENCIA_VALIDADE_SEGUNDOS', 30))
+COALESCENCIA_JANELA_OBSOLETA_SEGUNDOS = int(os.environ.get('COALESCENCIA_JANELA_OBSOLETA_SEGUNDOS', 5))
+COALESCENCIA_ESPERA_SEGUNDOS = int(os.environ.get('COALESCENCIA_ESPERA_SEGUNDOS', 30))
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'coalescencia': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(COALESCENCIA_DIR, 'cache'),
+    },
+}
+
+
+# Processos usados para pontuar os lotes na detecção de anomalias (tarefa deteccao.executar)
+DETECCAO_PROCESSOS = int(os.environ.get('DETECCAO_PROCESSOS', 1))
+
+# Processos usados para gerar os relatórios anuais fora das requisições (tarefa relatorios.gerar e comando)
+RELATORIOS_PROCESSOS = int(os.environ.get('RELATORIOS_PROCESSOS', os.cpu_count() or 1))
+
+
+# --- FILA DE TAREFAS EM SEGUNDO PLANO ---
+# Com TAREFAS_EM_SEGUNDO_PLANO=1 o trabalho pesado (ex.: reavaliação de insights) é enfileirado
+# na tabela de tarefas e executado por `python manage.py processar_tarefas`, fora dos workers do gunicorn.
+TAREFAS_EM_SEGUNDO_PLANO = os.environ.get('TAREFAS_EM_SEGUNDO_PLANO') == '1'
+
+# Número de threads do worker para cada tipo de tarefa (padrão: 1)
+TAREFAS_CONCORRENCIA = {
+    'insights.atualizar': 1,
+    'categorizacao.aplicar': 1,
+}
+
+# Intervalo (segundos) entre consultas à fila quando não há tarefas pendentes
+TAREFAS_INTERVALO_POLLING = float(os.environ.get('TAREFAS_INTERVALO_POLLING', 2))
+
+# Batimento das tarefas em execução (segundos) e quanto tempo sem batimento faz uma tarefa ser
+# considerada abandonada (worker que caiu) e devolvida à fila como uma nova tentativa
+TAREFAS_BATIMENTO_SEGUNDOS = float(os.environ.get('TAREFAS_BATIMENTO_SEGUNDOS', 30))
+TAREFAS_ABANDONO_SEGUNDOS = float(os.environ.get('TAREFAS_ABANDONO_SEGUNDOS', 300))
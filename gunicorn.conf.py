@@ -0,0 +1,35 @@
+# gunicorn.conf.py
+
+import gc
+import os
+
+# Lido automaticamente pelo gunicorn quando iniciado na raiz do projeto
+# (ex.: gunicorn financas_pessoais.wsgi:application).
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+# A aplicação é importada uma única vez no master; os workers nascem por fork com o Django, o DRF
+# e as views já carregados e compartilham essas páginas de memória (copy-on-write).
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def when_ready(server):
+    # Com preload_app: chamado no master depois de carregar a aplicação e antes de criar os workers
+    if not preload_app:
+        return
+    from core.aquecimento import aquecer
+    server.log.info("Aquecimento no master: %s ms", aquecer())
+    # Move os objetos já criados para a geração permanente: o coletor de lixo dos workers não os
+    # percorre nem altera os seus contadores, o que copiaria as páginas compartilhadas
+    gc.collect()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Sem preload_app, cada worker se aquece antes de aceitar requisições
+    if preload_app:
+        return
+    from core.aquecimento import aquecer
+    worker.log.info("Aquecimento do worker %s: %s ms", worker.pid, aquecer())